@@ -56,3 +56,14 @@ def chroma_path(tmp_path):
 def sqlite_path(tmp_path):
     """Temporary SQLite path for tests."""
     return str(tmp_path / "test.db")
+
+
+@pytest.fixture
+def stores(tmp_path, chroma_path, sqlite_path, monkeypatch):
+    """Fresh vector and SQLite stores for the pipeline (CHROMA_PATH/SQLITE_PATH), empty query cache; returns tmp_path."""
+    from src.query_cache import get_query_cache
+
+    monkeypatch.setenv("CHROMA_PATH", chroma_path)
+    monkeypatch.setenv("SQLITE_PATH", sqlite_path)
+    get_query_cache().clear()
+    return tmp_path
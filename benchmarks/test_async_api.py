@@ -0,0 +1,104 @@
+"""Async API: arun_ingest/arun_rag/adelete_document match the sync calls; embeddings are coalesced."""
+
+import asyncio
+import threading
+import uuid
+
+import pytest
+
+import src.async_embeddings as async_embeddings
+from src.async_embeddings import aembed
+from src.embeddings import embed, get_embedding_service
+from src.pipeline import adelete_document, arun_ingest, arun_rag, run_ingest, run_rag
+
+
+def _write(path, topic: str):
+    path.write_text("\n\n".join(f"{topic} paragraph {i} with Entity{i}. " * 20 for i in range(5)), encoding="utf-8")
+    return path
+
+
+def test_async_matches_sync(stores):
+    a = _write(stores / "a.txt", "Rivers and Valleys")
+    b = _write(stores / "b.txt", "Rivers and Valleys")
+    sync_state = run_ingest(a)
+
+    async def main():
+        state = await arun_ingest(b)
+        assert (await arun_ingest(b))["skipped"]
+        results = [await arun_rag("rivers", top_k=3, use_graph_rag=g, use_raptor=r, use_cache=False)
+                   for g, r in ((False, False), (True, True))]
+        return state, results
+
+    async_state, async_results = asyncio.run(main())
+    assert [c["text"] for c in async_state["chunks"]] == [c["text"] for c in sync_state["chunks"]]
+    assert (async_state["embeddings"] == sync_state["embeddings"]).all()
+    assert async_state["vector_sync"]["added"] == len(sync_state["chunks"])
+    for (g, r), got in zip(((False, False), (True, True)), async_results):
+        want = run_rag("rivers", top_k=3, use_graph_rag=g, use_raptor=r, use_cache=False)
+        assert got["answer"] == want["answer"] and got["query_embedding"] == want["query_embedding"]
+        assert [(c["text"], c["metadata"]) for c in got["chunks"]] == [(c["text"], c["metadata"]) for c in want["chunks"]]
+
+
+def test_concurrent_queries_share_embedding_batches(stores, monkeypatch):
+    run_ingest(_write(stores / "a.txt", "Rivers and Valleys"))
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(stores / "embedding_cache.db"))  # queries must miss
+    service = get_embedding_service()
+    encode_fn, calls = service.encode_fn, []
+    monkeypatch.setattr(service, "encode_fn", lambda texts: calls.append(len(texts)) or encode_fn(texts))
+    queries = [f"question {i} about rivers" for i in range(24)]
+    threads_before = threading.active_count()
+
+    async def main():
+        return await asyncio.gather(*(arun_rag(q, top_k=2) for q in queries))
+
+    results = asyncio.run(main())
+    assert [r["query"] for r in results] == queries
+    assert sum(calls) == len(queries) and len(calls) < len(queries)
+    assert threading.active_count() - threads_before <= async_embeddings._default_workers()
+    assert all(r["chunks"] for r in results)
+
+
+def test_aembed_matches_embed_and_propagates_errors(monkeypatch):
+    texts = ["alpha", "beta", "gamma"]
+
+    async def main():
+        return await asyncio.gather(aembed(texts[:1]), aembed(texts[1:], as_numpy=True), aembed([]))
+
+    one, two, empty = asyncio.run(main())
+    assert one == embed(texts[:1]) and two.tolist() == embed(texts[1:]) and empty == []
+
+    def broken(texts):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(get_embedding_service(), "encode_fn", broken)
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        asyncio.run(aembed([f"delta {uuid.uuid4()}"]))  # uncached, so it reaches the model
+
+
+def test_aembed_cache_io_off_the_event_loop(stores, monkeypatch):
+    from src.embedding_cache import EmbeddingCache
+
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(stores / "embedding_cache.db"))
+    threads = []
+    for name in ("get_many", "put_many"):
+        original = getattr(EmbeddingCache, name)
+        monkeypatch.setattr(
+            EmbeddingCache, name,
+            lambda self, *a, _f=original, _n=name: threads.append((_n, threading.current_thread())) or _f(self, *a),
+        )
+
+    async def main():
+        return threading.current_thread(), await aembed(["epsilon", "zeta"]), await aembed(["epsilon"])
+
+    loop_thread, first, again = asyncio.run(main())
+    assert again == first[:1]
+    assert [n for n, _ in threads] == ["get_many", "put_many", "get_many"]
+    assert all(t is not loop_thread for _, t in threads)
+
+
+def test_adelete_document(stores):
+    state = run_ingest(_write(stores / "a.txt", "Rivers and Valleys"))
+    assert run_rag("rivers")["chunks"]
+    asyncio.run(adelete_document(state["document_id"]))
+    after = run_rag("rivers")
+    assert not after["cached"] and after["chunks"] == []
@@ -0,0 +1,41 @@
+"""Batch directory ingest: parallel extraction, batched embedding, per-file report."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from src.batch_ingest import collect_paths
+from src.pipeline import run_ingest_many, run_rag
+
+
+@pytest.fixture
+def doc_dir(tmp_path):
+    d = tmp_path / "docs"
+    (d / "nested").mkdir(parents=True)
+    (d / "a.txt").write_text("Alpha document about rivers.\n\nSecond paragraph on rivers.", encoding="utf-8")
+    (d / "nested" / "b.txt").write_text("Beta document about mountains.", encoding="utf-8")
+    (d / "c.txt").write_text("نَصٌّ عَرَبِيٌّ عَنِ الْجِبَالِ.", encoding="utf-8")
+    (d / "broken.txt").write_bytes(b"\xff\xfe\xfa not utf-8")
+    (d / "ignored.md").write_text("not ingested", encoding="utf-8")
+    return d
+
+
+def test_collect_paths_filters_extensions(doc_dir):
+    names = sorted(p.name for p in collect_paths(doc_dir))
+    assert names == ["a.txt", "b.txt", "broken.txt", "c.txt"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_ingest_many_reports_per_file(doc_dir, tmp_path, workers):
+    os.environ["CHROMA_PATH"] = str(tmp_path / f"chroma{workers}")
+    os.environ["SQLITE_PATH"] = str(tmp_path / f"db{workers}.sqlite")
+    Path(tmp_path / f"chroma{workers}").mkdir(parents=True, exist_ok=True)
+    report = run_ingest_many(doc_dir, workers=workers, batch_size=2)
+    by_name = {Path(r["file_path"]).name: r for r in report["results"]}
+    assert report["succeeded"] == 3 and report["failed"] == 1
+    assert by_name["broken.txt"]["status"] == "error" and "UnicodeDecodeError" in by_name["broken.txt"]["error"]
+    assert by_name["a.txt"]["status"] == "ok" and by_name["a.txt"]["chunks"] >= 1
+
+    result = run_rag("rivers", top_k=2)
+    assert any("rivers" in c["text"] for c in result["chunks"])
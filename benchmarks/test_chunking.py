@@ -3,7 +3,8 @@
 import pytest
 
 from src.parser.analyzer import analyze_content
-from src.parser.chunkers import chunk_fixed, chunk_dynamic
+from src.parser.chunkers import chunk_fixed, chunk_dynamic, iter_chunks_dynamic, iter_chunks_fixed
+from src.parser.prepare import stream_document
 
 
 def test_fixed_chunking_has_overlap():
@@ -31,3 +32,39 @@ def test_analyzer_returns_strategy():
     result = analyze_content(text, [])
     assert result["strategy"] in ("fixed", "dynamic")
     assert "params" in result
+
+
+def test_streaming_fixed_chunker_is_incremental():
+    consumed = []
+
+    def pages():
+        for i in range(1000):
+            consumed.append(i)
+            yield {"page": i + 1, "text": f"Page {i} first sentence. Page {i} second sentence."}
+
+    chunks = iter_chunks_fixed(pages(), {"chunk_size": 32, "overlap": 8})
+    first = next(chunks)
+    assert len(consumed) < 10  # only the pages needed for the first chunk were pulled
+    joined = "\n\n".join(f"Page {i} first sentence. Page {i} second sentence." for i in range(1000))
+    assert joined[first["start"] : first["end"]].startswith("Page 0 first")
+    rest = list(chunks)
+    assert [c["index"] for c in [first, *rest]] == list(range(len(rest) + 1))
+    assert all(joined[c["start"] : c["end"]].split() == c["text"].split() for c in rest)
+    assert [c["text"] for c in [first, *rest]] == [c["text"] for c in chunk_fixed(joined, {"chunk_size": 32, "overlap": 8})]
+
+
+def test_streaming_dynamic_matches_list_version():
+    structure = [{"text": f"Section {i}. " * (i % 7 + 1)} for i in range(50)]
+    text = "\n\n".join(s["text"] for s in structure)
+    params = {"min_chunk_chars": 20, "max_chunk_chars": 200}
+    streamed = list(iter_chunks_dynamic(iter(structure), params))
+    assert streamed == chunk_dynamic(text, structure, params)
+    assert all(text[c["start"] : c["start"] + 10] == c["text"][:10] for c in streamed)
+
+
+def test_stream_document_yields_chunks(sample_txt_path):
+    doc = stream_document(sample_txt_path)
+    assert doc["strategy"] in ("fixed", "dynamic")
+    chunks = list(doc["chunks"])
+    assert chunks and all(c["content_hash"] for c in chunks)
+    assert "sample document" in chunks[0]["text"]
@@ -0,0 +1,64 @@
+"""Embedding cache: LRU + SQLite tiers, hit/miss counters, encode only misses."""
+
+import numpy as np
+import pytest
+
+import src.embeddings as embeddings
+from src.embedding_cache import EmbeddingCache, text_key
+
+
+class CountingModel:
+    def __init__(self):
+        self.encoded: list[str] = []
+
+    def encode(self, texts, show_progress_bar=False, normalize_embeddings=False):
+        self.encoded.extend(texts)
+        return np.array([[float(len(t)), float(sum(map(ord, t)) % 97), 1.0] for t in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def counting_model(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "cache.db"))
+    # Encode with the patched model whatever backend the environment selects
+    monkeypatch.setenv("EMBEDDING_BACKEND", "sentence-transformers")
+    model = CountingModel()
+    monkeypatch.setattr(embeddings, "_model", model)
+    return model
+
+
+def test_embed_encodes_each_missing_text_once(counting_model):
+    first = ["alpha", "نَصٌّ عَرَبِيٌّ", "alpha"]
+    out = embeddings.embed(first)
+    # Duplicate encoded once; the embedding service encodes longest texts first
+    assert sorted(counting_model.encoded) == sorted(["alpha", "نَصٌّ عَرَبِيٌّ"])
+    assert out[0] == out[2] and out[0] != out[1]
+
+    again = embeddings.embed(["beta", "alpha", "  alpha "])
+    assert counting_model.encoded[-1] == "beta" and len(counting_model.encoded) == 3
+    assert again[1] == out[0] and again[2] == out[0]
+    assert embeddings.embed(first, as_numpy=True).shape == (3, 3)
+    stats = embeddings.cache_stats()
+    assert stats["misses"] == 3 and stats["memory_hits"] >= 5
+
+
+def test_disk_tier_survives_new_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    vec = np.arange(4, dtype=np.float32)
+    EmbeddingCache(path).put_many("m", {text_key("hello"): vec})
+    cache = EmbeddingCache(path)
+    assert np.array_equal(cache.get_many("m", [text_key("hello")])[text_key("hello")], vec)
+    assert cache.get_many("other-model", [text_key("hello")]) == {}
+    assert cache.stats()["disk_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_lru_respects_byte_budget():
+    cache = EmbeddingCache("", max_bytes=3 * 16)
+    for i in range(5):
+        cache.put_many("m", {str(i): np.zeros(4, dtype=np.float32)})
+    assert cache.stats()["memory_bytes"] <= 3 * 16
+    assert cache.get_many("m", ["0", "4"]).keys() == {"4"}
+
+
+def test_text_key_keeps_diacritics():
+    assert text_key("عربي") != text_key("عَرَبِي")
+    assert text_key(" a  b ") == text_key("a b")
@@ -0,0 +1,93 @@
+"""Embedding service: concurrent requests share batches, results keep request order, histograms."""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import src.instrumentation as instrumentation
+from src.embedding_service import EmbeddingService
+
+
+class RecordingEncoder:
+    """Encodes a text as [len, first char code]; records the batches it was called with."""
+
+    def __init__(self, delay: float = 0.0):
+        self.batches: list[list[str]] = []
+        self.delay = delay
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        return np.array([[len(t), ord(t[0])] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_threads_are_batched_in_order():
+    encoder = RecordingEncoder(delay=0.01)
+    service = EmbeddingService(encoder, batch_size=32, max_wait=0.05)
+    requests = [[f"{'x' * (i % 7 + 1)}{i}", f"y{i}"] for i in range(16)]
+    results: dict[int, np.ndarray] = {}
+
+    def worker(i: int) -> None:
+        results[i] = service.encode(requests[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    service.close()
+
+    for i, texts in enumerate(requests):
+        assert results[i].tolist() == [[len(t), ord(t[0])] for t in texts]
+    assert len(encoder.batches) < 16
+    for batch in encoder.batches:
+        assert [len(t) for t in batch] == sorted((len(t) for t in batch), reverse=True)
+    stats = service.stats()
+    assert stats["batch_size"]["sum"] == 32 and stats["batch_size"]["count"] == len(encoder.batches)
+
+
+def test_flush_on_size_and_timeout():
+    encoder = RecordingEncoder()
+    service = EmbeddingService(encoder, batch_size=4, max_wait=10.0)
+    start = time.perf_counter()
+    assert service.encode(["a", "b", "c", "d", "e"]).shape == (5, 2)  # at or over batch_size: no wait
+    assert time.perf_counter() - start < 5.0
+    service.close()
+
+    service = EmbeddingService(encoder, batch_size=1000, max_wait=0.01)
+    assert service.submit(["z"]).result(timeout=5).tolist() == [[1, ord("z")]]
+    assert service.encode([]).shape == (0, 0)
+    service.close()
+
+
+def test_futures_work_from_coroutines_and_carry_errors():
+    service = EmbeddingService(RecordingEncoder(), batch_size=64, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(*(asyncio.wrap_future(service.submit([f"q{i}"])) for i in range(10)))
+
+    out = asyncio.run(main())
+    assert [r.tolist() for r in out] == [[[2, ord("q")]]] * 10
+    service.close()
+
+    def broken(texts):
+        raise RuntimeError("model crashed")
+
+    failing = EmbeddingService(broken, max_wait=0.0)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        failing.encode(["a"])
+    failing.close()
+
+
+def test_histograms_exported():
+    service = EmbeddingService(RecordingEncoder(), max_wait=0.0).register_metrics("test_embedding")
+    service.encode(["one", "two"])
+    service.close()
+    snap = instrumentation.snapshot()["histograms"]
+    assert snap["test_embedding_batch_size"]["count"] == 1
+    prom = instrumentation.to_prometheus()
+    assert 'rag_test_embedding_batch_size_bucket{le="2"} 1' in prom
+    assert "# TYPE rag_test_embedding_queue_depth histogram" in prom
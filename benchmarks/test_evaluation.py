@@ -0,0 +1,112 @@
+"""Retrieval-quality evaluation: labeled sets, recall@k / MRR / nDCG, per-mode reports."""
+
+import json
+import math
+
+import pytest
+
+from src.bench.evaluation import (
+    evaluate,
+    format_evaluation,
+    judge,
+    load_labeled_set,
+    mode_options,
+    ndcg_at_k,
+    parse_labeled_set,
+    reciprocal_rank,
+    recall_at_k,
+)
+from src.pipeline import run_ingest
+
+
+def _chunk(document_id, chunk_index, start=0, end=0):
+    return {"text": "", "metadata": {"document_id": document_id, "chunk_index": chunk_index, "start": start, "end": end}}
+
+
+def test_metrics():
+    relevant = parse_labeled_set({"queries": [{"query": "q", "relevant": [
+        {"document_id": "a", "chunks": [1, 2], "grade": 2},
+        {"document_id": "b"},
+    ]}]})["queries"][0]["relevant"]
+    retrieved = [_chunk("c", 0), _chunk("a", 0), _chunk("a", 2), _chunk("a", 1), _chunk("b", 7)]
+    judged = judge(retrieved, relevant)
+    assert [gain for gain, _ in judged] == [0, 0, 2, 2, 1]
+    assert reciprocal_rank(judged) == pytest.approx(1 / 3)
+    assert reciprocal_rank(judged, k=2) == 0.0
+    assert recall_at_k(judged, 2, 3) == 0.5 and recall_at_k(judged, 2, 5) == 1.0
+    # Second chunk of an already-found item adds nothing; ideal is grades (2, 1) at ranks 1, 2
+    ideal = 3 + 1 / math.log2(3)
+    assert ndcg_at_k(judged, [2, 1], 5) == pytest.approx((3 / math.log2(4) + 1 / math.log2(6)) / ideal)
+    assert ndcg_at_k(judge([_chunk("a", 1), _chunk("b", 0)], relevant), [2, 1], 2) == pytest.approx(1.0)
+    assert ndcg_at_k([], [], 5) == 0.0
+
+
+def test_char_ranges_match_overlapping_chunks():
+    relevant = parse_labeled_set({"queries": [{"query": "q", "relevant": [{"document_id": "a", "chars": [100, 150]}]}]})
+    item = relevant["queries"][0]["relevant"]
+    gains = [g for g, _ in judge([_chunk("a", 0, 0, 100), _chunk("a", 1, 90, 120), _chunk("a", 2, 149, 200)], item)]
+    assert gains == [0, 1, 1]
+
+
+def test_mode_options():
+    assert mode_options("vector") == {"retrieval_mode": "vector", "use_graph_rag": False, "use_raptor": False}
+    assert mode_options("graph+raptor") == {"retrieval_mode": "vector", "use_graph_rag": True, "use_raptor": True}
+    assert mode_options("hybrid+raptor")["retrieval_mode"] == "hybrid"
+    for bad in ("rerank", "hybrid+lexical"):
+        with pytest.raises(ValueError):
+            mode_options(bad)
+
+
+def test_load_labeled_set_resolves_paths(tmp_path):
+    from src.parser.prepare import document_id_for
+
+    labels = tmp_path / "labels.jsonl"
+    labels.write_text(
+        json.dumps({"query": "nile", "relevant": [{"path": "rivers.txt", "chunk_index": 1}]}) + "\n\n"
+        + json.dumps({"query": "sahara", "relevant": ["abc"]}) + "\n",
+        encoding="utf-8",
+    )
+    labeled = load_labeled_set(labels)
+    assert [q["query"] for q in labeled["queries"]] == ["nile", "sahara"]
+    first = labeled["queries"][0]["relevant"][0]
+    assert first["document_id"] == document_id_for(str(tmp_path / "rivers.txt")) and first["chunks"] == (1, 1)
+    assert labeled["queries"][1]["relevant"][0]["document_id"] == "abc"
+
+    (tmp_path / "labels.json").write_text(json.dumps({"documents": ["rivers.txt"], "queries": []}), encoding="utf-8")
+    assert load_labeled_set(tmp_path / "labels.json")["documents"] == [str(tmp_path / "rivers.txt")]
+
+
+def test_evaluate_modes(stores, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "stub")
+    docs = {
+        "rivers.txt": "Rivers flow through green valleys.\n\nThe Nile is the longest river in Africa.",
+        "deserts.txt": "Sand dunes cover the desert.\n\nCamels cross the Sahara desert at night.",
+        "forests.txt": "Tall pine trees grow in northern forests.\n\nOwls hunt mice in the forest.",
+    }
+    for name, text in docs.items():
+        (stores / name).write_text(text, encoding="utf-8")
+        run_ingest(stores / name)
+    labeled = parse_labeled_set({"queries": [
+        {"query": "camels Sahara desert", "relevant": [{"path": "deserts.txt"}]},
+        {"query": "Nile river Africa", "relevant": [{"path": "rivers.txt"}]},
+        {"query": "owls forest pine trees", "relevant": [{"path": "forests.txt"}]},
+    ]}, base=stores)
+
+    modes = ("vector", "graph+raptor", "lexical")
+    report = evaluate(labeled, modes=modes, ks=(1, 3))
+    assert report["ks"] == [1, 3] and report["queries"] == 3 and list(report["modes"]) == list(modes)
+    for mode, r in report["modes"].items():
+        assert 0 <= r["recall"]["1"] <= r["recall"]["3"] <= 1, mode
+        assert 0 <= r["ndcg"]["3"] <= 1 and 0 <= r["mrr"] <= 1
+        assert r["latency"]["n"] == 3 and len(r["per_query"]) == 3 and r["batch"]["per_query"] > 0
+    # Every query names its document: word-overlap retrieval ranks it first
+    for mode in ("vector", "lexical"):
+        assert report["modes"][mode]["mrr"] == 1.0 and report["modes"][mode]["recall"]["1"] == 1.0
+    assert report["modes"]["graph+raptor"]["options"]["use_raptor"]
+    json.dumps(report)
+    table = format_evaluation(report)
+    assert "graph+raptor" in table and "nDCG@3" in table
+
+    untimed = evaluate(labeled, modes=("vector",), ks=(3,), time_queries=False)["modes"]["vector"]
+    assert untimed["latency"]["n"] == 0 and untimed["per_query"][0]["latency"] is None
+    assert "-" in format_evaluation({"ks": [3], "queries": 3, "modes": {"vector": untimed}})
@@ -2,7 +2,14 @@
 
 import pytest
 
-from src.rag.graph_rag import build_graph, retrieve_subgraph
+from src.rag.graph_rag import (
+    EntityIndex,
+    build_graph,
+    cooccurrence_edges,
+    extract_chunk_entities,
+    retrieve_subgraph,
+)
+from src.storage.graph_store import GraphStore
 
 
 def test_build_graph():
@@ -20,3 +27,60 @@ def test_retrieve_subgraph_without_graph():
     result = retrieve_subgraph("world", chunks, graph=None, top_k=1)
     assert len(result) >= 1
     assert "Hello" in result[0].get("text", "") or "world" in result[0].get("text", "")
+
+
+def test_retrieve_subgraph_reuses_stored_embeddings():
+    chunks = [{"text": "Alice met Bob.", "index": 0}, {"text": "Charlie likes tea.", "index": 1}]
+
+    def no_embed(texts):
+        raise AssertionError("stored embeddings should be reused")
+
+    result = retrieve_subgraph(
+        "Alice",
+        chunks,
+        build_graph(chunks),
+        top_k=1,
+        embed_fn=no_embed,
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+        query_embedding=[1.0, 0.1],
+    )
+    assert result[0]["text"] == "Alice met Bob."
+
+
+def test_graph_store_persists_per_document(sqlite_path):
+    store = GraphStore(sqlite_path)
+    doc_a = [{"text": "Alice met Bob in Paris.", "index": 0}, {"text": "Bob works at Acme.", "index": 1}]
+    doc_b = [{"text": "Charlie visited Paris.", "index": 0}]
+    for doc_id, chunks in (("a", doc_a), ("b", doc_b)):
+        entities = extract_chunk_entities(chunks)
+        store.save_document(doc_id, entities, cooccurrence_edges(entities))
+
+    G = store.load_graph(["a", "b"])
+    assert G.has_node("Alice") and G.has_node("Charlie")
+    index = store.load_index(["a", "b"])
+    assert [(d, i) for d, i, _ in index.postings("Bob")] == [("a", 0), ("a", 1)]
+    assert [(d, i) for d, i, _ in index.postings("Paris")] == [("a", 0), ("b", 0)]
+
+    store.delete_document("a")
+    G = store.load_graph(["a", "b"])
+    assert not G.has_node("Alice")
+    assert G.has_node("Charlie")
+    assert store.get_postings("Paris") == [("b", 0, 1)]
+
+
+def test_entity_index_keeps_every_chunk_and_weights_rare_entities():
+    chunks = [
+        {"text": "Acme hired Zed.", "index": 0},
+        {"text": "Acme opened an office.", "index": 1},
+        {"text": "Acme and Zed signed a deal.", "index": 2},
+        {"text": "Acme grew, Acme expanded.", "index": 3},
+    ]
+    index = EntityIndex.from_chunks(chunks)
+    # Every mention is kept, not only the last chunk; the most frequent mention sorts first
+    assert [i for _, i, _ in index.postings("Acme")] == [3, 0, 1, 2]
+    assert index.idf("Zed") > index.idf("Acme")
+
+    expanded = index.expand([(None, 0)], limit=3)
+    assert expanded[0][0] == (None, 2)  # shares the rare entity "Zed"
+    assert (None, 0) not in dict(expanded)
+    assert len(index.expand([(None, 0)], fan_out=1, limit=10)) <= 2
@@ -0,0 +1,143 @@
+"""BM25 (FTS5) index, Arabic-aware matching, lexical and hybrid (RRF) retrieval modes."""
+
+import asyncio
+
+import pytest
+
+import src.graphs.rag_graph as rag_graph
+from src.pipeline import arun_rag, delete_document, run_ingest, run_rag, run_rag_many
+from src.rag.hybrid import reciprocal_rank_fusion
+from src.storage.sql_store import SQLStore
+
+
+@pytest.fixture
+def corpus(stores):
+    docs = {
+        "rivers.txt": "Rivers flow through green valleys.\n\nThe Nile is the longest river.",
+        "deserts.txt": "Sand dunes cover the desert.\n\nCamels cross the Sahara.",
+        "arabic.txt": "هَذَا نَصٌّ عَرَبِيٌّ عَنِ الْكِتَابِ.\n\nالمَكْتَبَةُ كَبِيرَةٌ جِدًّا.",
+    }
+    ids = {}
+    for name, text in docs.items():
+        path = stores / name
+        path.write_text(text, encoding="utf-8")
+        ids[name] = run_ingest(path)["document_id"]
+    return ids
+
+
+def test_bm25_index_filled_at_ingest(corpus):
+    hits = SQLStore().search_chunks("Sahara camels", top_k=3)
+    assert hits and "Sahara" in hits[0]["document"]
+    assert hits[0]["metadata"]["document_id"] == corpus["deserts.txt"]
+    assert [h["bm25"] for h in hits] == sorted(h["bm25"] for h in hits)
+    delete_document(corpus["deserts.txt"])
+    assert SQLStore().search_chunks("Sahara camels", top_k=3) == []
+
+
+def test_bm25_rows_keyed_by_chunk_rowid(corpus, stores):
+    store = SQLStore()
+    conn = store._conn()
+    doc_id = corpus["rivers.txt"]
+    pairs = conn.execute(
+        "SELECT c.id, f.rowid FROM chunks c LEFT JOIN chunks_bm25 f ON f.rowid = c.id WHERE c.document_id = ?", (doc_id,)
+    ).fetchall()
+    assert pairs and all(chunk_id == fts_id for chunk_id, fts_id in pairs)
+    plan = " ".join(
+        row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN DELETE FROM chunks_bm25 WHERE rowid IN (SELECT id FROM chunks WHERE document_id = ?)",
+            (doc_id,),
+        )
+    )
+    assert "idx_chunks_document_id" in plan
+
+    # Re-ingesting one document leaves the others' rows and no stale rows behind
+    run_ingest(stores / "rivers.txt", force=True)
+    assert conn.execute("SELECT COUNT(*) FROM chunks_bm25").fetchone()[0] == conn.execute(
+        "SELECT COUNT(*) FROM chunks"
+    ).fetchone()[0]
+    assert store.search_chunks("Sahara", top_k=1)[0]["metadata"]["document_id"] == corpus["deserts.txt"]
+
+
+def test_arabic_query_without_diacritics_matches(corpus):
+    # Stored text keeps its harakat; the index and the query are normalized alike
+    for query in ("نص عربي", "كتاب", "الكتاب", "مكتبة"):
+        hits = SQLStore().search_chunks(query, top_k=3)
+        assert hits, query
+        assert hits[0]["metadata"]["document_id"] == corpus["arabic.txt"]
+        assert "َ" in hits[0]["document"]
+
+
+def test_metadata_filters_apply_to_bm25(corpus):
+    store = SQLStore()
+    assert store.search_chunks("river", filter_metadata={"document_id": corpus["deserts.txt"]}) == []
+    only = store.search_chunks("river desert", filter_metadata={"document_id": {"$in": [corpus["rivers.txt"]]}})
+    assert only and {h["metadata"]["document_id"] for h in only} == {corpus["rivers.txt"]}
+    first = store.search_chunks("river desert", filter_metadata={"$and": [{"chunk_index": 0}, {"strategy": {"$ne": ""}}]})
+    assert first and all(h["metadata"]["chunk_index"] == 0 for h in first)
+
+
+def test_lexical_mode_does_not_embed(corpus, monkeypatch):
+    monkeypatch.setattr(rag_graph, "embed", lambda texts: pytest.fail("lexical mode must not embed"))
+    result = run_rag("Nile river", top_k=2, retrieval_mode="lexical", use_cache=False)
+    assert "Nile" in result["chunks"][0]["text"]
+    assert "query_embedding" not in result
+    batch = run_rag_many(["Nile", "camels"], top_k=1, retrieval_mode="lexical", use_cache=False)
+    assert "Nile" in batch[0]["chunks"][0]["text"] and "Camels" in batch[1]["chunks"][0]["text"]
+
+
+def test_hybrid_fuses_both_rankings(corpus):
+    filters = {"document_id": corpus["rivers.txt"]}
+    vector = run_rag("Nile", top_k=4, filter_metadata=filters, use_cache=False)["chunks"]
+    lexical = run_rag("Nile", top_k=4, filter_metadata=filters, retrieval_mode="lexical", use_cache=False)["chunks"]
+    hybrid = run_rag("Nile", top_k=4, filter_metadata=filters, retrieval_mode="hybrid", use_cache=False)
+    assert {c["metadata"]["document_id"] for c in hybrid["chunks"]} == {corpus["rivers.txt"]}
+    expected = reciprocal_rank_fusion([vector, lexical], top_k=4)
+    assert [c["metadata"]["chunk_index"] for c in hybrid["chunks"]] == [c["metadata"]["chunk_index"] for c in expected]
+    assert "Nile" in hybrid["chunks"][0]["text"]
+
+    async_result = asyncio.run(arun_rag("Nile", top_k=4, filter_metadata=filters, retrieval_mode="hybrid", use_cache=False))
+    assert [c["text"] for c in async_result["chunks"]] == [c["text"] for c in hybrid["chunks"]]
+
+
+def test_rrf_and_cache_key_by_mode(corpus):
+    a = {"text": "a", "metadata": {"document_id": "d", "chunk_index": 0}}
+    b = {"text": "b", "metadata": {"document_id": "d", "chunk_index": 1}}
+    fused = reciprocal_rank_fusion([[a, b], [b]], k=60)
+    assert [c["text"] for c in fused] == ["b", "a"]
+    assert fused[0]["score"] == pytest.approx(1 / 62 + 1 / 61)
+
+    assert not run_rag("desert", top_k=2, retrieval_mode="lexical")["cached"]
+    assert not run_rag("desert", top_k=2, retrieval_mode="hybrid")["cached"]
+    assert run_rag("desert", top_k=2, retrieval_mode="lexical")["cached"]
+    with pytest.raises(ValueError):
+        run_rag("desert", retrieval_mode="bm42")
+
+
+def test_old_bm25_table_migrated(stores):
+    import sqlite3
+
+    from src.storage import sqlite_pool
+
+    path = str(stores / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE chunks (id INTEGER PRIMARY KEY AUTOINCREMENT, document_id TEXT, chunk_index INTEGER)")
+    conn.execute("INSERT INTO chunks (document_id, chunk_index) VALUES ('a', 0), ('b', 0), ('a', 1)")
+    conn.execute(
+        "CREATE VIRTUAL TABLE chunks_fts USING fts5(body, text UNINDEXED, document_id UNINDEXED, "
+        "chunk_index UNINDEXED, metadata_json UNINDEXED)"
+    )
+    conn.executemany(
+        "INSERT INTO chunks_fts VALUES (?, ?, ?, ?, '{}')",
+        [("nile", "Nile", "a", 0), ("sahara", "Sahara", "b", 0), ("delta", "Delta", "a", 1)],
+    )
+    conn.commit()
+    conn.close()
+
+    store = SQLStore(db_path=path)
+    assert store._conn().execute("SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'").fetchone() is None
+    assert store._conn().execute("SELECT rowid, text FROM chunks_bm25 ORDER BY rowid").fetchall() == [
+        (1, "Nile"), (2, "Sahara"), (3, "Delta")
+    ]
+    store.delete_document("a")
+    assert [h["document"] for h in store.search_chunks("nile sahara delta", top_k=5)] == ["Sahara"]
+    sqlite_pool.close_all()
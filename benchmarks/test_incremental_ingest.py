@@ -0,0 +1,99 @@
+"""Incremental re-ingest: unchanged files are skipped, changed files are diffed per chunk."""
+
+import os
+
+import pytest
+
+from src.parser.prepare import chunk_hash
+from src.pipeline import run_ingest, run_ingest_many
+from src.storage.graph_store import GraphStore
+from src.storage.sql_store import SQLStore
+from src.storage.vector_store import chunk_ids, get_vector_store
+
+
+def _paragraphs(n: int) -> str:
+    return "\n\n".join(f"Paragraph {i} talks about topic number {i}. " * 40 for i in range(n))
+
+
+def test_chunk_ids_are_content_addressed():
+    a = [{"text": "one"}, {"text": "two"}, {"text": "one"}]
+    b = [{"text": "zero"}, *a]
+    ids_a, ids_b = chunk_ids("doc", a), chunk_ids("doc", b)
+    assert ids_a == ids_b[1:]
+    assert len(set(ids_a)) == 3
+    assert ids_a[0].startswith("doc_" + chunk_hash("one")[:16])
+
+
+def test_unchanged_file_is_skipped(stores):
+    path = stores / "a.txt"
+    path.write_text(_paragraphs(6), encoding="utf-8")
+    first = run_ingest(path)
+    assert not first.get("skipped")
+    meta = SQLStore().get_document_metadata(first["document_id"])
+    assert meta["content_hash"] and meta["file_size"] == path.stat().st_size
+
+    second = run_ingest(path)
+    assert second["skipped"]
+    assert [c["text"] for c in second["chunks"]] == [c["text"] for c in first["chunks"]]
+
+    # Touched but identical content: hashed, still skipped, new mtime recorded
+    os.utime(path, (1_000_000, 1_000_000))
+    assert run_ingest(path)["skipped"]
+    assert SQLStore().get_document_metadata(first["document_id"])["file_mtime"] == 1_000_000
+
+    assert not run_ingest(path, force=True).get("skipped")
+
+
+def test_changed_file_reembeds_only_new_chunks(stores):
+    path = stores / "a.txt"
+    path.write_text(_paragraphs(6), encoding="utf-8")
+    first = run_ingest(path)
+    n = len(first["chunks"])
+    assert n > 2
+
+    # Fixed-size chunks: an edit at the end keeps the leading chunks (and their ids) intact
+    path.write_text(_paragraphs(6) + "\n\nA brand new closing paragraph.", encoding="utf-8")
+    second = run_ingest(path)
+    assert not second.get("skipped")
+    sync = second["vector_sync"]
+    assert second["reused_embeddings"] >= 1
+    assert sync["added"] + sync["unchanged"] + sync["updated"] == len(second["chunks"])
+    assert sync["added"] < len(second["chunks"])
+
+    rows = get_vector_store().get_by_document_ids([first["document_id"]])
+    assert [r["id"] for r in rows] == chunk_ids(first["document_id"], second["chunks"])
+
+
+def test_run_ingest_many_skips_unchanged(stores):
+    d = stores / "docs"
+    d.mkdir()
+    (d / "a.txt").write_text(_paragraphs(3), encoding="utf-8")
+    (d / "b.txt").write_text("Beta document about mountains.", encoding="utf-8")
+    assert run_ingest_many(d, workers=1)["succeeded"] == 2
+
+    (d / "b.txt").write_text("Beta document about valleys.", encoding="utf-8")
+    report = run_ingest_many(d, workers=1)
+    status = {os.path.basename(r["file_path"]): r["status"] for r in report["results"]}
+    assert status == {"a.txt": "skipped", "b.txt": "ok"}
+    assert report["skipped"] == 1 and report["failed"] == 0
+    assert run_ingest_many(d, workers=1, force=True)["succeeded"] == 2
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_failed_store_is_redone_by_next_ingest(stores, monkeypatch, pipelined):
+    path = stores / "a.txt"
+    path.write_text(_paragraphs(4), encoding="utf-8")
+
+    def broken(self, *args, **kwargs):
+        raise RuntimeError("graph store down")
+
+    with monkeypatch.context() as m:
+        m.setattr(GraphStore, "save_document", broken)
+        with pytest.raises(RuntimeError, match="graph store down"):
+            run_ingest(path, pipelined=pipelined)
+
+    state = run_ingest(path, pipelined=pipelined)
+    assert not state.get("skipped")
+    assert GraphStore().load_index([state["document_id"]]).num_chunks == len(state["chunks"])
+    assert SQLStore().get_document_metadata(state["document_id"])["content_hash"]
+    assert run_ingest(path, pipelined=pipelined)["skipped"]
@@ -0,0 +1,63 @@
+"""Instrumentation: per-node spans in the final state, JSON/Prometheus export, disabled overhead."""
+
+import json
+import time
+
+import pytest
+
+import src.instrumentation as instrumentation
+from src.instrumentation import instrument_node, span
+from src.pipeline import run_ingest, run_rag
+
+
+@pytest.fixture
+def instrumented():
+    instrumentation.configure("memory")
+    instrumentation.reset()
+    yield
+    instrumentation.configure("0")
+    instrumentation.reset()
+
+
+def test_ingest_and_rag_report_node_spans(stores, instrumented):
+    path = stores / "a.txt"
+    path.write_text("\n\n".join(f"Paragraph {i} about Rivers and Topic{i}. " * 30 for i in range(8)), encoding="utf-8")
+    ingest = run_ingest(path)
+    spans = {s["name"]: s for s in ingest["metrics"]["spans"]}
+    for name in ("fingerprint", "extract", "analyze", "chunk", "embed", "store_vector", "store_sql"):
+        assert spans[name]["wall"] >= 0 and spans[name]["cpu"] >= 0
+    assert spans["chunk"]["items"] == spans["embed"]["items"] == len(ingest["chunks"])
+    assert "mem_peak" in spans["embed"] and spans["embed"]["peak_rss"] > 0
+
+    rag = run_rag("rivers", top_k=3, use_graph_rag=True, use_raptor=True)
+    names = [s["name"] for s in rag["metrics"]["spans"]]
+    assert {"retrieve", "load_stored_chunks", "graph_rag", "raptor"} <= set(names)
+
+    assert json.loads(instrumentation.to_json())["spans"]["embed"]["calls"] == 1
+    prom = instrumentation.to_prometheus()
+    assert '# TYPE rag_node_seconds_total counter' in prom
+    assert 'rag_node_items_total{node="chunk"}' in prom
+
+
+def test_nested_spans_and_counters(instrumented):
+    with span("outer") as outer:
+        with span("inner", items=3):
+            time.sleep(0.01)
+        outer.items = 1
+    instrumentation.incr("cache_hits")
+    snap = instrumentation.snapshot()
+    assert snap["spans"]["outer"]["wall"] >= snap["spans"]["inner"]["wall"] >= 0.01
+    assert snap["spans"]["inner"]["items"] == 3
+    assert "rag_cache_hits_total 1" in instrumentation.to_prometheus()
+
+
+def test_disabled_overhead_is_negligible():
+    instrumentation.configure("0")
+    node = instrument_node("noop", lambda state: state)
+    n = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        node({})
+    per_call = (time.perf_counter() - start) / n
+    assert per_call < 5e-6
+    assert "noop" not in instrumentation.snapshot()["spans"]
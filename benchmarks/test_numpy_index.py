@@ -0,0 +1,105 @@
+"""Native numpy vector backend: Chroma-compatible semantics, persistence, IVF recall."""
+
+import numpy as np
+import pytest
+
+from src.pipeline import delete_document, run_ingest, run_rag
+from src.storage.numpy_index import NumpyCollection
+from src.storage.vector_store import VectorStore, close_vector_stores
+
+
+def _chunks(n: int) -> list[dict]:
+    return [{"text": f"chunk {i}", "start": i, "end": i + 1} for i in range(n)]
+
+
+@pytest.mark.parametrize("backend", ["numpy", "chroma"])
+def test_backends_agree(tmp_path, backend):
+    rng = np.random.default_rng(0)
+    embs = rng.normal(size=(12, 16)).astype(np.float32)
+    store = VectorStore(str(tmp_path / backend), backend=backend)
+    store.add_chunks(_chunks(6), embs[:6], "a", {"strategy": "fixed"})
+    store.add_chunks(_chunks(6), embs[6:], "b", {"strategy": "dynamic"})
+
+    hits = store.query(embs[3].tolist(), top_k=3)
+    assert hits[0]["metadata"]["document_id"] == "a" and hits[0]["metadata"]["chunk_index"] == 3
+    assert hits[0]["distance"] == pytest.approx(0.0, abs=1e-5)
+    assert [h["distance"] for h in hits] == sorted(h["distance"] for h in hits)
+
+    filtered = store.query(embs[3].tolist(), top_k=3, filter_metadata={"document_id": "b"})
+    assert {h["metadata"]["document_id"] for h in filtered} == {"b"}
+
+    rows = store.get_by_document_ids(["b", "a"])
+    assert [(r["metadata"]["document_id"], r["metadata"]["chunk_index"]) for r in rows][:2] == [("a", 0), ("a", 1)]
+    assert np.allclose(np.asarray(rows[0]["embedding"]), embs[0])
+
+    store.delete_by_document_id("a")
+    assert {h["metadata"]["document_id"] for h in store.query(embs[3].tolist(), top_k=5)} == {"b"}
+    store.close()
+
+
+def test_range_filters_agree_across_backends(tmp_path):
+    embs = np.random.default_rng(2).normal(size=(8, 16)).astype(np.float32)
+    where = {"$and": [{"chunk_index": {"$gte": 2}}, {"chunk_index": {"$lt": 5}}, {"document_id": {"$ne": "b"}}]}
+    results = {}
+    for backend in ("numpy", "chroma"):
+        store = VectorStore(str(tmp_path / backend), backend=backend)
+        store.add_chunks(_chunks(6), embs[:6], "a")
+        store.add_chunks(_chunks(2), embs[6:], "b")
+        hits = store.query(embs[0].tolist(), top_k=8, filter_metadata=where)
+        results[backend] = sorted((h["metadata"]["document_id"], h["metadata"]["chunk_index"]) for h in hits)
+        store.close()
+    assert results["numpy"] == results["chroma"] == [("a", 2), ("a", 3), ("a", 4)]
+
+    col = NumpyCollection(tmp_path / "col")
+    col.add(ids=["x"], embeddings=[[1.0, 0.0]], documents=["X"], metadatas=[{"chunk_index": 1}])
+    assert col.get(where={"chunk_index": {"$gt": 0}})["ids"] == ["x"]
+    assert col.get(where={"missing": {"$lte": 5}})["ids"] == []
+    with pytest.raises(ValueError, match="Unsupported filter operator"):
+        col.get(where={"chunk_index": {"$gtt": 0}})
+
+
+def test_numpy_collection_persists_and_reuses_slots(tmp_path):
+    col = NumpyCollection(tmp_path / "col")
+    col.add(ids=["x", "y", "z"], embeddings=np.eye(3, dtype=np.float32), documents=["X", "Y", "Z"], metadatas=[{"document_id": "d"}] * 3)
+    col.delete(ids=["y"])
+    col.update(ids=["z"], metadatas=[{"document_id": "e"}])
+
+    reopened = NumpyCollection(tmp_path / "col")
+    assert reopened.count() == 2
+    got = reopened.get(where={"document_id": {"$in": ["e"]}}, include=["documents", "metadatas", "embeddings"])
+    assert got["ids"] == ["z"] and got["documents"] == ["Z"] and np.allclose(got["embeddings"][0], [0, 0, 1])
+    reopened.add(ids=["w"], embeddings=[[0.0, 1.0, 0.0]], documents=["W"], metadatas=[{"document_id": "d"}])
+    assert reopened.capacity == 1024  # slot of "y" was reused, no growth
+    res = reopened.query([[0.0, 1.0, 0.1]], n_results=1)
+    assert res["ids"] == [["w"]] and res["documents"] == [["W"]]
+
+
+def test_ivf_recall_against_exact(tmp_path):
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(40, 32))
+    data = (centers[rng.integers(40, size=4000)] + 0.3 * rng.normal(size=(4000, 32))).astype(np.float32)
+    ids = [str(i) for i in range(len(data))]
+    col = NumpyCollection(tmp_path / "ivf", ivf_min=1000, nprobe=8)
+    col.add(ids=ids, embeddings=data, metadatas=[{"document_id": "d"}] * len(ids))
+    assert col._ivf_centers is not None
+
+    queries = data[rng.integers(len(data), size=50)] + 0.1 * rng.normal(size=(50, 32)).astype(np.float32)
+    normed = data / np.linalg.norm(data, axis=1, keepdims=True)
+    recall = []
+    for q in queries:
+        exact = set(np.argsort(-(normed @ q))[:10].astype(str))
+        approx = set(col.query([q], n_results=10, include=[])["ids"][0])
+        recall.append(len(exact & approx) / 10)
+    assert np.mean(recall) >= 0.9
+
+
+def test_pipeline_on_numpy_backend(tmp_path, monkeypatch, sample_txt_path):
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    monkeypatch.setenv("CHROMA_PATH", str(tmp_path / "vectors"))
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "db.sqlite"))
+    state = run_ingest(sample_txt_path)
+    result = run_rag("sample document", top_k=2, use_graph_rag=True, use_raptor=True)
+    assert result["chunks"] and "sample document" in result["chunks"][0]["text"]
+    delete_document(state["document_id"])
+    assert run_rag("sample document", top_k=2)["chunks"] == []
+    close_vector_stores()
@@ -0,0 +1,59 @@
+"""Streaming and page-parallel PDF extraction: page order, laziness, parity with extract()."""
+
+from pathlib import Path
+
+import pytest
+
+from src.parser.extractors import iter_sections
+from src.parser.extractors.pdf_extractor import extract, iter_pages
+
+
+def _write_pdf(path: Path, texts: list[str]) -> Path:
+    """Minimal PDF (Helvetica, one text line per page) so tests need no PDF writer dependency."""
+    n = len(texts)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode()}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {n} >>"
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+    return path
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    return _write_pdf(tmp_path / "doc.pdf", [f"Page number {i} about rivers" for i in range(1, 41)])
+
+
+def test_iter_pages_is_lazy_and_ordered(pdf_path):
+    pages = iter_pages(pdf_path, workers=1)
+    first = next(pages)
+    assert first == {"page": 1, "text": "Page number 1 about rivers"}
+    assert [p["page"] for p in pages] == list(range(2, 41))
+
+
+def test_parallel_matches_serial(pdf_path):
+    serial = list(iter_pages(pdf_path, workers=1))
+    parallel = list(iter_pages(pdf_path, workers=2, block_pages=6))
+    assert parallel == serial
+    assert extract(pdf_path, workers=2)["raw_text"] == extract(pdf_path, workers=1)["raw_text"]
+
+
+def test_iter_sections_dispatches(pdf_path, sample_txt_path):
+    assert next(iter_sections(pdf_path))["page"] == 1
+    assert next(iter_sections(sample_txt_path))["index"] == 0
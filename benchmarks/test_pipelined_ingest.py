@@ -0,0 +1,103 @@
+"""Pipelined ingest: same final state and stores as the ingest graph, stage timings, failure cleanup."""
+
+import numpy as np
+import pytest
+
+import src.pipelined_ingest as pipelined_ingest
+from src.pipeline import run_ingest
+from src.pipelined_ingest import run_ingest_pipelined
+from src.storage.graph_store import GraphStore
+from src.storage.sql_store import SQLStore
+from src.storage.vector_store import get_vector_store
+
+
+def _write(path, n: int = 12):
+    path.write_text("\n\n".join(f"Paragraph {i} about Topic{i} and Rivers. " * 30 for i in range(n)), encoding="utf-8")
+    return path
+
+
+def _snapshot(document_id: str):
+    rows = get_vector_store().get_by_document_ids([document_id])
+    graph = GraphStore().load_graph([document_id])
+    return (
+        [(r["id"], r["document"], r["metadata"]) for r in rows],
+        sorted(graph.edges(data=True)),
+        SQLStore().get_chunks_by_document_id(document_id),
+    )
+
+
+def test_pipelined_matches_graph(stores):
+    a, b = _write(stores / "a.txt"), _write(stores / "b.txt")
+    graph = run_ingest(a)
+    piped = run_ingest_pipelined(str(b), batch_size=3, queue_size=1)
+
+    assert [c["text"] for c in piped["chunks"]] == [c["text"] for c in graph["chunks"]]
+    assert piped["strategy"] == graph["strategy"]
+    assert np.allclose(piped["embeddings"], graph["embeddings"], atol=1e-5)
+    assert piped["vector_sync"] == graph["vector_sync"]
+    ids_a, edges_a, sql_a = _snapshot(graph["document_id"])
+    ids_b, edges_b, sql_b = _snapshot(piped["document_id"])
+    # Same content ids, texts and positions
+    stable = lambda rows: [(r[0].split("_", 1)[1], r[1], r[2]["chunk_index"], r[2]["strategy"]) for r in rows]  # noqa: E731
+    assert stable(ids_a) == stable(ids_b)
+    assert edges_a == edges_b
+    assert [c["chunk_index"] for c in sql_a] == [c["chunk_index"] for c in sql_b]
+
+    stages = piped["stages"]
+    assert set(stages) == {"extract", "embed", "store"}
+    assert all(s["items"] == len(graph["chunks"]) and s["busy"] >= 0 and s["idle"] >= 0 for s in stages.values())
+
+
+def test_pipelined_large_document_matches_graph(stores):
+    # Over 100k chars of plain paragraphs (fixed-size on their own), headings only near the end
+    # (dynamic for the whole document), and uneven blank lines between sections
+    body = [f"  Plain paragraph {i} about Rivers and Topic{i % 40}. " * 12 for i in range(400)]
+    tail = [f"# Chapter {i}\n\nChapter {i} covers Deserts and Topic{i}. " * 3 for i in range(4)]
+    text = "\n\n\n".join(body + tail)
+    assert len("\n\n".join(body)) > 100_000
+    a, b = stores / "a.txt", stores / "b.txt"
+    a.write_text(text, encoding="utf-8")
+    b.write_text(text, encoding="utf-8")
+    graph = run_ingest(a)
+    piped = run_ingest_pipelined(str(b), batch_size=16, queue_size=2)
+
+    assert graph["strategy"] == piped["strategy"] == "dynamic"
+    assert piped["raw_text"] == graph["raw_text"] and piped["pages_or_sections"] == graph["pages_or_sections"]
+    assert piped["chunks"] == graph["chunks"]
+    sql = lambda document_id: [  # noqa: E731
+        {k: v for k, v in c.items() if k != "document_id"} for c in SQLStore().get_chunks_by_document_id(document_id)
+    ]
+    assert sql(piped["document_id"]) == sql(graph["document_id"])
+    vectors = lambda document_id: [  # noqa: E731
+        (r["document"], {k: v for k, v in r["metadata"].items() if k != "document_id"})
+        for r in get_vector_store().get_by_document_ids([document_id])
+    ]
+    assert vectors(piped["document_id"]) == vectors(graph["document_id"])
+
+
+def test_pipelined_reuses_vectors_and_skips_unchanged(stores):
+    path = _write(stores / "a.txt")
+    first = run_ingest(path, pipelined=True)
+    assert run_ingest(path, pipelined=True)["skipped"]
+    again = run_ingest(path, force=True, pipelined=True)
+    assert again["reused_embeddings"] == len(first["chunks"])
+    assert again["vector_sync"]["added"] == 0 and again["vector_sync"]["unchanged"] == len(first["chunks"])
+
+
+def test_pipelined_failure_reraises_and_rolls_back(stores, monkeypatch):
+    path = _write(stores / "a.txt")
+    real_embed = pipelined_ingest.embed
+    calls = []
+
+    def flaky_embed(texts, as_numpy=False):
+        calls.append(len(texts))
+        if len(calls) > 1:
+            raise RuntimeError("embedding backend down")
+        return real_embed(texts, as_numpy=as_numpy)
+
+    monkeypatch.setattr(pipelined_ingest, "embed", flaky_embed)
+    with pytest.raises(RuntimeError, match="embedding backend down"):
+        run_ingest_pipelined(str(path), batch_size=2, queue_size=1)
+    document_id = pipelined_ingest.fingerprint_document(str(path))["document_id"]
+    assert get_vector_store().get_by_document_ids([document_id]) == []
+    assert SQLStore().get_document_metadata(document_id) is None
@@ -0,0 +1,56 @@
+"""Quantized vector storage: memory per vector and recall@k loss against full precision."""
+
+import numpy as np
+import pytest
+
+from src.storage.numpy_index import NumpyCollection
+
+N, DIM, K = 6000, 384, 10
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(60, DIM))
+    data = (centers[rng.integers(60, size=N)] + 0.6 * rng.normal(size=(N, DIM))).astype(np.float32)
+    queries = data[rng.integers(N, size=100)] + 0.3 * rng.normal(size=(100, DIM)).astype(np.float32)
+    normed = data / np.linalg.norm(data, axis=1, keepdims=True)
+    exact = [set(np.argsort(-(normed @ q))[:K]) for q in queries]
+    return data, queries, exact
+
+
+def _recall(col: NumpyCollection, queries: np.ndarray, exact: list[set]) -> float:
+    hits = [len({int(i) for i in col.query([q], n_results=K, include=[])["ids"][0]} & e) for q, e in zip(queries, exact)]
+    return sum(hits) / (K * len(queries))
+
+
+@pytest.mark.parametrize(
+    "quantization,rerank,min_recall,min_ratio",
+    [
+        ("none", 0, 1.0, 1),
+        ("int8", 0, 0.9, 3.5),
+        ("int8", 4, 0.99, 3.5),
+        ("pq", 0, 0.4, 15),
+        ("pq", 8, 0.9, 15),
+    ],
+)
+def test_recall_at_k_vs_full_precision(tmp_path, corpus, quantization, rerank, min_recall, min_ratio):
+    data, queries, exact = corpus
+    col = NumpyCollection(tmp_path / quantization, ivf_min=10**9, quantization=quantization, rerank=rerank, pq_min=N)
+    col.add(ids=[str(i) for i in range(N)], embeddings=data)
+    sizes = col.bytes_per_vector()
+    ratio = sizes["float32"] / (sizes["codes"] or sizes["float32"])
+    recall = _recall(col, queries, exact)
+    print(f"\n{quantization:5} rerank={rerank}: recall@{K}={recall:.3f} bytes/vector={sizes['codes'] or sizes['float32']} ({ratio:.1f}x)")
+    assert recall >= min_recall
+    assert ratio >= min_ratio
+
+
+def test_quantized_codes_rebuilt_on_reopen(tmp_path, corpus):
+    data, queries, exact = corpus
+    NumpyCollection(tmp_path / "pq", quantization="pq", pq_min=N, ivf_min=10**9).add(
+        ids=[str(i) for i in range(N)], embeddings=data
+    )
+    reopened = NumpyCollection(tmp_path / "pq", quantization="pq", pq_min=N, ivf_min=10**9, rerank=8)
+    assert reopened.bytes_per_vector()["codes"] == DIM // 4
+    assert _recall(reopened, queries[:20], exact[:20]) >= 0.9
@@ -0,0 +1,57 @@
+"""run_rag result cache: hits, TTL/LRU eviction, invalidation on ingest and delete."""
+
+import time
+
+import src.instrumentation as instrumentation
+from src.pipeline import delete_document, run_ingest, run_rag
+from src.query_cache import QueryCache
+
+
+def test_repeated_query_is_served_from_cache(stores):
+    path = stores / "a.txt"
+    path.write_text("Rivers flow to the sea.\n\nMountains are tall.", encoding="utf-8")
+    run_ingest(path)
+    first = run_rag("rivers", top_k=2)
+    second = run_rag("  rivers ", top_k=2)
+    assert not first["cached"] and second["cached"]
+    assert second["chunks"] == first["chunks"]
+    second["chunks"].clear()
+    assert run_rag("rivers", top_k=2)["chunks"] == first["chunks"]
+    assert not run_rag("rivers", top_k=2, use_graph_rag=True)["cached"]
+    assert not run_rag("rivers", top_k=2, use_cache=False)["cached"]
+    assert instrumentation.snapshot()["gauges"]["query_cache_hit_rate"] > 0
+    assert "rag_query_cache_hit_rate" in instrumentation.to_prometheus()
+
+
+def test_ingest_and_delete_invalidate(stores):
+    path = stores / "a.txt"
+    path.write_text("Rivers flow to the sea.", encoding="utf-8")
+    doc = run_ingest(path)
+    assert not run_rag("rivers")["cached"]
+    assert run_rag("rivers")["cached"]
+
+    run_ingest(path)  # unchanged: skipped, cache stays valid
+    assert run_rag("rivers")["cached"]
+
+    other = stores / "b.txt"
+    other.write_text("More rivers in the valley.", encoding="utf-8")
+    run_ingest(other)
+    fresh = run_rag("rivers")
+    assert not fresh["cached"] and len(fresh["chunks"]) == 2
+
+    delete_document(doc["document_id"])
+    after = run_rag("rivers")
+    assert not after["cached"] and len(after["chunks"]) == 1
+
+
+def test_ttl_and_lru_eviction():
+    cache = QueryCache(max_entries=2, ttl=0.05)
+    cache.put(("a",), {"v": 1})
+    cache.put(("b",), {"v": 2})
+    assert cache.get(("a",)) == {"v": 1}
+    cache.put(("c",), {"v": 3})  # evicts b (least recently used)
+    assert cache.get(("b",)) is None and cache.get(("a",)) == {"v": 1}
+    time.sleep(0.06)
+    assert cache.get(("a",)) is None and cache.get(("c",)) is None
+    assert cache.stats()["entries"] == 0
+    assert not QueryCache(max_entries=0).enabled
@@ -0,0 +1,44 @@
+"""run_rag_many: one batched embed/query, same results as run_rag per query."""
+
+import pytest
+
+import src.graphs.rag_graph as rag_graph
+from src.pipeline import run_ingest, run_rag, run_rag_many
+
+QUERIES = ["rivers", "mountains and valleys", "  rivers ", "desert sand", "rivers"]
+
+
+@pytest.fixture
+def corpus(stores):
+    topics = {"a": "Rivers flow through Valleys", "b": "Mountains rise over Deserts", "c": "Sand covers the Desert"}
+    for name, topic in topics.items():
+        path = stores / f"{name}.txt"
+        path.write_text("\n\n".join(f"{topic} in paragraph {i} with Entity{i}. " * 20 for i in range(6)), encoding="utf-8")
+        run_ingest(path)
+    return stores
+
+
+@pytest.mark.parametrize("use_graph_rag,use_raptor", [(False, False), (True, False), (False, True), (True, True)])
+def test_matches_individual_run_rag(corpus, use_graph_rag, use_raptor):
+    expected = [run_rag(q, top_k=3, use_graph_rag=use_graph_rag, use_raptor=use_raptor, use_cache=False) for q in QUERIES]
+    batch = run_rag_many(QUERIES, top_k=3, use_graph_rag=use_graph_rag, use_raptor=use_raptor, use_cache=False)
+    assert len(batch) == len(QUERIES)
+    for got, want in zip(batch, expected):
+        for key in ("query", "top_k", "filter_metadata", "answer", "query_embedding"):
+            assert got[key] == want[key]
+        assert [(c["text"], c["metadata"]) for c in got["chunks"]] == [(c["text"], c["metadata"]) for c in want["chunks"]]
+        assert [c["score"] for c in got["chunks"]] == pytest.approx([c["score"] for c in want["chunks"]], abs=1e-6)
+
+
+def test_one_embed_call_and_cache(corpus, monkeypatch):
+    calls = []
+    real_embed = rag_graph.embed
+    monkeypatch.setattr(rag_graph, "embed", lambda texts: calls.append(len(texts)) or real_embed(texts))
+    first = run_rag_many(QUERIES, top_k=2)
+    assert calls == [3]  # duplicates (after normalization) are embedded and searched once
+    assert not any(r["cached"] for r in first)
+    second = run_rag_many(QUERIES, top_k=2)
+    assert calls == [3] and all(r["cached"] for r in second)
+    assert [r["query"] for r in second] == QUERIES
+    assert run_rag("rivers", top_k=2)["cached"]
+    assert run_rag_many([]) == []
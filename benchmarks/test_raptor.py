@@ -2,7 +2,10 @@
 
 import pytest
 
-from src.rag.raptor import build_raptor_tree, retrieve_multilevel
+import numpy as np
+
+from src.rag.raptor import build_raptor_tree, build_raptor_tree_embedded, retrieve_multilevel
+from src.storage.raptor_store import RaptorStore
 
 
 def test_build_raptor_tree():
@@ -20,3 +23,84 @@ def test_retrieve_multilevel():
     tree = build_raptor_tree(chunks)
     result = retrieve_multilevel("Python language", tree, top_k=2)
     assert len(result) >= 1
+
+
+def test_retrieve_multilevel_embeds_only_missing_nodes():
+    chunks = [{"text": "Python is a language.", "index": 0}, {"text": "Tea is a drink.", "index": 1}]
+    tree = build_raptor_tree(chunks)
+    calls = []
+
+    def fake_embed(texts):
+        calls.append(list(texts))
+        return [[0.5, 0.5] for _ in texts]
+
+    node_embs = [[1.0, 0.0], [0.0, 1.0]] + [None] * (len(tree) - 2)
+    result = retrieve_multilevel(
+        "Python", tree, top_k=1, embed_fn=fake_embed, node_embeddings=node_embs, query_embedding=[1.0, 0.0]
+    )
+    assert result[0]["text"] == "Python is a language."
+    assert all(len(c) == len(tree) - 2 for c in calls)
+
+
+def _two_topic_chunks(n=12):
+    chunks = [{"text": f"Topic {'AB'[i % 2]} sentence {i}.", "index": i} for i in range(n)]
+    embs = np.array([[1.0, 0.05 * i, 0.0] if i % 2 == 0 else [0.0, 0.05 * i, 1.0] for i in range(n)])
+    return chunks, embs
+
+
+def _fake_embed(texts):
+    # Summaries of topic-A chunks start with "Topic A"
+    return [[1.0, 0.0, 0.0] if t.startswith("Topic A") else [0.0, 0.0, 1.0] for t in texts]
+
+
+def test_raptor_tree_is_recursive_and_clustered():
+    chunks, embs = _two_topic_chunks()
+    nodes, node_embs = build_raptor_tree_embedded(chunks, embs, embed_fn=_fake_embed, branching=3)
+    assert node_embs.shape == (len(nodes), 3)
+    roots = [n for n in nodes if n["parent"] is None]
+    assert len(roots) == 1 and sorted(roots[0]["chunk_indices"]) == list(range(len(chunks)))
+    assert max(n["level"] for n in nodes) >= 2
+    # Level-1 clusters never mix the two topics
+    for n in nodes:
+        if n["level"] == 1:
+            assert len({ci % 2 for ci in n["chunk_indices"]}) == 1
+        for child in n["children"]:
+            assert nodes[child]["parent"] == n["index"]
+
+
+def test_retrieve_multilevel_beam_search_descends_to_leaves():
+    chunks, embs = _two_topic_chunks()
+    nodes, node_embs = build_raptor_tree_embedded(chunks, embs, embed_fn=_fake_embed, branching=3)
+    result = retrieve_multilevel(
+        "topic B", nodes, top_k=3, node_embeddings=node_embs, query_embedding=[0.0, 0.0, 1.0], mode="beam"
+    )
+    assert len(result) == 3
+    assert all(r["level"] == 0 and r["index"] % 2 == 1 for r in result)
+
+
+def test_raptor_store_roundtrip(sqlite_path):
+    chunks, embs = _two_topic_chunks(6)
+    nodes, node_embs = build_raptor_tree_embedded(chunks, embs, embed_fn=_fake_embed)
+    store = RaptorStore(sqlite_path)
+    store.save_tree("doc", nodes, node_embs)
+    loaded, loaded_embs = store.load_tree("doc")
+    assert [(n["level"], n["parent"], n["children"]) for n in loaded] == [
+        (n["level"], n["parent"], n["children"]) for n in nodes
+    ]
+    # Leaves are filled from the vector store at query time; summaries keep text and vectors
+    assert loaded_embs[0] is None and loaded[0]["text"] == ""
+    assert np.allclose(loaded_embs[-1], node_embs[-1]) and loaded[-1]["text"] == nodes[-1]["text"]
+    store.delete_document("doc")
+    assert store.load_tree("doc") == ([], [])
+
+
+def test_reingest_to_zero_chunks_drops_tree(stores):
+    from src.pipeline import run_ingest
+
+    path = stores / "doc.txt"
+    path.write_text("\n\n".join(f"Topic {i} paragraph about rivers and valleys. " * 20 for i in range(6)), encoding="utf-8")
+    document_id = run_ingest(path)["document_id"]
+    assert RaptorStore().load_tree(document_id)[0]
+    path.write_text("   \n", encoding="utf-8")
+    assert run_ingest(path)["chunks"] == []
+    assert RaptorStore().load_tree(document_id) == ([], [])
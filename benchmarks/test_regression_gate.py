@@ -0,0 +1,85 @@
+"""Regression gate: significance tests, report comparison and environment fingerprint."""
+
+import copy
+
+import numpy as np
+import pytest
+
+from src.bench.harness import environment
+from src.bench.regression import compare_reports, format_comparison, mann_whitney_greater
+
+
+def _report(latency=0.01, throughput=100.0, rss=1e8, repeats=3, seed=0, env=None):
+    rng = np.random.default_rng(seed)
+    runs = []
+    for i in range(repeats):
+        samples = list(latency * (1 + 0.05 * rng.standard_normal(50)))
+        runs.append({
+            "language": "en",
+            "target_chunks": 1000,
+            "repeat": i,
+            "ingest": {"chunks_per_second": throughput * (1 + 0.01 * i), "stages": {"prepare": 0.5, "store": 1.0}},
+            "query": {"plain": {"p50": float(np.median(samples)), "p95": float(np.percentile(samples, 95)), "samples": samples}},
+            "peak_rss": {"self": rss + i, "children": 0},
+            "disk_bytes": {"total": 5_000_000},
+        })
+    return {"version": 1, "environment": env or {"fingerprint": "a", "cpu": "x", "libraries": {"numpy": "2.0"}}, "runs": runs}
+
+
+def _status(result, metric):
+    return next(c["status"] for c in result["checks"] if c["metric"] == metric)
+
+
+def test_mann_whitney_exact():
+    assert mann_whitney_greater([4, 5, 6], [1, 2, 3]) == pytest.approx(1 / 20)
+    assert mann_whitney_greater([1, 2, 3], [4, 5, 6]) == 1.0
+    assert mann_whitney_greater([7], [1]) == 0.5  # one run each can never be significant
+    assert mann_whitney_greater(list(range(30, 60)), list(range(30))) < 1e-6  # normal approximation
+
+
+def test_identical_reports_pass():
+    result = compare_reports(_report(), _report())
+    assert result["ok"] and result["environment"]["match"]
+    assert {c["status"] for c in result["checks"]} == {"ok"}
+    assert "No regressions" in format_comparison(result)
+
+
+def test_latency_throughput_and_memory_regressions():
+    result = compare_reports(_report(), _report(latency=0.015, throughput=70.0, rss=1.5e8, seed=1))
+    assert not result["ok"]
+    for metric in ("query.plain.p50", "query.plain.p95", "ingest.chunks_per_second", "peak_rss"):
+        assert _status(result, metric) == "regression", metric
+    assert _status(result, "disk_bytes") == "ok"
+    assert "REGRESSION" in format_comparison(result)
+
+    # Within tolerance, or better: not a regression
+    assert compare_reports(_report(), _report(latency=0.0105, seed=1))["ok"]
+    faster = compare_reports(_report(), _report(latency=0.005, seed=1))
+    assert faster["ok"] and _status(faster, "query.plain.p50") == "improvement"
+    assert compare_reports(_report(), _report(latency=0.015, seed=1), tolerances={"latency": 0.6})["ok"]
+
+
+def test_single_runs_are_unconfirmed():
+    result = compare_reports(_report(repeats=1), _report(throughput=50.0, repeats=1))
+    assert result["ok"]
+    assert _status(result, "ingest.chunks_per_second") == "unconfirmed"
+
+
+def test_environment_mismatch_is_reported():
+    current = _report(env={"fingerprint": "b", "cpu": "y", "libraries": {"numpy": "2.1"}})
+    baseline = _report()
+    baseline["runs"].append({**copy.deepcopy(baseline["runs"][0]), "language": "ar"})
+    result = compare_reports(baseline, current)
+    assert result["ok"] and not result["environment"]["match"]
+    assert result["environment"]["differences"] == {"cpu": ["x", "y"], "libraries.numpy": ["2.0", "2.1"]}
+    assert result["missing"] == [["ar", 1000]]
+    assert "environment differs" in format_comparison(result)
+
+
+def test_environment_fingerprint(monkeypatch):
+    env = environment()
+    assert env["libraries"]["numpy"] == np.__version__ and env["python"] and env["cpu_count"]
+    assert environment()["fingerprint"] == env["fingerprint"]
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    changed = environment()
+    assert changed["settings"]["VECTOR_BACKEND"] == "numpy" and changed["fingerprint"] != env["fingerprint"]
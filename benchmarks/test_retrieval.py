@@ -1,8 +1,6 @@
 """Retrieval accuracy: recall@k, MRR."""
 
-import os
 import pytest
-from pathlib import Path
 
 from src.parser.extractors import extract
 from src.parser.analyzer import analyze_content
@@ -10,14 +8,12 @@ from src.parser.chunkers import chunk_fixed, chunk_dynamic
 from src.embeddings import embed
 from src.storage.vector_store import VectorStore
 from src.pipeline import run_ingest, run_rag
+from src.bench.evaluation import judge, reciprocal_rank
 
 
 @pytest.fixture
-def ingested_doc(sample_txt_path, tmp_path):
+def ingested_doc(sample_txt_path, stores):
     """Ingest sample TXT and return document_id. Use temp dirs for Chroma/SQL."""
-    os.environ["CHROMA_PATH"] = str(tmp_path / "chroma")
-    os.environ["SQLITE_PATH"] = str(tmp_path / "db.sqlite")
-    Path(tmp_path / "chroma").mkdir(parents=True, exist_ok=True)
     result = run_ingest(sample_txt_path)
     return result.get("document_id"), result.get("chunks", [])
 
@@ -35,13 +31,13 @@ def test_retrieval_recall_at_k(ingested_doc):
     assert any("sample" in t.lower() for t in texts)
 
 
-def test_retrieval_mrr(ingested_doc):
-    """MRR: first relevant result rank."""
-    result = run_rag("multiple paragraphs", top_k=5)
-    retrieved = result.get("chunks", [])
-    for i, r in enumerate(retrieved):
-        if "paragraph" in (r.get("text") or "").lower():
-            mrr = 1.0 / (i + 1)
-            assert mrr > 0
-            return
-    pytest.skip("No relevant chunk in top 5 for this query")
+def test_retrieval_mrr(ingested_doc, gold_query_chunk_pairs):
+    """MRR over the gold queries: the chunk containing the expected text ranks first."""
+    doc_id, chunks = ingested_doc
+    rrs = []
+    for query, expected in gold_query_chunk_pairs:
+        index = next(i for i, c in enumerate(chunks) if expected in (c.get("text") or ""))
+        relevant = [{"document_id": doc_id, "chunks": (index, index), "chars": None, "grade": 1.0}]
+        result = run_rag(query, top_k=5, use_cache=False)
+        rrs.append(reciprocal_rank(judge(result.get("chunks", []), relevant)))
+    assert sum(rrs) / len(rrs) == 1.0
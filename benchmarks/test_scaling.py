@@ -0,0 +1,57 @@
+"""Synthetic corpus generator and scaling harness (small scale, stub embedder, in-process)."""
+
+import json
+
+import pytest
+
+from src.bench.corpus import LANGUAGES, generate_documents, generate_queries
+from src.bench.harness import latency_summary, run_benchmarks, run_scale
+from src.embeddings import embed, model_key
+
+
+def test_corpus_is_deterministic():
+    for language in LANGUAGES:
+        first = list(generate_documents(120, language, seed=3, chunks_per_doc=50))
+        assert first == list(generate_documents(120, language, seed=3, chunks_per_doc=50))
+        assert [name for name, _ in first] == [f"{language}_3_{d:05d}.txt" for d in range(3)]
+        assert generate_queries(5, language, seed=3) == generate_queries(5, language, seed=3)
+    assert list(generate_documents(50, "en", seed=1)) != list(generate_documents(50, "en", seed=2))
+    assert "َ" in next(generate_documents(10, "ar"))[1]
+    assert "َ" not in next(generate_documents(10, "ar_plain"))[1]
+    with pytest.raises(ValueError):
+        next(generate_documents(10, "fr"))
+
+
+def test_stub_embedder(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "stub")
+    assert model_key().startswith("stub")
+    a, b = embed(["river valley", "river valley"], as_numpy=True)
+    assert a.shape == (384,) and (a == b).all()
+
+
+def test_latency_summary():
+    summary = latency_summary([0.01 * i for i in range(1, 101)])
+    assert summary["n"] == 100
+    assert summary["p50"] == pytest.approx(0.505)
+    assert summary["p50"] <= summary["p95"] <= summary["p99"] <= 1.0
+    assert latency_summary([])["n"] == 0
+
+
+def test_run_scale_report(tmp_path):
+    modes = ("plain", "graph", "raptor", "lexical")
+    report = run_scale(150, "mixed", workdir=tmp_path, n_queries=5, modes=modes, workers=1, stub_embedder=True)
+    assert report["chunks"] >= 140 and report["ingest"]["failed"] == 0
+    assert report["ingest"]["chunks_per_second"] > 0
+    assert set(report["query"]) == set(modes)
+    for summary in report["query"].values():
+        assert summary["n"] == 5 and 0 < summary["p50"] <= summary["p99"]
+    assert report["disk_bytes"]["total"] >= report["disk_bytes"]["sqlite"] > 0
+    assert report["embedder"].startswith("stub")
+
+
+def test_run_benchmarks_report_is_json(tmp_path):
+    report = run_benchmarks(
+        (60,), ("en",), isolate=False, workdir=tmp_path, n_queries=2, modes=("plain",), workers=1, stub_embedder=True
+    )
+    assert json.loads(json.dumps(report))["runs"][0]["language"] == "en"
+    assert report["config"]["scales"] == [60] and report["environment"]["cpu_count"]
@@ -0,0 +1,40 @@
+"""Vectorized similarity kernel shared by Graph RAG and RAPTOR."""
+
+import numpy as np
+
+from src.rag.similarity import as_matrix, cosine_scores, normalize_rows, top_k_indices
+
+
+def test_cosine_scores_match_reference():
+    rng = np.random.default_rng(0)
+    corpus = rng.normal(size=(50, 16))
+    query = rng.normal(size=16)
+    scores = cosine_scores(query, corpus)
+    ref = corpus @ query / (np.linalg.norm(corpus, axis=1) * np.linalg.norm(query))
+    assert scores.dtype == np.float32
+    assert np.allclose(scores, ref, atol=1e-5)
+
+
+def test_zero_vectors_score_zero():
+    scores = cosine_scores([1.0, 0.0], [[0.0, 0.0], [2.0, 0.0]])
+    assert scores.tolist() == [0.0, 1.0]
+
+
+def test_top_k_indices_single_and_batch():
+    rng = np.random.default_rng(1)
+    corpus = normalize_rows(rng.normal(size=(200, 8)))
+    queries = rng.normal(size=(3, 8))
+    batch = cosine_scores(queries, corpus, corpus_normalized=True)
+    assert batch.shape == (3, 200)
+    top = top_k_indices(batch, 5)
+    assert top.shape == (3, 5)
+    for row, idx in zip(batch, top):
+        assert idx.tolist() == np.argsort(-row)[:5].tolist()
+        assert top_k_indices(row, 5).tolist() == idx.tolist()
+    assert len(top_k_indices(batch[0], 1000)) == 200
+
+
+def test_as_matrix_is_contiguous_float32():
+    m = as_matrix([[1, 2], [3, 4]])
+    assert m.dtype == np.float32 and m.flags.c_contiguous
+    assert as_matrix(m) is m
@@ -0,0 +1,94 @@
+"""Pooled SQLite connections: reuse per thread, WAL pragmas, schema once, concurrent writers."""
+
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from src.storage import sqlite_pool
+from src.storage.sql_store import SQLStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "pool.db")
+    sqlite_pool.close_all()
+
+
+def test_connection_reused_per_thread(db_path):
+    conn = sqlite_pool.connection(db_path)
+    assert sqlite_pool.connection(db_path) is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    other: list = []
+    t = threading.Thread(target=lambda: other.append(sqlite_pool.connection(db_path)))
+    t.start()
+    t.join()
+    assert other[0] is not conn
+
+
+def test_connections_close_when_their_thread_exits(db_path):
+    SQLStore(db_path)
+    before = len(sqlite_pool._open)
+    kept: list = []
+
+    def query(keep: bool) -> None:
+        conn = sqlite_pool.connection(db_path)
+        SQLStore(db_path).corpus_version()
+        if keep:
+            kept.append(conn)
+
+    for i in range(50):
+        t = threading.Thread(target=query, args=(i == 0,))
+        t.start()
+        t.join()
+    gc.collect()
+    # Only the connection still referenced here outlives its thread, and it is closed
+    assert len(sqlite_pool._open) <= before + 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        kept[0].execute("SELECT 1")
+
+
+def test_schema_initialized_once(db_path, monkeypatch):
+    calls = []
+    original = SQLStore._init_schema
+
+    def counting(self):
+        calls.append(1)
+        original(self)
+
+    monkeypatch.setattr(SQLStore, "_init_schema", counting)
+    for _ in range(5):
+        SQLStore(db_path)
+    assert len(calls) == 1
+
+    sqlite_pool.close_all()
+    SQLStore(db_path)
+    assert len(calls) == 2
+
+
+def test_concurrent_chunk_writes(db_path):
+    store = SQLStore(db_path)
+    errors: list[Exception] = []
+
+    def write(t: int) -> None:
+        try:
+            for d in range(10):
+                doc = f"doc{t}_{d}"
+                store.insert_document(doc, path=f"{doc}.txt")
+                store.insert_chunks(doc, [{"index": i, "start": i, "end": i + 1, "content_hash": str(i)} for i in range(50)])
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    chunks = store.get_chunks_by_document_id("doc3_9")
+    assert [c["chunk_index"] for c in chunks] == list(range(50))
+    assert chunks[7]["content_hash"] == "7"
+    assert store.get_document_metadata("doc0_0")["path"] == "doc0_0.txt"
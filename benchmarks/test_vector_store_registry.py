@@ -0,0 +1,38 @@
+"""Process-wide VectorStore registry: one client per (persist directory, collection)."""
+
+import threading
+
+from src.storage.vector_store import close_vector_stores, get_vector_store
+
+
+def test_registry_reuses_store_per_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("CHROMA_PATH", str(tmp_path / "a"))
+    a = get_vector_store()
+    assert get_vector_store() is a
+    assert get_vector_store(str(tmp_path / "a")) is a
+    assert get_vector_store(collection_name="other") is not a
+
+    # Switching CHROMA_PATH switches stores
+    monkeypatch.setenv("CHROMA_PATH", str(tmp_path / "b"))
+    b = get_vector_store()
+    assert b is not a and b.persist_directory == str(tmp_path / "b")
+    close_vector_stores()
+    assert get_vector_store() is not b
+
+
+def test_registry_is_thread_safe(tmp_path):
+    path = str(tmp_path / "shared")
+    seen = []
+    barrier = threading.Barrier(8)
+
+    def grab():
+        barrier.wait()
+        seen.append(get_vector_store(path))
+
+    threads = [threading.Thread(target=grab) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(s) for s in seen}) == 1
+    close_vector_stores()
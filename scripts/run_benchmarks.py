@@ -1,28 +1,229 @@
-"""Run all benchmarks and print summary metrics."""
+"""
+Run all benchmarks and print summary metrics; results are saved as JSON with an environment
+fingerprint (default: data/benchmarks/pytest.json).
+--scaling runs the synthetic-corpus scaling harness (src.bench.harness) instead and writes its
+JSON report; --baseline compares it with an earlier report and exits 1 on a significant
+regression (src.bench.regression), e.g.:
+    python scripts/run_benchmarks.py --scaling --scales 1000,10000 --languages en,ar --stub-embedder
+    python scripts/run_benchmarks.py --scaling --scales 1000 --repeat 3 --stub-embedder --baseline data/benchmarks/baseline.json
+    python scripts/run_benchmarks.py --compare data/benchmarks/scaling.json --baseline data/benchmarks/baseline.json
+--evaluate scores retrieval quality per mode on a labeled set (src.bench.evaluation), ingesting
+its "documents" first, e.g.:
+    python scripts/run_benchmarks.py --evaluate data/labels.jsonl --eval-modes vector,graph,raptor,graph+raptor --ks 1,5,10
+"""
 
+import argparse
+import json
 import os
 import subprocess
 import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+REPORTS = ROOT / "data" / "benchmarks"
+
+
+def _csv(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _write_json(path: str | Path, data: dict) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def _junit_tests(path: Path) -> dict[str, dict]:
+    tests = {}
+    for case in ET.parse(path).getroot().iter("testcase"):
+        outcome = "passed"
+        for tag in ("failure", "error", "skipped"):
+            if case.find(tag) is not None:
+                outcome = "failed" if tag == "failure" else tag
+        tests[f"{case.get('classname')}::{case.get('name')}"] = {"outcome": outcome, "seconds": float(case.get("time", 0))}
+    return tests
+
+
+def run_pytest(output: str | None) -> int:
+    from src.bench.harness import environment
 
-def main():
-    root = Path(__file__).resolve().parent.parent
-    os.chdir(root)
     env = os.environ.copy()
-    env["CHROMA_PATH"] = env.get("CHROMA_PATH", str(root / "data" / "chroma_bench"))
-    env["SQLITE_PATH"] = env.get("SQLITE_PATH", str(root / "data" / "bench.db"))
-    (root / "data").mkdir(exist_ok=True)
-    (root / "data" / "chroma_bench").mkdir(exist_ok=True)
-
-    result = subprocess.run(
-        [sys.executable, "-m", "pytest", "benchmarks", "-v", "--tb=short", "-q"],
-        env=env,
-        cwd=root,
-    )
+    env["CHROMA_PATH"] = env.get("CHROMA_PATH", str(ROOT / "data" / "chroma_bench"))
+    env["SQLITE_PATH"] = env.get("SQLITE_PATH", str(ROOT / "data" / "bench.db"))
+    (ROOT / "data").mkdir(exist_ok=True)
+    (ROOT / "data" / "chroma_bench").mkdir(exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        junit = Path(tmp) / "junit.xml"
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest", "benchmarks", "-v", "--tb=short", "-q", f"--junitxml={junit}"],
+            env=env,
+            cwd=ROOT,
+        )
+        tests = _junit_tests(junit) if junit.exists() else {}
+    out = Path(output or REPORTS / "pytest.json")
+    _write_json(out, {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "exit_code": result.returncode,
+        "tests": tests,
+    })
     print("\nBenchmark run finished. Exit code:", result.returncode)
+    print("Results written to", out)
     return result.returncode
 
 
+def compare(baseline_path: str, report: dict, args: argparse.Namespace) -> int:
+    from src.bench.regression import compare_reports, format_comparison
+
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    tolerances = {"latency": args.latency_tolerance, "throughput": args.throughput_tolerance, "memory": args.memory_tolerance}
+    result = compare_reports(baseline, report, tolerances=tolerances, alpha=args.alpha)
+    print(format_comparison(result, verbose=args.verbose))
+    if args.comparison_output:
+        _write_json(args.comparison_output, result)
+    return 0 if result["ok"] else 1
+
+
+def run_scaling(args: argparse.Namespace) -> int:
+    from src.bench.harness import run_benchmarks
+
+    if args.stub_embedder:
+        # Inherited by the per-scale processes
+        os.environ["EMBEDDING_BACKEND"] = "stub"
+    report = run_benchmarks(
+        scales=tuple(int(s) for s in _csv(args.scales)),
+        languages=tuple(_csv(args.languages)),
+        isolate=not args.in_process,
+        repeat=args.repeat,
+        n_queries=args.queries,
+        modes=tuple(_csv(args.modes)),
+        top_k=args.top_k,
+        seed=args.seed,
+        workers=args.workers,
+        stub_embedder=args.stub_embedder,
+    )
+    if args.output == "-":
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        out = Path(args.output or REPORTS / "scaling.json")
+        _write_json(out, report)
+        for run in report["runs"]:
+            latency = ", ".join(f"{m} p95={q['p95'] * 1000:.1f}ms" for m, q in run["query"].items())
+            print(
+                f"{run['language']:>8} {run['chunks']:>7} chunks: ingest {run['ingest']['chunks_per_second']:.0f} chunks/s, "
+                f"{latency}, peak RSS {run['peak_rss']['self'] or 0:,} B, disk {run['disk_bytes']['total']:,} B"
+            )
+        print("Report written to", out)
+    return compare(args.baseline, report, args) if args.baseline else 0
+
+
+def run_evaluation(args: argparse.Namespace) -> int:
+    from src.batch_ingest import run_ingest_many
+    from src.bench.evaluation import evaluate, format_evaluation, load_labeled_set
+    from src.bench.harness import environment
+
+    if args.stub_embedder:
+        os.environ["EMBEDDING_BACKEND"] = "stub"
+    labeled = load_labeled_set(args.evaluate)
+    if labeled["documents"]:
+        ingest = run_ingest_many(labeled["documents"], workers=args.workers)
+        if ingest["failed"]:
+            print(f"WARNING: {ingest['failed']} labeled document(s) failed to ingest")
+    report = evaluate(
+        labeled,
+        modes=tuple(_csv(args.eval_modes)),
+        ks=tuple(int(k) for k in _csv(args.ks)),
+        time_queries=not args.no_latency,
+    )
+    print(format_evaluation(report))
+    out = Path(args.output or REPORTS / "evaluation.json")
+    _write_json(out, {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "labeled_set": str(args.evaluate),
+        **report,
+    })
+    print("Report written to", out)
+    return 0
+
+
+# Options each mode reads (the pytest mode reads only --output)
+_SCALING_ONLY = ("repeat", "scales", "languages", "modes", "queries", "top_k", "seed", "in_process")
+_EVALUATE_ONLY = ("eval_modes", "ks", "no_latency")
+_GATE_ONLY = (
+    "latency_tolerance", "throughput_tolerance", "memory_tolerance", "alpha", "verbose", "comparison_output",
+)
+
+
+def _check_flags(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """parser.error on flag combinations that would be ignored (a gate must not pass without comparing)."""
+
+    def given(names: tuple[str, ...]) -> list[str]:
+        return ["--" + n.replace("_", "-") for n in names if getattr(args, n) != parser.get_default(n)]
+
+    modes = (("--scaling", args.scaling), ("--evaluate", args.evaluate), ("--compare", args.compare))
+    runs = [flag for flag, on in modes if on]
+    if len(runs) > 1:
+        parser.error(f"{' and '.join(runs)} cannot be combined")
+    if args.compare and not args.baseline:
+        parser.error("--compare needs --baseline")
+    if args.baseline and not (args.scaling or args.compare):
+        parser.error("--baseline needs --scaling or --compare")
+    unused = [
+        *(given(_SCALING_ONLY) if not args.scaling else []),
+        *(given(_EVALUATE_ONLY) if not args.evaluate else []),
+        *(given(_GATE_ONLY) if not args.baseline else []),
+        *(given(("stub_embedder", "workers")) if not (args.scaling or args.evaluate) else []),
+        *(given(("output",)) if args.compare else []),
+    ]
+    if unused:
+        parser.error(f"no effect in this mode: {', '.join(unused)}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    os.chdir(ROOT)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scaling", action="store_true", help="run the scaling harness instead of the pytest benchmarks")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per (scale, language); >= 3 to test throughput/memory")
+    parser.add_argument("--scales", default="1000,10000,100000", help="target chunk counts (comma-separated)")
+    parser.add_argument("--languages", default="en,ar,ar_plain,mixed", help="corpus languages: en, ar, ar_plain, mixed")
+    parser.add_argument("--modes", default="plain,graph,raptor", help="query modes: plain, graph, raptor, hybrid, lexical")
+    parser.add_argument("--queries", type=int, default=100, help="timed queries per mode")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="ingest worker processes (default: CPU count)")
+    parser.add_argument("--stub-embedder", action="store_true", help="hashing stub instead of the model (offline)")
+    parser.add_argument("--in-process", action="store_true", help="run all points in this process (peak RSS accumulates)")
+    parser.add_argument("--output", default=None, help='JSON report path ("-": stdout; default: data/benchmarks/)')
+    quality = parser.add_argument_group("retrieval quality")
+    quality.add_argument("--evaluate", default=None, metavar="LABELS", help="labeled set (JSON/JSONL) to evaluate")
+    quality.add_argument(
+        "--eval-modes", default="vector,graph,raptor,graph+raptor,hybrid", help='"+"-joined modes, e.g. hybrid+raptor'
+    )
+    quality.add_argument("--ks", default="1,5,10", help="cutoffs for recall@k and nDCG@k")
+    quality.add_argument("--no-latency", action="store_true", help="skip timing each query alone")
+    gate = parser.add_argument_group("regression gate")
+    gate.add_argument("--baseline", default=None, help="scaling report to compare against; exit 1 on regression")
+    gate.add_argument("--compare", default=None, metavar="REPORT", help="compare an existing report with --baseline (no run)")
+    gate.add_argument("--latency-tolerance", type=float, default=0.10, help="relative slack for latencies and stage times")
+    gate.add_argument("--throughput-tolerance", type=float, default=0.10, help="relative slack for ingest chunks/s")
+    gate.add_argument("--memory-tolerance", type=float, default=0.10, help="relative slack for peak RSS and disk size")
+    gate.add_argument("--alpha", type=float, default=0.05, help="significance level")
+    gate.add_argument("--verbose", action="store_true", help="print every check, not only regressions")
+    gate.add_argument("--comparison-output", default=None, help="also write the comparison as JSON")
+    args = parser.parse_args(argv)
+    _check_flags(parser, args)
+    if args.compare:
+        return compare(args.baseline, json.loads(Path(args.compare).read_text(encoding="utf-8")), args)
+    if args.evaluate:
+        return run_evaluation(args)
+    return run_scaling(args) if args.scaling else run_pytest(args.output)
+
+
 if __name__ == "__main__":
     sys.exit(main())
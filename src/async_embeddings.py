@@ -0,0 +1,76 @@
+"""
+asyncio support for the async API (arun_ingest, arun_rag, adelete_document).
+offload(fn, ...) runs blocking work on one process-wide thread pool (ASYNC_WORKERS threads),
+so many concurrent requests never create more threads than that. aembed(texts) looks up and
+fills the embedding cache (SQLite) on that pool and awaits the misses from the shared
+EmbeddingService through asyncio.wrap_future, so concurrent coroutines and threads share its
+micro-batches without holding a pool thread while they wait.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+
+from src.embeddings import embed, get_embedding_service, merge_encoded, service_enabled, split_cached
+
+
+def _default_workers() -> int:
+    return int(os.environ.get("ASYNC_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """The shared worker pool, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, _default_workers()), thread_name_prefix="rag-async")
+        return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Stop the shared pool (a new one is created on next use)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def offload(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run fn(*args, **kwargs) on the shared pool; context variables (instrumentation) carry over."""
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), call)
+
+
+def offloaded(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Coroutine version of a blocking graph node, run on the shared pool (for ainvoke graphs)."""
+
+    @functools.wraps(fn)
+    async def node(state: Any) -> Any:
+        return await offload(fn, state)
+
+    return node
+
+
+async def aembed(texts: list[str], as_numpy: bool = False) -> list[list[float]] | np.ndarray:
+    """Async embed(): same result; cache misses join the EmbeddingService batch shared with concurrent callers."""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32) if as_numpy else []
+    if not service_enabled():
+        return await offload(embed, list(texts), as_numpy=as_numpy)
+    keys, found, missing = await offload(split_cached, list(texts))
+    if not missing:
+        return merge_encoded(keys, found, missing, None, as_numpy)
+    encoded = await asyncio.wrap_future(get_embedding_service().submit(list(missing.values())))
+    return await offload(merge_encoded, keys, found, missing, encoded, as_numpy)
@@ -0,0 +1,146 @@
+"""
+Batch directory ingest: run_ingest_many(paths | directory, workers=N, batch_size=B).
+Extract/analyze/chunk run in a process pool; chunks feed one batched embedding stage in the
+parent while workers keep extracting; vectors are written to Chroma in bulk per flush.
+Unchanged files are skipped before submission; changed files only embed their new chunks.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Iterable
+
+from src.embeddings import embed
+from src.graphs.ingest_graph import existing_embeddings, fingerprint_document, store_document
+from src.parser.prepare import try_prepare_document
+from src.rag.similarity import as_matrix
+from src.storage.sql_store import SQLStore
+from src.storage.vector_store import get_vector_store
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+
+def collect_paths(paths: str | Path | Iterable[str | Path]) -> list[Path]:
+    """Expand a directory (recursively, supported extensions only) or a list of files/directories."""
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    out: list[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            out.extend(sorted(f for f in p.rglob("*") if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS))
+        else:
+            out.append(p)
+    return list(dict.fromkeys(out))
+
+
+def run_ingest_many(
+    paths: str | Path | Iterable[str | Path],
+    workers: int | None = None,
+    batch_size: int = 64,
+    force: bool = False,
+) -> dict[str, Any]:
+    """
+    Ingest many documents. workers=1 prepares files in-process; otherwise a process pool
+    (default: CPU count) extracts and chunks in parallel. Chunks are embedded in batches of
+    `batch_size` texts and stored as soon as a batch fills.
+    Files whose size/mtime or content hash match the stored document are skipped (force=True
+    re-processes them).
+    Returns {"results": [per-file {file_path, status, document_id, chunks, error}], "succeeded",
+    "skipped", "failed", "elapsed", "stages": {fingerprint, prepare, embed, store} busy seconds}.
+    """
+    files = collect_paths(paths)
+    results: dict[str, dict[str, Any]] = {str(f): {"file_path": str(f), "status": "pending"} for f in files}
+    stages = {"fingerprint": 0.0, "prepare": 0.0, "embed": 0.0, "store": 0.0}
+    start = time.perf_counter()
+
+    fingerprints: dict[str, dict[str, Any]] = {}
+    for f in files:
+        try:
+            fp = fingerprint_document(str(f), force=force)
+        except OSError as e:
+            results[str(f)].update(status="error", error=f"{type(e).__name__}: {e}")
+            continue
+        if fp["skipped"]:
+            results[str(f)].update(status="skipped", document_id=fp["document_id"])
+        else:
+            fingerprints[str(f)] = fp
+    stages["fingerprint"] = time.perf_counter() - start
+    files = [f for f in files if str(f) in fingerprints]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files) or 1))
+    ready: list[dict[str, Any]] = []
+
+    def flush() -> None:
+        if not ready:
+            return
+        batch = list(ready)
+        ready.clear()
+        t0 = time.perf_counter()
+        # Chunks already stored under the same content id keep their vectors
+        for s in batch:
+            s["embeddings"] = existing_embeddings(s)
+        missing = [(s, i) for s in batch for i, e in enumerate(s["embeddings"]) if e is None]
+        texts = [s["chunks"][i].get("text", "") for s, i in missing]
+        embs = [embed(texts[i : i + batch_size], as_numpy=True) for i in range(0, len(texts), batch_size)]
+        for (s, i), row in zip(missing, (row for m in embs for row in m)):
+            s["embeddings"][i] = row
+        for s in batch:
+            s["embeddings"] = as_matrix(s["embeddings"])
+        t1 = time.perf_counter()
+        stages["embed"] += t1 - t0
+        try:
+            get_vector_store().sync_documents(
+                [(s["chunks"], s["embeddings"], s["document_id"], {"strategy": s.get("strategy", "")}) for s in batch]
+            )
+        except Exception as e:
+            for s in batch:
+                results[s["file_path"]].update(status="error", error=f"{type(e).__name__}: {e}")
+            stages["store"] += time.perf_counter() - t1
+            return
+        for s in batch:
+            try:
+                store_document(s, include_vectors=False)
+                results[s["file_path"]].update(status="ok")
+            except Exception as e:
+                results[s["file_path"]].update(status="error", error=f"{type(e).__name__}: {e}")
+        stages["store"] += time.perf_counter() - t1
+
+    def collect(prepared: dict[str, Any]) -> None:
+        stages["prepare"] += prepared["seconds"]
+        entry = results[prepared["file_path"]]
+        if "error" in prepared:
+            entry.update(status="error", error=prepared["error"])
+            return
+        state = {**prepared["state"], **fingerprints[prepared["file_path"]]}
+        entry.update(document_id=state["document_id"], chunks=len(state["chunks"]), strategy=state["strategy"])
+        ready.append(state)
+        if sum(len(s["chunks"]) for s in ready) >= batch_size:
+            flush()
+
+    try:
+        if workers == 1:
+            for f in files:
+                collect(try_prepare_document(f))
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                futures = [pool.submit(try_prepare_document, str(f)) for f in files]
+                for fut in as_completed(futures):
+                    collect(fut.result())
+        flush()
+    finally:
+        if files:
+            # Invalidate cached run_rag results
+            SQLStore().bump_corpus_version()
+
+    report = list(results.values())
+    return {
+        "results": report,
+        "succeeded": sum(1 for r in report if r["status"] == "ok"),
+        "skipped": sum(1 for r in report if r["status"] == "skipped"),
+        "failed": sum(1 for r in report if r["status"] == "error"),
+        "elapsed": time.perf_counter() - start,
+        "stages": stages,
+        "workers": workers,
+    }
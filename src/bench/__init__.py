@@ -0,0 +1 @@
+# Benchmarks: synthetic corpus (corpus) and scaling harness (harness)
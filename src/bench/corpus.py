@@ -0,0 +1,139 @@
+"""
+Deterministic synthetic corpus for scaling benchmarks. Languages: "en", "ar" (with harakat),
+"ar_plain" (Arabic without harakat) and "mixed" (English and Arabic sentences).
+Words follow a Zipf-like distribution over a fixed vocabulary plus generated rare terms, and
+capitalized names give Graph RAG entities. The same (n_chunks, language, seed) always yields
+the same files and queries.
+"""
+
+import random
+from pathlib import Path
+from typing import Iterator
+
+from src.parser.normalize import normalize_arabic
+
+LANGUAGES = ("en", "ar", "ar_plain", "mixed")
+
+# New characters per fixed-strategy chunk: 512 "tokens" * 4 chars minus the 50 * 4 overlap
+CHUNK_CHARS = 512 * 4 - 50 * 4
+
+_EN_WORDS = (
+    "the of and to in is that for it as with was on be by this are from at or an have not which "
+    "river mountain valley desert city market water trade road winter summer harvest library book "
+    "history science language report system network energy climate study result method data model "
+    "growth policy region season journey village bridge engine signal memory question answer"
+).split()
+_EN_NAMES = "Amira Baghdad Cairo Damascus Nile Euphrates Khalid Layla Omar Sahara Tigris Yasmin".split()
+_AR_WORDS = (
+    "فِي مِنْ عَلَى إِلَى هَذَا الَّذِي كَانَ أَنْ مَعَ عَنْ نَهْرٌ جَبَلٌ وَادٍ صَحْرَاءُ مَدِينَةٌ سُوقٌ "
+    "مَاءٌ تِجَارَةٌ طَرِيقٌ شِتَاءٌ صَيْفٌ حَصَادٌ مَكْتَبَةٌ كِتَابٌ تَارِيخٌ عِلْمٌ لُغَةٌ تَقْرِيرٌ نِظَامٌ "
+    "شَبَكَةٌ طَاقَةٌ مُنَاخٌ دِرَاسَةٌ نَتِيجَةٌ طَرِيقَةٌ بَيَانَاتٌ نُمُوٌّ سِيَاسَةٌ مِنْطَقَةٌ رِحْلَةٌ قَرْيَةٌ "
+    "جِسْرٌ ذَاكِرَةٌ سُؤَالٌ جَوَابٌ الْمَدْرَسَةُ الْقَاهِرَةُ"
+).split()
+_AR_NAMES = "أَمِيرَة بَغْدَاد دِمَشْق النِّيل الْفُرَات خَالِد لَيْلَى عُمَر دِجْلَة يَاسَمِين".split()
+_EN_LETTERS = "bcdfghklmnprstvz"
+_EN_VOWELS = "aeiou"
+_AR_LETTERS = "بتثجحخدذرزسشصضطظعغفقكلمنهوي"
+_AR_HARAKAT = "َُِ"
+
+
+def _rare_word(rng: random.Random, arabic: bool) -> str:
+    if arabic:
+        return "".join(rng.choice(_AR_LETTERS) + rng.choice(_AR_HARAKAT) for _ in range(rng.randint(3, 5)))
+    return "".join(rng.choice(_EN_LETTERS) + rng.choice(_EN_VOWELS) for _ in range(rng.randint(2, 4)))
+
+
+class _Vocabulary:
+    """Common words (Zipf weights), generated rare terms and names for one language."""
+
+    def __init__(self, rng: random.Random, arabic: bool, rare_terms: int = 2000):
+        self.arabic = arabic
+        common = _AR_WORDS if arabic else _EN_WORDS
+        self.words = list(common) + [_rare_word(rng, arabic) for _ in range(rare_terms)]
+        self.weights = [1.0 / (rank + 1) for rank in range(len(self.words))]
+        self.names = _AR_NAMES if arabic else _EN_NAMES
+
+    def sentence(self, rng: random.Random) -> str:
+        words = rng.choices(self.words, self.weights, k=rng.randint(8, 18))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), rng.choice(self.names))
+        end = "." if rng.random() < 0.8 else ("؟" if self.arabic else "?")
+        text = " ".join(words)
+        return (text if self.arabic else text[0].upper() + text[1:]) + end
+
+
+def _vocabularies(seed: int) -> tuple[_Vocabulary, _Vocabulary]:
+    rng = random.Random(f"vocabulary:{seed}")
+    return _Vocabulary(rng, arabic=False), _Vocabulary(rng, arabic=True)
+
+
+def _sentence(language: str, vocabs: tuple[_Vocabulary, _Vocabulary], rng: random.Random) -> str:
+    english, arabic = vocabs
+    if language == "en":
+        return english.sentence(rng)
+    if language == "mixed":
+        return (arabic if rng.random() < 0.5 else english).sentence(rng)
+    text = arabic.sentence(rng)
+    return normalize_arabic(text) if language == "ar_plain" else text
+
+
+def generate_documents(
+    n_chunks: int,
+    language: str = "en",
+    seed: int = 0,
+    chunks_per_doc: int = 50,
+) -> Iterator[tuple[str, str]]:
+    """
+    (file name, text) of documents totalling about n_chunks fixed-strategy chunks, each about
+    chunks_per_doc chunks of ~5-sentence paragraphs.
+    """
+    if language not in LANGUAGES:
+        raise ValueError(f"Unknown language: {language!r}. Use one of {', '.join(LANGUAGES)}.")
+    vocabs = _vocabularies(seed)
+    n_docs = max(1, -(-n_chunks // chunks_per_doc))
+    for d in range(n_docs):
+        rng = random.Random(f"{language}:{seed}:{d}")
+        doc_chunks = min(chunks_per_doc, n_chunks - d * chunks_per_doc) if n_chunks > 0 else 1
+        target = max(1, doc_chunks) * CHUNK_CHARS
+        paragraphs, size = [], 0
+        while size < target:
+            paragraph = " ".join(_sentence(language, vocabs, rng) for _ in range(5))
+            paragraphs.append(paragraph)
+            size += len(paragraph) + 2
+        yield f"{language}_{seed}_{d:05d}.txt", "\n\n".join(paragraphs)
+
+
+def write_corpus(
+    directory: str | Path,
+    n_chunks: int,
+    language: str = "en",
+    seed: int = 0,
+    chunks_per_doc: int = 50,
+) -> list[Path]:
+    """Write generate_documents() as UTF-8 .txt files in directory; returns their paths."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, text in generate_documents(n_chunks, language, seed, chunks_per_doc):
+        path = directory / name
+        path.write_text(text, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def generate_queries(n: int, language: str = "en", seed: int = 0) -> list[str]:
+    """n short keyword queries (2-4 words, sometimes a name) drawn from the corpus vocabulary."""
+    if language not in LANGUAGES:
+        raise ValueError(f"Unknown language: {language!r}. Use one of {', '.join(LANGUAGES)}.")
+    english, arabic = _vocabularies(seed)
+    rng = random.Random(f"queries:{language}:{seed}")
+    queries = []
+    for _ in range(n):
+        vocab = arabic if language in ("ar", "ar_plain") or (language == "mixed" and rng.random() < 0.5) else english
+        # Skip the most frequent (stop) words
+        words = rng.choices(vocab.words[10:], vocab.weights[10:], k=rng.randint(2, 4))
+        if rng.random() < 0.3:
+            words.append(rng.choice(vocab.names))
+        query = " ".join(words)
+        queries.append(normalize_arabic(query) if language == "ar_plain" else query)
+    return queries
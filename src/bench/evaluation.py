@@ -0,0 +1,251 @@
+"""
+Retrieval-quality evaluation: run a labeled set of queries through batched retrieval
+(run_rag_many, cache off) for each mode and report recall@k, MRR and nDCG@k next to per-query
+latency, so the cost of graph/RAPTOR expansion and hybrid search can be weighed against what
+it buys. A mode is "+"-joined: an optional base retrieval (vector, hybrid, lexical) plus
+expansions (graph, raptor), e.g. "graph", "hybrid+raptor".
+
+Labeled set (JSON, or JSONL with one query per line):
+    {"documents": ["corpus/a.txt", ...],
+     "queries": [{"query": "...", "relevant": [{"document_id": "...", "chunks": [0, 2], "grade": 2}, ...]}]}
+A relevant item names a document by "document_id" or "path" (relative paths are resolved
+against the labeled-set file) and optionally narrows it to a chunk_index range "chunks":
+[first, last] (inclusive) or a character range "chars": [start, end) that a chunk must
+overlap; "grade" (default 1) is its graded relevance for nDCG. "documents" (optional) lists
+files to ingest before evaluating.
+"""
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Any
+
+from src.bench.harness import latency_summary
+from src.rag.hybrid import RETRIEVAL_MODES
+
+EXPANSIONS = {"graph": "use_graph_rag", "raptor": "use_raptor"}
+DEFAULT_EVAL_MODES = ("vector", "graph", "raptor", "graph+raptor", "hybrid")
+DEFAULT_KS = (1, 5, 10)
+
+
+def mode_options(mode: str) -> dict[str, Any]:
+    """run_rag options for a "+"-joined mode, e.g. "hybrid+graph" -> retrieval_mode="hybrid", use_graph_rag=True."""
+    options: dict[str, Any] = {"retrieval_mode": "vector", "use_graph_rag": False, "use_raptor": False}
+    bases = []
+    for part in mode.split("+"):
+        part = part.strip().lower()
+        if part in EXPANSIONS:
+            options[EXPANSIONS[part]] = True
+        elif part in RETRIEVAL_MODES:
+            bases.append(part)
+        else:
+            raise ValueError(f"Unknown mode part {part!r} in {mode!r}. Use {', '.join((*RETRIEVAL_MODES, *EXPANSIONS))}.")
+    if len(bases) > 1:
+        raise ValueError(f"Mode {mode!r} names more than one retrieval mode: {bases}")
+    if bases:
+        options["retrieval_mode"] = bases[0]
+    return options
+
+
+def _range(value: Any, name: str) -> tuple[int, int] | None:
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return (value, value)
+    if len(value) != 2 or value[0] > value[1]:
+        raise ValueError(f"{name} must be [first, last], got {value!r}")
+    return (int(value[0]), int(value[1]))
+
+
+def _relevant_item(item: dict[str, Any] | str, base: Path | None) -> dict[str, Any]:
+    from src.parser.prepare import document_id_for
+
+    if isinstance(item, str):
+        item = {"document_id": item}
+    document_id = item.get("document_id")
+    if document_id is None:
+        if "path" not in item:
+            raise ValueError(f"Relevant item needs document_id or path: {item!r}")
+        path = Path(item["path"])
+        document_id = document_id_for(str(base / path if base is not None and not path.is_absolute() else path))
+    chunks = _range(item.get("chunks", item.get("chunk_index")), "chunks")
+    chars = _range(item.get("chars"), "chars")
+    return {"document_id": document_id, "chunks": chunks, "chars": chars, "grade": float(item.get("grade", 1))}
+
+
+def load_labeled_set(path: str | Path) -> dict[str, Any]:
+    """
+    Read a labeled set (see module docstring). Returns {"documents": [paths], "queries":
+    [{"query", "relevant": [{"document_id", "chunks", "chars", "grade"}]}]}; ranges are
+    (first, last) tuples or None.
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".jsonl":
+        data: Any = {"queries": [json.loads(line) for line in text.splitlines() if line.strip()]}
+    else:
+        data = json.loads(text)
+        if isinstance(data, list):
+            data = {"queries": data}
+    return parse_labeled_set(data, base=path.parent)
+
+
+def parse_labeled_set(data: dict[str, Any], base: str | Path | None = None) -> dict[str, Any]:
+    """load_labeled_set for already-parsed data; relative paths resolve against base."""
+    base = Path(base) if base is not None else None
+    documents = [str(base / d if base is not None and not Path(d).is_absolute() else d) for d in data.get("documents", [])]
+    queries = []
+    for entry in data.get("queries", []):
+        if not entry.get("query"):
+            raise ValueError(f"Labeled query without text: {entry!r}")
+        queries.append({"query": entry["query"], "relevant": [_relevant_item(r, base) for r in entry.get("relevant", [])]})
+    return {"documents": documents, "queries": queries}
+
+
+def _matches(meta: dict[str, Any], item: dict[str, Any]) -> bool:
+    if meta.get("document_id") != item["document_id"]:
+        return False
+    if item["chunks"] is not None and not item["chunks"][0] <= meta.get("chunk_index", -1) <= item["chunks"][1]:
+        return False
+    if item["chars"] is not None:
+        start, end = meta.get("start", 0), meta.get("end", 0)
+        return start < item["chars"][1] and end > item["chars"][0]
+    return True
+
+
+def judge(retrieved: list[dict[str, Any]], relevant: list[dict[str, Any]]) -> list[tuple[float, list[int]]]:
+    """(gain, relevant items matched) per retrieved chunk; gain is the best grade among matched items."""
+    out = []
+    for chunk in retrieved:
+        meta = chunk.get("metadata", {})
+        hit = [j for j, item in enumerate(relevant) if _matches(meta, item)]
+        out.append((max((relevant[j]["grade"] for j in hit), default=0.0), hit))
+    return out
+
+
+def recall_at_k(judged: list[tuple[float, list[int]]], n_relevant: int, k: int) -> float:
+    """Share of relevant items matched by at least one of the first k chunks."""
+    if n_relevant == 0:
+        return 0.0
+    found = {j for _, hit in judged[:k] for j in hit}
+    return len(found) / n_relevant
+
+
+def reciprocal_rank(judged: list[tuple[float, list[int]]], k: int | None = None) -> float:
+    """1 / rank of the first relevant chunk within the first k (0 if none)."""
+    for rank, (gain, _) in enumerate(judged[:k], start=1):
+        if gain > 0:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(judged: list[tuple[float, list[int]]], grades: list[float], k: int) -> float:
+    """
+    nDCG@k with gain 2^grade - 1. Each relevant item counts once, at the first chunk that
+    matches it (further chunks of the same document add nothing), so the ideal ranking is the
+    items sorted by grade and the value stays within [0, 1].
+    """
+    ideal = sum((2**g - 1) / math.log2(r + 2) for r, g in enumerate(sorted(grades, reverse=True)[:k]))
+    if ideal <= 0:
+        return 0.0
+    seen: set[int] = set()
+    dcg = 0.0
+    for rank, (_, hit) in enumerate(judged[:k]):
+        new = [j for j in hit if j not in seen]
+        seen.update(new)
+        if new:
+            dcg += (2 ** max(grades[j] for j in new) - 1) / math.log2(rank + 2)
+    return dcg / ideal
+
+
+def _score(retrieved: list[dict[str, Any]], relevant: list[dict[str, Any]], ks: tuple[int, ...]) -> dict[str, Any]:
+    judged = judge(retrieved, relevant)
+    grades = [item["grade"] for item in relevant]
+    return {
+        "recall": {str(k): recall_at_k(judged, len(relevant), k) for k in ks},
+        "ndcg": {str(k): ndcg_at_k(judged, grades, k) for k in ks},
+        "rr": reciprocal_rank(judged, max(ks)),
+    }
+
+
+def _mean(values: list[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def evaluate(
+    labeled: dict[str, Any],
+    modes: tuple[str, ...] = DEFAULT_EVAL_MODES,
+    ks: tuple[int, ...] = DEFAULT_KS,
+    filter_metadata: dict[str, Any] | None = None,
+    time_queries: bool = True,
+) -> dict[str, Any]:
+    """
+    Evaluate every mode on a labeled set (load_labeled_set) against the current stores.
+    Quality comes from one run_rag_many batch of top max(ks) per mode; "batch" holds its
+    seconds and seconds per query (after one warm-up query). time_queries=True also times each
+    query alone with run_rag for latency percentiles, which the batch cannot attribute per query.
+    Returns {"ks", "queries", "modes": {mode: {"options", "recall", "ndcg", "mrr", "batch",
+    "latency", "per_query"}}}; recall and ndcg map str(k) to the mean over queries.
+    """
+    from src.pipeline import run_rag, run_rag_many
+
+    ks = tuple(sorted(set(ks)))
+    if not ks or ks[0] < 1:
+        raise ValueError(f"ks must be positive, got {ks}")
+    options = {mode: mode_options(mode) for mode in modes}
+    queries = [q["query"] for q in labeled["queries"]]
+    top_k = ks[-1]
+    report: dict[str, Any] = {"ks": list(ks), "queries": len(queries), "modes": {}}
+    for mode in modes:
+        if queries:
+            # Warm-up: model load and store connections are not charged to the first mode
+            run_rag(queries[0], top_k=top_k, filter_metadata=filter_metadata, use_cache=False, **options[mode])
+        start = time.perf_counter()
+        states = run_rag_many(queries, top_k=top_k, filter_metadata=filter_metadata, use_cache=False, **options[mode])
+        batch_seconds = time.perf_counter() - start
+        latencies: list[float] = []
+        if time_queries:
+            for q in queries:
+                start = time.perf_counter()
+                run_rag(q, top_k=top_k, filter_metadata=filter_metadata, use_cache=False, **options[mode])
+                latencies.append(time.perf_counter() - start)
+        per_query = []
+        for i, (entry, state) in enumerate(zip(labeled["queries"], states)):
+            chunks = state.get("chunks", [])[:top_k]
+            per_query.append({
+                "query": entry["query"],
+                **_score(chunks, entry["relevant"], ks),
+                "latency": latencies[i] if latencies else None,
+            })
+        report["modes"][mode] = {
+            "options": options[mode],
+            "recall": {str(k): _mean([p["recall"][str(k)] for p in per_query]) for k in ks},
+            "ndcg": {str(k): _mean([p["ndcg"][str(k)] for p in per_query]) for k in ks},
+            "mrr": _mean([p["rr"] for p in per_query]),
+            "batch": {"seconds": batch_seconds, "per_query": batch_seconds / len(queries) if queries else 0.0},
+            "latency": {**latency_summary(latencies), "samples": latencies},
+            "per_query": per_query,
+        }
+    return report
+
+
+def format_evaluation(report: dict[str, Any]) -> str:
+    """One row per mode: recall@k and nDCG@k for each k, MRR, batch and p50/p95 latency (ms)."""
+    ks = report["ks"]
+    header = ["mode", *(f"R@{k}" for k in ks), *(f"nDCG@{k}" for k in ks), f"MRR@{ks[-1]}", "batch/q", "p50", "p95"]
+    rows = []
+    for mode, r in report["modes"].items():
+        latency = r["latency"]
+        rows.append([
+            mode,
+            *(f"{r['recall'][str(k)]:.3f}" for k in ks),
+            *(f"{r['ndcg'][str(k)]:.3f}" for k in ks),
+            f"{r['mrr']:.3f}",
+            f"{r['batch']['per_query'] * 1000:.1f}",
+            *((f"{latency['p50'] * 1000:.1f}", f"{latency['p95'] * 1000:.1f}") if latency["n"] else ("-", "-")),
+        ])
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    lines = ["  ".join(cell.rjust(w) if i else cell.ljust(w) for i, (cell, w) in enumerate(zip(row, widths))) for row in [header, *rows]]
+    lines.append(f"{report['queries']} queries; latencies in ms (batch/q: run_rag_many seconds per query)")
+    return "\n".join(lines)
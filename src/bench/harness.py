@@ -0,0 +1,276 @@
+"""
+Scaling benchmark: ingest a synthetic corpus (src.bench.corpus) into fresh stores and measure
+ingest throughput, query latency percentiles per retrieval mode, peak RSS and on-disk size.
+run_scale() measures one (scale, language); run_benchmarks() runs a grid, each point in a new
+process by default so peak RSS belongs to that point, and returns a JSON-serializable report.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from importlib import metadata
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from src.bench.corpus import generate_queries, write_corpus
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None  # type: ignore[assignment]
+
+REPORT_VERSION = 1
+# Distributions whose versions go into the environment fingerprint
+LIBRARIES = ("numpy", "chromadb", "langgraph", "sentence-transformers", "torch", "pypdf", "python-docx", "networkx")
+# Settings that change what is measured (recorded with the report when set)
+SETTINGS = (
+    "VECTOR_BACKEND", "VECTOR_QUANTIZATION", "VECTOR_IVF_MIN", "VECTOR_IVF_NPROBE", "VECTOR_PQ_MIN", "VECTOR_RERANK",
+    "EMBEDDING_BACKEND", "EMBED_SERVICE", "EMBED_BATCH_SIZE", "EMBED_BATCH_WAIT_MS", "EMBED_NORMALIZED",
+    "EMBEDDING_CACHE_MAX_BYTES", "INSTRUMENTATION", "PDF_WORKERS", "PDF_BLOCK_PAGES", "ASYNC_WORKERS",
+    "SQLITE_CACHE_KIB", "SQLITE_MMAP_BYTES",
+)
+QUERY_MODES: dict[str, dict[str, Any]] = {
+    "plain": {},
+    "graph": {"use_graph_rag": True},
+    "raptor": {"use_raptor": True},
+    "hybrid": {"retrieval_mode": "hybrid"},
+    "lexical": {"retrieval_mode": "lexical"},
+}
+DEFAULT_MODES = ("plain", "graph", "raptor")
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+
+
+@contextlib.contextmanager
+def _scoped_env(values: dict[str, str]) -> Iterator[None]:
+    saved = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def _peak_rss() -> dict[str, int | None]:
+    if resource is None:
+        return {"self": None, "children": None}
+    # ru_maxrss is KiB on Linux
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024,
+    }
+
+
+def _disk_bytes(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) if path.exists() else 0
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float | int]:
+    """n, mean and p50/p95/p99 of latencies in seconds."""
+    if not latencies:
+        return {"n": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"n": len(latencies), "mean": float(np.mean(latencies)), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+def run_scale(
+    n_chunks: int,
+    language: str = "en",
+    workdir: str | Path | None = None,
+    n_queries: int = 100,
+    modes: tuple[str, ...] = DEFAULT_MODES,
+    top_k: int = 5,
+    seed: int = 0,
+    workers: int | None = None,
+    chunks_per_doc: int = 50,
+    stub_embedder: bool = False,
+) -> dict[str, Any]:
+    """
+    Generate about n_chunks chunks of `language`, ingest them with run_ingest_many into stores
+    under workdir (a temporary directory by default) and time n_queries run_rag calls (cache
+    off) per mode, after one warm-up query each. stub_embedder=True uses the offline hashing
+    encoder (EMBEDDING_BACKEND=stub). Seconds throughout; peak RSS is the process's and its
+    children's (ingest workers) maximum so far.
+    """
+    unknown = [m for m in modes if m not in QUERY_MODES]
+    if unknown:
+        raise ValueError(f"Unknown query modes: {unknown}. Use {', '.join(QUERY_MODES)}.")
+    with contextlib.ExitStack() as stack:
+        root = Path(workdir) if workdir is not None else Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        stores = root / "stores"
+        env = {
+            "CHROMA_PATH": str(stores / "chroma"),
+            "SQLITE_PATH": str(stores / "documents.db"),
+            "EMBEDDING_CACHE_PATH": str(stores / "embedding_cache.db"),
+        }
+        if stub_embedder:
+            env["EMBEDDING_BACKEND"] = "stub"
+        stack.enter_context(_scoped_env(env))
+        stack.callback(_close_stores)
+        return _measure(root, stores, n_chunks, language, n_queries, modes, top_k, seed, workers, chunks_per_doc)
+
+
+def _close_stores() -> None:
+    from src.storage.sqlite_pool import close_all
+    from src.storage.vector_store import close_vector_stores
+
+    close_vector_stores()
+    close_all()
+
+
+def _measure(
+    root: Path,
+    stores: Path,
+    n_chunks: int,
+    language: str,
+    n_queries: int,
+    modes: tuple[str, ...],
+    top_k: int,
+    seed: int,
+    workers: int | None,
+    chunks_per_doc: int,
+) -> dict[str, Any]:
+    from src.embeddings import model_key
+    from src.pipeline import run_ingest_many, run_rag
+    from src.storage.vector_store import get_vector_store
+
+    t0 = time.perf_counter()
+    paths = write_corpus(root / "corpus", n_chunks, language, seed, chunks_per_doc)
+    generate_seconds = time.perf_counter() - t0
+
+    ingest = run_ingest_many(paths, workers=workers)
+    chunks = sum(r.get("chunks") or 0 for r in ingest["results"])
+    queries = generate_queries(n_queries, language, seed)
+    query_report: dict[str, Any] = {}
+    for mode in modes:
+        options = QUERY_MODES[mode]
+        run_rag(queries[0] if queries else "", top_k=top_k, use_cache=False, **options)
+        latencies = []
+        for q in queries:
+            start = time.perf_counter()
+            run_rag(q, top_k=top_k, use_cache=False, **options)
+            latencies.append(time.perf_counter() - start)
+        # Per-query samples let compare_reports test significance (src.bench.regression)
+        query_report[mode] = {**latency_summary(latencies), "samples": latencies}
+
+    return {
+        "language": language,
+        "target_chunks": n_chunks,
+        "documents": len(paths),
+        "chunks": chunks,
+        "corpus_bytes": _disk_bytes(root / "corpus"),
+        "generate_seconds": generate_seconds,
+        "ingest": {
+            "seconds": ingest["elapsed"],
+            "chunks_per_second": chunks / ingest["elapsed"] if ingest["elapsed"] > 0 else 0.0,
+            "failed": ingest["failed"],
+            "stages": ingest["stages"],
+        },
+        "query": query_report,
+        "peak_rss": _peak_rss(),
+        "disk_bytes": {
+            "vector_store": _disk_bytes(stores / "chroma"),
+            "sqlite": _disk_bytes(stores / "documents.db") + _disk_bytes(Path(str(stores / "documents.db") + "-wal")),
+            "embedding_cache": _disk_bytes(stores / "embedding_cache.db"),
+            "total": _disk_bytes(stores),
+        },
+        "embedder": model_key(),
+        "vector_backend": get_vector_store().backend,
+    }
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _version(distribution: str) -> str | None:
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def environment() -> dict[str, Any]:
+    """
+    Where the report was produced: CPU, Python, OS, library versions and performance settings.
+    "fingerprint" hashes all of it except the OS string (kernel patch releases), so reports with
+    the same fingerprint are comparable.
+    """
+    env: dict[str, Any] = {
+        "cpu": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "sqlite": sqlite3.sqlite_version,
+        "libraries": {name: _version(name) for name in LIBRARIES},
+        "settings": {k: os.environ[k] for k in SETTINGS if k in os.environ},
+    }
+    digest = hashlib.sha256(json.dumps(env, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return {**env, "platform": platform.platform(), "fingerprint": digest}
+
+
+def run_benchmarks(
+    scales: tuple[int, ...] = DEFAULT_SCALES,
+    languages: tuple[str, ...] = ("en",),
+    isolate: bool = True,
+    repeat: int = 1,
+    **options: Any,
+) -> dict[str, Any]:
+    """
+    run_scale `repeat` times for every (scale, language); options are passed through.
+    isolate=True runs each measurement in a fresh (spawned) process. Returns {"version",
+    "created", "environment", "config", "runs"}; each run carries its "repeat" index.
+    """
+    runs = []
+    for language in languages:
+        for n_chunks in scales:
+            for i in range(max(1, repeat)):
+                if isolate:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                        run = pool.submit(run_scale, n_chunks, language, **options).result()
+                else:
+                    run = run_scale(n_chunks, language, **options)
+                runs.append({**run, "repeat": i})
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": {
+            "scales": list(scales),
+            "languages": list(languages),
+            "repeat": max(1, repeat),
+            **{k: _jsonable(v) for k, v in options.items()},
+        },
+        "runs": runs,
+    }
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, tuple):
+        return list(value)
+    return value
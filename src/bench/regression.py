@@ -0,0 +1,212 @@
+"""
+Regression gate for scaling reports (src.bench.harness): compare_reports(baseline, current)
+checks query latency, ingest throughput and stage times, peak RSS and disk size of every
+(language, scale) present in both reports. A metric regresses when it is worse than the
+baseline by more than its tolerance AND the difference is significant at `alpha`: bootstrap
+over per-query latency samples, exact one-sided Mann-Whitney U over per-run values (so
+throughput and memory need repeated runs: 3 vs 3 runs reach p = 0.05).
+"""
+
+import math
+from functools import lru_cache
+from typing import Any, Callable
+
+import numpy as np
+
+DEFAULT_TOLERANCES = {"latency": 0.10, "throughput": 0.10, "memory": 0.10}
+DEFAULT_ALPHA = 0.05
+_BOOTSTRAP_MIN = 20
+_BOOTSTRAP_ROUNDS = 2000
+_EXACT_MAX = 400  # n1 * n2 up to which Mann-Whitney p-values are exact
+
+
+@lru_cache(maxsize=256)
+def _u_counts(n1: int, n2: int) -> tuple[int, ...]:
+    """Orderings of n1 + n2 distinct values giving U = 0 .. n1*n2 (U = pairs where the first sample is larger)."""
+    if n1 == 0 or n2 == 0:
+        return (1,)
+    out = [0] * (n1 * n2 + 1)
+    # The largest value is from the first sample (beats all n2) or from the second
+    for u, c in enumerate(_u_counts(n1 - 1, n2)):
+        out[u + n2] += c
+    for u, c in enumerate(_u_counts(n1, n2 - 1)):
+        out[u] += c
+    return tuple(out)
+
+
+def mann_whitney_greater(a: list[float], b: list[float]) -> float:
+    """One-sided p-value that values in `a` tend to be larger than those in `b` (ties count 1/2)."""
+    x, y = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    u = float((x[:, None] > y[None, :]).sum() + 0.5 * (x[:, None] == y[None, :]).sum())
+    if n1 * n2 <= _EXACT_MAX:
+        counts = _u_counts(n1, n2)
+        # Ties: U rounded down, which can only make the test more conservative
+        return sum(counts[math.floor(u) :]) / sum(counts)
+    mean, sd = n1 * n2 / 2.0, math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12.0)
+    return 0.5 * math.erfc((u - 0.5 - mean) / sd / math.sqrt(2.0))
+
+
+def bootstrap_greater(a: list[float], b: list[float], stat: Callable[..., Any], seed: int = 0) -> float:
+    """One-sided p-value that stat(a) > stat(b): share of bootstrap resamples where it is not."""
+    x, y = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    rng = np.random.default_rng(seed)
+    xs = x[rng.integers(0, len(x), size=(_BOOTSTRAP_ROUNDS, len(x)))]
+    ys = y[rng.integers(0, len(y), size=(_BOOTSTRAP_ROUNDS, len(y)))]
+    return float((stat(xs, axis=1) <= stat(ys, axis=1)).mean())
+
+
+def _percentile(q: float) -> Callable[..., Any]:
+    return lambda values, axis=None: np.percentile(values, q, axis=axis)
+
+
+class _Metric:
+    """Values of one metric across the runs of a (language, scale) group."""
+
+    def __init__(self, kind: str, higher_is_worse: bool, stat: Callable[..., Any] = np.median, pooled: bool = False):
+        self.kind = kind
+        self.higher_is_worse = higher_is_worse
+        self.stat = stat
+        self.pooled = pooled  # values are per-query samples, not one value per run
+        self.values: list[float] = []
+
+
+def _group_metrics(runs: list[dict[str, Any]]) -> dict[str, _Metric]:
+    metrics: dict[str, _Metric] = {}
+
+    def add(name: str, value: Any, *args: Any, **kwargs: Any) -> None:
+        if value is not None:
+            metrics.setdefault(name, _Metric(*args, **kwargs)).values.append(float(value))
+
+    pooled = all("samples" in q for run in runs for q in run.get("query", {}).values())
+    for run in runs:
+        ingest = run.get("ingest", {})
+        add("ingest.chunks_per_second", ingest.get("chunks_per_second"), "throughput", False)
+        for stage, seconds in ingest.get("stages", {}).items():
+            add(f"ingest.{stage}_seconds", seconds, "latency", True)
+        for mode, summary in run.get("query", {}).items():
+            for q in (50, 95):
+                name = f"query.{mode}.p{q}"
+                if pooled:
+                    metrics.setdefault(name, _Metric("latency", True, _percentile(q), pooled=True)).values.extend(
+                        summary["samples"]
+                    )
+                else:
+                    add(name, summary.get(f"p{q}"), "latency", True)
+        add("peak_rss", (run.get("peak_rss") or {}).get("self"), "memory", True)
+        add("disk_bytes", (run.get("disk_bytes") or {}).get("total"), "memory", True)
+    return metrics
+
+
+def _groups(report: dict[str, Any]) -> dict[tuple[str, int], list[dict[str, Any]]]:
+    groups: dict[tuple[str, int], list[dict[str, Any]]] = {}
+    for run in report.get("runs", []):
+        groups.setdefault((run["language"], run["target_chunks"]), []).append(run)
+    return groups
+
+
+def _p_worse(base: _Metric, cur: _Metric) -> tuple[float, float]:
+    """(p that current is worse, p that current is better)."""
+    worse_first = (cur.values, base.values) if base.higher_is_worse else (base.values, cur.values)
+    if base.pooled and min(len(base.values), len(cur.values)) >= _BOOTSTRAP_MIN:
+        return bootstrap_greater(*worse_first, base.stat), bootstrap_greater(*worse_first[::-1], base.stat)
+    return mann_whitney_greater(*worse_first), mann_whitney_greater(*worse_first[::-1])
+
+
+def _compare_environments(baseline: dict[str, Any], current: dict[str, Any]) -> dict[str, Any]:
+    differences = {}
+    for key in sorted(set(baseline) | set(current)):
+        if key in ("fingerprint", "platform"):
+            continue
+        b, c = baseline.get(key), current.get(key)
+        if isinstance(b, dict) and isinstance(c, dict):
+            for sub in sorted(set(b) | set(c)):
+                if b.get(sub) != c.get(sub):
+                    differences[f"{key}.{sub}"] = [b.get(sub), c.get(sub)]
+        elif b != c:
+            differences[key] = [b, c]
+    return {
+        "match": baseline.get("fingerprint") == current.get("fingerprint") and not differences,
+        "baseline": baseline.get("fingerprint"),
+        "current": current.get("fingerprint"),
+        "differences": differences,
+    }
+
+
+def compare_reports(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    tolerances: dict[str, float] | None = None,
+    alpha: float = DEFAULT_ALPHA,
+) -> dict[str, Any]:
+    """
+    Compare two run_benchmarks() reports. tolerances: relative slack per kind ("latency",
+    "throughput", "memory"). Each check has a status: "regression" (worse beyond tolerance,
+    significant), "unconfirmed" (worse beyond tolerance, not significant), "improvement" or "ok".
+    Returns {"ok", "regressions", "checks", "environment", "missing"}; ok is False on any regression.
+    An environment mismatch is reported, not failed on.
+    """
+    tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+    base_groups, cur_groups = _groups(baseline), _groups(current)
+    checks: list[dict[str, Any]] = []
+    for group in sorted(set(base_groups) & set(cur_groups)):
+        base_metrics, cur_metrics = _group_metrics(base_groups[group]), _group_metrics(cur_groups[group])
+        for name in sorted(set(base_metrics) & set(cur_metrics)):
+            base, cur = base_metrics[name], cur_metrics[name]
+            if base.pooled != cur.pooled:
+                continue  # one report lacks per-query samples: not comparable
+            b, c = float(base.stat(base.values)), float(cur.stat(cur.values))
+            change = (c - b) / b if b else (0.0 if c == b else math.inf)
+            tolerance = tolerances[base.kind]
+            signed = change if base.higher_is_worse else -change
+            p_worse, p_better = _p_worse(base, cur)
+            if signed > tolerance:
+                status = "regression" if p_worse <= alpha else "unconfirmed"
+            elif signed < -tolerance and p_better <= alpha:
+                status = "improvement"
+            else:
+                status = "ok"
+            checks.append({
+                "language": group[0],
+                "target_chunks": group[1],
+                "metric": name,
+                "kind": base.kind,
+                "baseline": b,
+                "current": c,
+                "change": change,
+                "tolerance": tolerance,
+                "p_value": p_worse,
+                "samples": [len(base.values), len(cur.values)],
+                "status": status,
+            })
+    regressions = [c for c in checks if c["status"] == "regression"]
+    return {
+        "ok": not regressions,
+        "regressions": regressions,
+        "checks": checks,
+        "environment": _compare_environments(baseline.get("environment", {}), current.get("environment", {})),
+        "missing": [list(g) for g in sorted(set(base_groups) - set(cur_groups))],
+    }
+
+
+def format_comparison(result: dict[str, Any], verbose: bool = False) -> str:
+    """Human-readable summary of compare_reports(): regressions and unconfirmed checks (all with verbose)."""
+    lines = []
+    env = result["environment"]
+    if not env["match"]:
+        lines.append(f"WARNING: environment differs from baseline ({env['baseline']} -> {env['current']}):")
+        lines.extend(f"  {key}: {b!r} -> {c!r}" for key, (b, c) in env["differences"].items())
+    for group in result["missing"]:
+        lines.append(f"WARNING: {group[0]}/{group[1]} is in the baseline but was not run")
+    for check in result["checks"]:
+        if verbose or check["status"] in ("regression", "unconfirmed"):
+            lines.append(
+                f"{check['status'].upper():>12} {check['language']}/{check['target_chunks']} {check['metric']}: "
+                f"{check['baseline']:.6g} -> {check['current']:.6g} ({check['change']:+.1%}, "
+                f"tolerance {check['tolerance']:.0%}, p={check['p_value']:.3g}, n={check['samples'][0]}/{check['samples'][1]})"
+            )
+    n = len(result["regressions"])
+    lines.append(f"{n} regression(s) in {len(result['checks'])} checks" if n else f"No regressions in {len(result['checks'])} checks")
+    return "\n".join(lines)
@@ -0,0 +1,90 @@
+"""
+Command-line interface: ingest files/directories, query, delete.
+  python -m src.cli ingest data/docs --workers 8 --batch-size 64
+  python -m src.cli query "question" --top-k 5 --graph --raptor
+  python -m src.cli delete <document_id>
+"""
+
+import argparse
+import json
+import sys
+from typing import Any
+
+
+def _print_json(obj: Any) -> None:
+    print(json.dumps(obj, ensure_ascii=False, indent=2, default=str))
+
+
+def _cmd_ingest(args: argparse.Namespace) -> int:
+    from src.pipeline import run_ingest_many
+
+    report = run_ingest_many(args.paths, workers=args.workers, batch_size=args.batch_size, force=args.force)
+    if args.json:
+        _print_json(report)
+    else:
+        for r in report["results"]:
+            detail = f"{r.get('chunks', 0)} chunks" if r["status"] == "ok" else r.get("error", "")
+            print(f"{r['status']:7}  {r['file_path']}  {detail}")
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in report["stages"].items())
+        print(
+            f"{report['succeeded']} ok, {report['skipped']} unchanged, {report['failed']} failed in {report['elapsed']:.2f}s "
+            f"({report['workers']} workers; {stages})"
+        )
+    return 0 if report["failed"] == 0 else 1
+
+
+def _cmd_query(args: argparse.Namespace) -> int:
+    from src.pipeline import run_rag
+
+    result = run_rag(args.query, top_k=args.top_k, use_graph_rag=args.graph, use_raptor=args.raptor)
+    chunks = [{"score": c.get("score"), "metadata": c.get("metadata", {}), "text": c.get("text", "")} for c in result.get("chunks", [])]
+    if args.json:
+        _print_json({"query": args.query, "chunks": chunks})
+    else:
+        for c in chunks:
+            print(f"[{c['score']:.3f}] {c['metadata'].get('document_id', '')}#{c['metadata'].get('chunk_index', '')}")
+            print("  " + c["text"][:200].replace("\n", " "))
+    return 0
+
+
+def _cmd_delete(args: argparse.Namespace) -> int:
+    from src.pipeline import delete_document
+
+    for doc_id in args.document_ids:
+        delete_document(doc_id)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pyxon", description="Pyxon AI document parser")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="Ingest files or directories (parallel extraction, batched embedding)")
+    p.add_argument("paths", nargs="+", help="Files or directories (.pdf, .docx, .doc, .txt)")
+    p.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    p.add_argument("--batch-size", type=int, default=64, help="Texts per embedding batch")
+    p.add_argument("--force", action="store_true", help="Re-process files even if unchanged")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    p.set_defaults(func=_cmd_ingest)
+
+    p = sub.add_parser("query", help="Retrieve chunks for a query")
+    p.add_argument("query")
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--graph", action="store_true", help="Expand with Graph RAG")
+    p.add_argument("--raptor", action="store_true", help="Expand with RAPTOR")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=_cmd_query)
+
+    p = sub.add_parser("delete", help="Delete documents by id")
+    p.add_argument("document_ids", nargs="+")
+    p.set_defaults(func=_cmd_delete)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
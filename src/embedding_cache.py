@@ -0,0 +1,147 @@
+"""
+Two-tier embedding cache: in-memory LRU (byte budget) in front of a persistent SQLite store.
+Keyed by (model name, sha256 of the normalized text). Diacritics are part of the key
+(they change the embedding); only Unicode form and surrounding/repeated whitespace are normalized.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.storage.sqlite_pool import connection, ensure_schema
+
+_WS = re.compile(r"\s+")
+
+
+def default_cache_path() -> str:
+    return os.environ.get("EMBEDDING_CACHE_PATH", "./data/embedding_cache.db")
+
+
+def _default_max_bytes() -> int:
+    return int(os.environ.get("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def text_key(text: str) -> str:
+    """Cache key of a text: sha256 of its NFC, whitespace-collapsed form."""
+    normalized = _WS.sub(" ", unicodedata.normalize("NFC", text)).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    LRU of float32 vectors bounded by max_bytes, backed by an SQLite table (db_path=None or ""
+    keeps the cache in memory only). Thread-safe. Counters: memory_hits, disk_hits, misses.
+    """
+
+    def __init__(self, db_path: str | None = None, max_bytes: int | None = None):
+        self.db_path = default_cache_path() if db_path is None else db_path
+        self.max_bytes = _default_max_bytes() if max_bytes is None else max_bytes
+        self._lru: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.db_path:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            ensure_schema(self.db_path, "embedding_cache", self._init_schema)
+
+    def _conn(self) -> sqlite3.Connection:
+        return connection(self.db_path)
+
+    def _init_schema(self) -> None:
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, key)
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+
+    def _remember(self, k: tuple[str, str], vec: np.ndarray) -> None:
+        """Insert into the LRU (lock held) and evict least recently used entries over budget."""
+        if k in self._lru:
+            self._lru.move_to_end(k)
+            return
+        self._lru[k] = vec
+        self._bytes += vec.nbytes
+        while self._bytes > self.max_bytes and self._lru:
+            _, old = self._lru.popitem(last=False)
+            self._bytes -= old.nbytes
+
+    def get_many(self, model: str, keys: list[str]) -> dict[str, np.ndarray]:
+        """Look up keys (memory first, then disk); returns the found vectors. Counts one hit/miss per key."""
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vec = found.get(key)
+                if vec is None:
+                    vec = self._lru.get((model, key))
+                if vec is not None:
+                    self._lru.move_to_end((model, key))
+                    found[key] = vec
+                    self.memory_hits += 1
+        rest = [k for k in dict.fromkeys(keys) if k not in found]
+        if rest and self.db_path:
+            with self._conn() as conn:
+                for start in range(0, len(rest), 500):
+                    batch = rest[start : start + 500]
+                    marks = ",".join("?" * len(batch))
+                    for key, blob in conn.execute(
+                        f"SELECT key, vector FROM embedding_cache WHERE model = ? AND key IN ({marks})",
+                        [model, *batch],
+                    ):
+                        found[key] = np.frombuffer(blob, dtype=np.float32)
+        with self._lock:
+            for key in rest:
+                if key in found:
+                    self.disk_hits += 1
+                    self._remember((model, key), found[key])
+                else:
+                    self.misses += 1
+        return found
+
+    def put_many(self, model: str, items: dict[str, np.ndarray]) -> None:
+        """Store vectors in memory and on disk."""
+        if not items:
+            return
+        items = {k: np.ascontiguousarray(v, dtype=np.float32) for k, v in items.items()}
+        with self._lock:
+            for key, vec in items.items():
+                self._remember((model, key), vec)
+        if self.db_path:
+            with self._conn() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (model, key, vector) VALUES (?, ?, ?)",
+                    [(model, k, v.tobytes()) for k, v in items.items()],
+                )
+                conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._lru),
+                "memory_bytes": self._bytes,
+            }
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._bytes = 0
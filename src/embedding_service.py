@@ -0,0 +1,151 @@
+"""
+In-process embedding service: requests from any number of threads (or coroutines, through
+asyncio.wrap_future) are queued and encoded by one worker thread in shared batches. A batch is
+flushed when EMBED_BATCH_SIZE texts are waiting or the oldest request has waited
+EMBED_BATCH_WAIT_MS. Texts are sorted by length before encoding to reduce padding.
+Queue depth and batch size histograms are exported through src.instrumentation.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+import numpy as np
+
+from src.instrumentation import Histogram, register_histogram
+
+_STOP = object()
+
+
+def _default_batch_size() -> int:
+    return int(os.environ.get("EMBED_BATCH_SIZE", "32"))
+
+
+def _default_wait() -> float:
+    return float(os.environ.get("EMBED_BATCH_WAIT_MS", "5")) / 1000.0
+
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueued")
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.enqueued = time.monotonic()
+
+
+class EmbeddingService:
+    """
+    Micro-batching front of an encode function (list[str] -> (n, dim) array). submit() returns a
+    Future of the float32 matrix for its texts, in order; encode() waits for it. The worker
+    thread starts on first use; close() stops it after the queued requests are served.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[list[str]], Any],
+        batch_size: int | None = None,
+        max_wait: float | None = None,
+    ):
+        self.encode_fn = encode_fn
+        self.batch_size = max(1, _default_batch_size() if batch_size is None else batch_size)
+        self.max_wait = _default_wait() if max_wait is None else max_wait
+        self.queue_depth = Histogram((1, 2, 4, 8, 16, 32, 64, 128))
+        self.batch_sizes = Histogram((1, 2, 4, 8, 16, 32, 64, 128, 256))
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._pid = os.getpid()
+        self.batches = 0
+
+    def submit(self, texts: list[str]) -> Future:
+        request = _Request(list(texts))
+        if not request.texts:
+            request.future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return request.future
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def close(self) -> None:
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(_STOP)
+            worker.join()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: the parent's worker thread and queue did not survive
+                self._queue, self._worker, self._pid = queue.Queue(), None, os.getpid()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+                self._worker.start()
+
+    def _collect(self, first: _Request) -> tuple[list[_Request], bool]:
+        """Requests for one batch: until batch_size texts or the first request's deadline."""
+        batch, n = [first], len(first.texts)
+        deadline = first.enqueued + self.max_wait
+        while n < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            n += len(item.texts)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+            self.queue_depth.observe(len(batch) + self._queue.qsize())
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch: list[_Request]) -> None:
+        texts = [t for r in batch for t in r.texts]
+        self.batch_sizes.observe(len(texts))
+        self.batches += 1
+        # Longest first, so each model batch holds texts of similar length (less padding)
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        try:
+            encoded = np.asarray(self.encode_fn([texts[i] for i in order]), dtype=np.float32)
+        except BaseException as e:
+            for r in batch:
+                r.future.set_exception(e)
+            return
+        matrix = np.empty_like(encoded)
+        matrix[order] = encoded
+        start = 0
+        for r in batch:
+            r.future.set_result(matrix[start : start + len(r.texts)])
+            start += len(r.texts)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "queued": self._queue.qsize(),
+            "queue_depth": self.queue_depth.snapshot(),
+            "batch_size": self.batch_sizes.snapshot(),
+        }
+
+    def register_metrics(self, prefix: str = "embedding") -> "EmbeddingService":
+        """Export this service's histograms through src.instrumentation."""
+        register_histogram(f"{prefix}_queue_depth", self.queue_depth)
+        register_histogram(f"{prefix}_batch_size", self.batch_sizes)
+        return self
@@ -1,30 +1,155 @@
 """
 Embedding model loader. Arabic-safe (multilingual model, preserves diacritics).
-embed(texts: list[str]) -> list[list[float]]
+embed(texts: list[str]) -> list[list[float]]; embed(texts, as_numpy=True) -> float32 matrix (n, dim).
+Embeddings are cached by (model, normalized-text hash); only cache misses reach the model,
+through the micro-batching EmbeddingService shared by all threads (EMBED_SERVICE=0: encode
+in the calling thread). EMBED_NORMALIZED=1 embeds the Arabic-normalized form of each text
+(src.parser.normalize), making vector search insensitive to diacritics and spelling variants.
+EMBEDDING_BACKEND=stub replaces the model with HashingEncoder (offline, deterministic; for
+benchmarks and tests, not for retrieval quality).
 """
 
-from typing import List
+import os
+import re
+import threading
+import zlib
+from typing import Any, List
+
+import numpy as np
+
+from src.embedding_cache import EmbeddingCache, default_cache_path, text_key
+from src.embedding_service import EmbeddingService
+from src.parser.normalize import embed_normalized, normalize_arabic
+
+# Multilingual model with Arabic support; preserves diacritics
+MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+STUB_DIM = 384
 
 # Lazy load to avoid slow import when not used
 _model = None
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+_service: EmbeddingService | None = None
+
+
+def _default_backend() -> str:
+    return os.environ.get("EMBEDDING_BACKEND", "sentence-transformers").strip().lower()
+
+
+class HashingEncoder:
+    """Stub model: bag of CRC32-hashed words in `dim` buckets. Same interface as SentenceTransformer.encode."""
+
+    _WORD = re.compile(r"\w+")
+
+    def __init__(self, dim: int = STUB_DIM):
+        self.dim = dim
+
+    def encode(self, texts: list[str], show_progress_bar: bool = False, normalize_embeddings: bool = False) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            buckets = [zlib.crc32(w.encode("utf-8")) % self.dim for w in self._WORD.findall(text.lower())]
+            out[i] = np.bincount(buckets, minlength=self.dim)
+        out[:, 0] += 0.01  # no all-zero vectors (cosine distance)
+        return out
+
+
+def model_key() -> str:
+    """Name embeddings are cached under: the model, or the stub encoder."""
+    return f"stub-hash-{STUB_DIM}" if _default_backend() == "stub" else MODEL_NAME
 
 
 def _get_model():
     global _model
+    if _default_backend() == "stub":
+        return _stub
     if _model is None:
         from sentence_transformers import SentenceTransformer
-        # Multilingual model with Arabic support; preserves diacritics
-        _model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+        _model = SentenceTransformer(MODEL_NAME)
     return _model
 
 
-def embed(texts: List[str]) -> List[List[float]]:
+_stub = HashingEncoder()
+
+
+def get_cache() -> EmbeddingCache:
+    """Process-wide embedding cache; re-created when EMBEDDING_CACHE_PATH changes."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.db_path != default_cache_path():
+            _cache = EmbeddingCache()
+        return _cache
+
+
+def _encode(texts: list[str]) -> np.ndarray:
+    encoded = _get_model().encode(texts, show_progress_bar=False, normalize_embeddings=False)
+    return np.asarray(encoded, dtype=np.float32)
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Process-wide embedding service in front of the model (histograms registered as embedding_*)."""
+    global _service
+    with _cache_lock:
+        if _service is None:
+            _service = EmbeddingService(_encode).register_metrics()
+        return _service
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the embedding cache."""
+    return get_cache().stats()
+
+
+def split_cached(texts: List[str]) -> tuple[list[str], dict[str, np.ndarray], dict[str, str]]:
+    """
+    Cache lookup for embed(): (keys, found, missing) with one key per text, the cached vectors
+    by key and the texts still to encode by key (duplicates once, in first-seen order).
+    """
+    if embed_normalized():
+        texts = [normalize_arabic(t) for t in texts]
+    keys = [text_key(t) for t in texts]
+    found = get_cache().get_many(model_key(), keys)
+    missing = {k: t for k, t in zip(keys, texts) if k not in found}
+    return keys, found, missing
+
+
+def merge_encoded(
+    keys: list[str],
+    found: dict[str, np.ndarray],
+    missing: dict[str, str],
+    encoded: Any,
+    as_numpy: bool = False,
+) -> List[List[float]] | np.ndarray:
+    """Cache the vectors encoded for split_cached()'s missing texts and assemble embed()'s result."""
+    if missing:
+        new = dict(zip(missing, encoded))
+        get_cache().put_many(model_key(), new)
+        found.update(new)
+    embeddings = np.stack([found[k] for k in keys]).astype(np.float32, copy=False)
+    if as_numpy:
+        return np.ascontiguousarray(embeddings)
+    return embeddings.tolist()
+
+
+def service_enabled() -> bool:
+    """Whether cache misses go through the shared EmbeddingService (EMBED_SERVICE, default on)."""
+    return os.environ.get("EMBED_SERVICE", "1").strip().lower() not in ("0", "off", "false", "no")
+
+
+def embed(texts: List[str], as_numpy: bool = False) -> List[List[float]] | np.ndarray:
     """
     Embed a list of texts. UTF-8 and Arabic diacritics preserved.
-    Returns list of embedding vectors.
+    Returns list of embedding vectors, or a contiguous float32 matrix when as_numpy=True
+    (no list-of-lists conversion; feeds src.rag.similarity directly).
+    Cached texts are not re-encoded; duplicates in one call are encoded once; order is kept.
     """
     if not texts:
-        return []
-    model = _get_model()
-    embeddings = model.encode(texts, show_progress_bar=False, normalize_embeddings=False)
-    return [e.tolist() for e in embeddings]
+        return np.zeros((0, 0), dtype=np.float32) if as_numpy else []
+    keys, found, missing = split_cached(texts)
+    encoded = None
+    if missing:
+        texts_to_encode = list(missing.values())
+        if service_enabled():
+            encoded = get_embedding_service().encode(texts_to_encode)
+        else:
+            encoded = _encode(texts_to_encode)
+    return merge_encoded(keys, found, missing, encoded, as_numpy)
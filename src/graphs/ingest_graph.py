@@ -1,20 +1,28 @@
 """
-LangGraph ingest graph: extract -> analyze -> chunk -> embed -> store_vector -> store_sql.
+LangGraph ingest graph: fingerprint -> extract -> analyze -> chunk -> embed -> store_vector -> store_sql
+-> store_graph -> store_raptor. Unchanged files (same size/mtime or content hash) short-circuit
+after fingerprint; changed files only embed and upsert new chunks (chunk-level diff).
 """
 
-import hashlib
 from pathlib import Path
 from typing import Any
 
 from langgraph.graph import StateGraph, END, START
 
 from src.graphs.state import IngestState
+from src.instrumentation import instrument_node
 from src.parser.extractors import extract as extract_doc
 from src.parser.analyzer import analyze_content
-from src.parser.chunkers import chunk_fixed, chunk_dynamic
+from src.parser.prepare import chunk_document, content_hash, document_id_for, file_stat
+from src.async_embeddings import aembed, offload, offloaded
 from src.embeddings import embed as embed_texts
-from src.storage.vector_store import VectorStore
+from src.storage.vector_store import chunk_ids, chunk_metadata, get_vector_store
 from src.storage.sql_store import SQLStore
+from src.storage.graph_store import GraphStore
+from src.storage.raptor_store import RaptorStore
+from src.rag.graph_rag import extract_chunk_entities, cooccurrence_edges
+from src.rag.raptor import build_raptor_tree_embedded
+from src.rag.similarity import as_matrix
 
 
 def _node_extract(state: IngestState) -> dict[str, Any]:
@@ -37,38 +45,58 @@ def _node_analyze(state: IngestState) -> dict[str, Any]:
 
 
 def _node_chunk(state: IngestState) -> dict[str, Any]:
-    raw_text = state["raw_text"]
-    strategy = state["strategy"]
-    params = state["params"]
-    pages_or_sections = state.get("pages_or_sections", [])
+    chunks = chunk_document(
+        state["raw_text"],
+        state.get("pages_or_sections", []),
+        state["strategy"],
+        state["params"],
+    )
+    return {"chunks": chunks}
 
-    if strategy == "dynamic":
-        chunks = chunk_dynamic(raw_text, pages_or_sections, params)
-    else:
-        chunks = chunk_fixed(raw_text, params)
 
-    return {"chunks": chunks}
+def existing_embeddings(state: IngestState) -> list[Any]:
+    """
+    Stored vectors of this document's chunks, aligned with state["chunks"] (None for chunks that
+    are new or changed). Lets re-ingest embed only what changed.
+    """
+    chunks = state["chunks"]
+    if not chunks:
+        return []
+    stored = {r["id"]: r["embedding"] for r in get_vector_store().get_by_document_ids([state["document_id"]])}
+    return [stored.get(cid) for cid in chunk_ids(state["document_id"], chunks)]
 
 
 def _node_embed(state: IngestState) -> dict[str, Any]:
+    """Embeddings as one float32 matrix (n_chunks, dim); stored vectors are reused, the rest embedded."""
+    chunks = state["chunks"]
+    rows: list[Any] = existing_embeddings(state)
+    missing = [i for i, e in enumerate(rows) if e is None]
+    if missing:
+        for i, e in zip(missing, embed_texts([chunks[i].get("text", "") for i in missing], as_numpy=True)):
+            rows[i] = e
+    return {"embeddings": as_matrix(rows), "reused_embeddings": len(chunks) - len(missing)}
+
+
+async def _anode_embed(state: IngestState) -> dict[str, Any]:
+    """Async embed node: missing chunks are embedded in micro-batches shared with concurrent requests."""
     chunks = state["chunks"]
-    texts = [c.get("text", "") for c in chunks]
-    embeddings = embed_texts(texts)
-    return {"embeddings": embeddings}
+    rows: list[Any] = await offload(existing_embeddings, state)
+    missing = [i for i, e in enumerate(rows) if e is None]
+    if missing:
+        for i, e in zip(missing, await aembed([chunks[i].get("text", "") for i in missing], as_numpy=True)):
+            rows[i] = e
+    return {"embeddings": as_matrix(rows), "reused_embeddings": len(chunks) - len(missing)}
 
 
 def _node_store_vector(state: IngestState) -> dict[str, Any]:
     document_id = state["document_id"]
     chunks = state["chunks"]
     embeddings = state["embeddings"]
-    store = VectorStore()
-    store.add_chunks(
-        chunks,
-        embeddings,
-        document_id=document_id,
-        metadata={"strategy": state.get("strategy", "")},
+    store = get_vector_store()
+    counts = store.sync_documents(
+        [(chunks, embeddings, document_id, {"strategy": state.get("strategy", "")})]
     )
-    return {}
+    return {"vector_sync": counts}
 
 
 def _node_store_sql(state: IngestState) -> dict[str, Any]:
@@ -77,6 +105,8 @@ def _node_store_sql(state: IngestState) -> dict[str, Any]:
     strategy = state.get("strategy", "")
     format_type = Path(path).suffix.lower() if path else ""
     store = SQLStore()
+    # No fingerprint yet: it is recorded by store_fingerprint once every store has succeeded, so a
+    # failed graph/RAPTOR build is redone by the next ingest instead of being skipped
     store.insert_document(document_id, path=path, format_type=format_type, strategy=strategy)
     chunks_for_sql = [
         {
@@ -84,6 +114,10 @@ def _node_store_sql(state: IngestState) -> dict[str, Any]:
             "start": c.get("start", 0),
             "end": c.get("end", 0),
             "metadata": {},
+            "content_hash": c.get("content_hash"),
+            # Indexed for BM25 with the vector store's metadata, so both filter alike
+            "text": c.get("text", ""),
+            "search_metadata": chunk_metadata(document_id, i, c, {"strategy": strategy}),
         }
         for i, c in enumerate(state["chunks"])
     ]
@@ -91,36 +125,137 @@ def _node_store_sql(state: IngestState) -> dict[str, Any]:
     return {}
 
 
-def _node_document_id(state: IngestState) -> dict[str, Any]:
-    """Set document_id from file path (hash) before store nodes."""
-    path = state.get("file_path", "")
-    h = hashlib.sha256(path.encode("utf-8")).hexdigest()[:16]
-    return {"document_id": h}
+def _node_store_graph(state: IngestState) -> dict[str, Any]:
+    """Extract entities once per document and persist its part of the Graph RAG graph."""
+    document_id = state["document_id"]
+    chunk_entities = extract_chunk_entities(state["chunks"])
+    GraphStore().save_document(document_id, chunk_entities, cooccurrence_edges(chunk_entities))
+    return {}
+
+
+def _node_store_raptor(state: IngestState) -> dict[str, Any]:
+    """Build the RAPTOR tree once per document (cluster, summarize, recurse) and persist it."""
+    chunks = state["chunks"]
+    if not chunks:
+        # A re-ingest to zero chunks must not keep serving the previous tree
+        RaptorStore().delete_document(state["document_id"])
+        return {}
+    nodes, node_embs = build_raptor_tree_embedded(chunks, state["embeddings"], embed_fn=embed_texts)
+    RaptorStore().save_tree(state["document_id"], nodes, node_embs)
+    return {}
+
 
+def _node_store_fingerprint(state: IngestState) -> dict[str, Any]:
+    """Last store node: record the content hash and size/mtime that let the next ingest skip the file."""
+    SQLStore().set_fingerprint(
+        state["document_id"], state.get("content_hash"), state.get("file_size"), state.get("file_mtime")
+    )
+    return {}
+
+
+def fingerprint_document(file_path: str, force: bool = False) -> dict[str, Any]:
+    """
+    document_id, size/mtime and content hash of a file, and whether it can be skipped:
+    same size and mtime as stored (no hashing), or same content hash (mtime is then refreshed).
+    """
+    document_id = document_id_for(file_path)
+    out: dict[str, Any] = {"document_id": document_id, **file_stat(file_path), "skipped": False}
+    stored = None if force else SQLStore().get_document_metadata(document_id)
+    if (
+        stored
+        and stored.get("content_hash")
+        and stored.get("file_size") == out["file_size"]
+        and stored.get("file_mtime") == out["file_mtime"]
+    ):
+        out.update(content_hash=stored["content_hash"], skipped=True, strategy=stored.get("strategy", ""))
+        return out
+    out["content_hash"] = content_hash(file_path)
+    if stored and stored.get("content_hash") == out["content_hash"]:
+        SQLStore().touch_document(document_id, out["file_size"], out["file_mtime"])
+        out.update(skipped=True, strategy=stored.get("strategy", ""))
+    return out
+
+
+def _node_fingerprint(state: IngestState) -> dict[str, Any]:
+    """Set document_id (path hash) and content fingerprint; mark unchanged documents as skipped."""
+    return fingerprint_document(state["file_path"], force=state.get("force", False))
+
+
+def _node_load_stored(state: IngestState) -> dict[str, Any]:
+    """Unchanged document: return its stored chunks instead of re-running extract/chunk/embed."""
+    rows = get_vector_store().get_by_document_ids([state["document_id"]])
+    chunks = [
+        {
+            "text": r["document"],
+            "start": r["metadata"].get("start", 0),
+            "end": r["metadata"].get("end", 0),
+            "index": r["metadata"].get("chunk_index", i),
+        }
+        for i, r in enumerate(rows)
+    ]
+    return {"chunks": chunks}
+
+
+def _route_after_fingerprint(state: IngestState) -> str:
+    return "load_stored" if state.get("skipped") else "extract"
 
-def build_ingest_graph():
-    """Build and compile the ingest StateGraph."""
+
+def store_document(state: IngestState, include_vectors: bool = True) -> None:
+    """
+    Run the store nodes outside the graph (used by batch ingest, which syncs vectors in bulk
+    itself and passes include_vectors=False).
+    """
+    if include_vectors:
+        _node_store_vector(state)
+    _node_store_sql(state)
+    _node_store_graph(state)
+    _node_store_raptor(state)
+    _node_store_fingerprint(state)
+
+
+def build_ingest_graph(asynchronous: bool = False):
+    """
+    Build and compile the ingest StateGraph. asynchronous=True builds the ainvoke variant:
+    blocking nodes run on the shared async pool and embed awaits the shared embedding service (aembed).
+    """
     graph = StateGraph(IngestState)
 
-    graph.add_node("extract", _node_extract)
-    graph.add_node("analyze", _node_analyze)
-    graph.add_node("chunk", _node_chunk)
-    graph.add_node("embed", _node_embed)
-    graph.add_node("document_id", _node_document_id)
-    graph.add_node("store_vector", _node_store_vector)
-    graph.add_node("store_sql", _node_store_sql)
+    def node(name: str, fn: Any) -> Any:
+        if not asynchronous:
+            return instrument_node(name, fn)
+        if name == "embed":
+            return instrument_node(name, _anode_embed)
+        # Instrumented inside the pool thread, so CPU time is the node's own
+        return offloaded(instrument_node(name, fn))
+
+    graph.add_node("fingerprint", node("fingerprint", _node_fingerprint))
+    graph.add_node("load_stored", node("load_stored", _node_load_stored))
+    graph.add_node("extract", node("extract", _node_extract))
+    graph.add_node("analyze", node("analyze", _node_analyze))
+    graph.add_node("chunk", node("chunk", _node_chunk))
+    graph.add_node("embed", node("embed", _node_embed))
+    graph.add_node("store_vector", node("store_vector", _node_store_vector))
+    graph.add_node("store_sql", node("store_sql", _node_store_sql))
+    graph.add_node("store_graph", node("store_graph", _node_store_graph))
+    graph.add_node("store_raptor", node("store_raptor", _node_store_raptor))
+    graph.add_node("store_fingerprint", node("store_fingerprint", _node_store_fingerprint))
 
-    graph.add_edge(START, "extract")
+    graph.add_edge(START, "fingerprint")
+    graph.add_conditional_edges("fingerprint", _route_after_fingerprint, ["load_stored", "extract"])
+    graph.add_edge("load_stored", END)
     graph.add_edge("extract", "analyze")
     graph.add_edge("analyze", "chunk")
-    graph.add_edge("chunk", "document_id")
-    graph.add_edge("document_id", "embed")
+    graph.add_edge("chunk", "embed")
     graph.add_edge("embed", "store_vector")
     graph.add_edge("store_vector", "store_sql")
-    graph.add_edge("store_sql", END)
+    graph.add_edge("store_sql", "store_graph")
+    graph.add_edge("store_graph", "store_raptor")
+    graph.add_edge("store_raptor", "store_fingerprint")
+    graph.add_edge("store_fingerprint", END)
 
     return graph.compile()
 
 
 # Compiled graph for pipeline use
 ingest_graph = build_ingest_graph()
+aingest_graph = build_ingest_graph(asynchronous=True)
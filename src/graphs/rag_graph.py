@@ -1,35 +1,86 @@
 """
-LangGraph RAG graph: query -> retrieve (vector + optional SQL filter) -> optional expand (Graph RAG/RAPTOR) -> optional generate (LLM).
+LangGraph RAG graph: query -> retrieve (vector, BM25 or hybrid; optional metadata filter) -> optional
+expand (Graph RAG/RAPTOR) -> optional generate (LLM).
 """
 
+import asyncio
 from typing import Any
 
 from langgraph.graph import StateGraph, END, START
 
 from src.graphs.state import RAGState
+from src.instrumentation import instrument_node
+from src.async_embeddings import aembed, offload
 from src.embeddings import embed
-from src.storage.vector_store import VectorStore
-from src.storage.sql_store import SQLStore
+from src.rag.hybrid import check_mode, lexical_many, reciprocal_rank_fusion, submit_lexical
+from src.storage.vector_store import get_vector_store
+
+
+def _vector_chunks(hits: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{"text": r["document"], "metadata": r["metadata"], "distance": r["distance"]} for r in hits]
+
+
+def retrieve_many(
+    queries: list[str],
+    top_k: int = 5,
+    filter_metadata: dict[str, Any] | None = None,
+    mode: str = "vector",
+) -> list[dict[str, Any]]:
+    """
+    Retrieve node for a batch of queries: one embed call and one vector store query for all.
+    mode "lexical" runs BM25 only (no embedding); "hybrid" runs BM25 on a background thread
+    while the queries are embedded and searched, then merges both with reciprocal-rank fusion.
+    Returns a {"chunks", "query_embedding"} update per query, in order (lexical: no embedding).
+    """
+    check_mode(mode)
+    if not queries:
+        return []
+    filter_metadata = filter_metadata or None
+    if mode == "lexical":
+        return [{"chunks": hits} for hits in lexical_many(list(queries), top_k, filter_metadata)]
+    lexical = submit_lexical(list(queries), top_k, filter_metadata) if mode == "hybrid" else None
+    query_embeddings = embed(list(queries))
+    results = get_vector_store().query_many(query_embeddings, top_k=top_k, filter_metadata=filter_metadata)
+    updates = [
+        {"chunks": _vector_chunks(hits), "query_embedding": query_embedding}
+        for hits, query_embedding in zip(results, query_embeddings)
+    ]
+    if lexical is not None:
+        for update, hits in zip(updates, lexical.result()):
+            update["chunks"] = reciprocal_rank_fusion([update["chunks"], hits], top_k)
+    return updates
 
 
 def _node_retrieve(state: RAGState) -> dict[str, Any]:
-    query = state["query"]
+    return retrieve_many(
+        [state["query"]], state.get("top_k", 5), state.get("filter_metadata"), state.get("retrieval_mode", "vector")
+    )[0]
+
+
+async def _avector(query: str, top_k: int, filter_metadata: dict[str, Any] | None) -> dict[str, Any]:
+    query_embedding = (await aembed([query]))[0]
+    hits = await offload(get_vector_store().query, query_embedding, top_k, filter_metadata)
+    return {"chunks": _vector_chunks(hits), "query_embedding": query_embedding}
+
+
+async def _anode_retrieve(state: RAGState) -> dict[str, Any]:
+    """
+    Async retrieve: the query embedding joins concurrent requests' micro-batch; vector and BM25
+    searches run on the pool (concurrently in hybrid mode).
+    """
+    mode = check_mode(state.get("retrieval_mode", "vector"))
     top_k = state.get("top_k", 5)
-    filter_metadata = state.get("filter_metadata") or {}
-
-    query_embedding = embed([query])[0]
-    store = VectorStore()
-    results = store.query(query_embedding, top_k=top_k, filter_metadata=filter_metadata or None)
-
-    chunks = [
-        {
-            "text": r["document"],
-            "metadata": r["metadata"],
-            "distance": r["distance"],
-        }
-        for r in results
-    ]
-    return {"chunks": chunks, "query_embedding": query_embedding}
+    filter_metadata = state.get("filter_metadata") or None
+    if mode == "lexical":
+        return {"chunks": (await offload(lexical_many, [state["query"]], top_k, filter_metadata))[0]}
+    if mode == "vector":
+        return await _avector(state["query"], top_k, filter_metadata)
+    update, lexical = await asyncio.gather(
+        _avector(state["query"], top_k, filter_metadata),
+        offload(lexical_many, [state["query"]], top_k, filter_metadata),
+    )
+    update["chunks"] = reciprocal_rank_fusion([update["chunks"], lexical[0]], top_k)
+    return update
 
 
 def _node_expand_graph_raptor(state: RAGState) -> dict[str, Any]:
@@ -37,22 +88,37 @@ def _node_expand_graph_raptor(state: RAGState) -> dict[str, Any]:
     return {}
 
 
-def _node_generate(state: RAGState) -> dict[str, Any]:
-    """Optional: LLM answer from retrieved context. Placeholder when no API key."""
-    chunks = state.get("chunks", [])
+def generate_answer(chunks: list[dict[str, Any]]) -> str:
+    """Answer from retrieved context. Placeholder when no API key."""
     context = "\n\n".join(c.get("text", "") for c in chunks)[:4000]
     # Placeholder: no LLM call unless OPENAI_API_KEY etc. is set
-    answer = f"[Retrieved {len(chunks)} chunk(s). Context length: {len(context)} chars. Set OPENAI_API_KEY for LLM answer.]"
-    return {"answer": answer}
+    return f"[Retrieved {len(chunks)} chunk(s). Context length: {len(context)} chars. Set OPENAI_API_KEY for LLM answer.]"
+
+
+def _node_generate(state: RAGState) -> dict[str, Any]:
+    """Optional: LLM answer from retrieved context."""
+    return {"answer": generate_answer(state.get("chunks", []))}
+
+
+# Cheap nodes run inline on the event loop in the async graph (no executor hop)
+async def _anode_expand_graph_raptor(state: RAGState) -> dict[str, Any]:
+    return _node_expand_graph_raptor(state)
+
+
+async def _anode_generate(state: RAGState) -> dict[str, Any]:
+    return _node_generate(state)
 
 
-def build_rag_graph(include_llm: bool = False):
-    """Build and compile the RAG StateGraph."""
+def build_rag_graph(include_llm: bool = False, asynchronous: bool = False):
+    """Build and compile the RAG StateGraph (asynchronous=True: retrieve is a coroutine, for ainvoke)."""
     graph = StateGraph(RAGState)
 
-    graph.add_node("retrieve", _node_retrieve)
-    graph.add_node("expand_graph_raptor", _node_expand_graph_raptor)
-    graph.add_node("generate", _node_generate)
+    graph.add_node("retrieve", instrument_node("retrieve", _anode_retrieve if asynchronous else _node_retrieve))
+    graph.add_node(
+        "expand_graph_raptor",
+        instrument_node("expand_graph_raptor", _anode_expand_graph_raptor if asynchronous else _node_expand_graph_raptor),
+    )
+    graph.add_node("generate", instrument_node("generate", _anode_generate if asynchronous else _node_generate))
 
     graph.add_edge(START, "retrieve")
     graph.add_edge("retrieve", "expand_graph_raptor")
@@ -67,3 +133,4 @@ def build_rag_graph(include_llm: bool = False):
 
 # Default: no LLM node in main path; pipeline can add answer separately
 rag_graph = build_rag_graph(include_llm=True)
+arag_graph = build_rag_graph(include_llm=True, asynchronous=True)
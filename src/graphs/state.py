@@ -12,8 +12,15 @@ class IngestState(TypedDict, total=False):
     strategy: str
     params: dict[str, Any]
     chunks: list[dict[str, Any]]
-    embeddings: list[list[float]]
+    embeddings: Any  # float32 matrix (n_chunks, dim)
     document_id: str
+    force: bool
+    skipped: bool
+    content_hash: str
+    file_size: int
+    file_mtime: float
+    reused_embeddings: int
+    vector_sync: dict[str, int]
 
 
 class RAGState(TypedDict, total=False):
@@ -21,5 +28,6 @@ class RAGState(TypedDict, total=False):
     query_embedding: list[float]
     top_k: int
     filter_metadata: dict[str, Any]
+    retrieval_mode: str  # "vector" (default), "hybrid" or "lexical"
     chunks: list[dict[str, Any]]
     answer: str
@@ -0,0 +1,319 @@
+"""
+Per-node instrumentation for the ingest and RAG graphs (INSTRUMENTATION=0|1|memory).
+instrument_node() wraps a LangGraph node and span() a block of code; each records wall time,
+CPU time of the running thread, process peak RSS, item counts and, with "memory", the
+tracemalloc delta and peak. Spans land in the recording() of the current run (returned in the
+final state as "metrics") and in a process-wide registry exported with to_json()/to_prometheus().
+Counters (incr), gauges and histograms are always on. When disabled, a wrapped node costs one flag check.
+"""
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None  # type: ignore[assignment]
+
+_ITEM_KEYS = ("chunks", "embeddings", "pages_or_sections")
+
+
+def _default_mode() -> str:
+    return os.environ.get("INSTRUMENTATION", "0").strip().lower()
+
+
+class _Config:
+    enabled = False
+    memory = False
+    started_tracemalloc = False
+
+
+_config = _Config()
+_current: contextvars.ContextVar["Recording | None"] = contextvars.ContextVar("instrumentation_recording", default=None)
+_parents: contextvars.ContextVar[tuple[list[int] | None, ...]] = contextvars.ContextVar("instrumentation_parents", default=())
+_lock = threading.Lock()
+_totals: dict[str, dict[str, float]] = {}
+_counters: dict[str, float] = {}
+_gauges: dict[str, Callable[[], float]] = {}
+_histograms: dict[str, "Histogram"] = {}
+
+
+def configure(mode: str | None = None) -> None:
+    """Set the mode: "0"/"off", "1"/"on" (time, CPU, RSS, items) or "memory" (adds tracemalloc)."""
+    mode = _default_mode() if mode is None else str(mode).strip().lower()
+    _config.enabled = mode not in ("", "0", "off", "false", "no")
+    _config.memory = mode == "memory"
+    if _config.memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _config.started_tracemalloc = True
+    elif not _config.memory and _config.started_tracemalloc:
+        # Tracing slows every allocation; stop it if memory mode started it
+        tracemalloc.stop()
+        _config.started_tracemalloc = False
+
+
+def enabled() -> bool:
+    return _config.enabled
+
+
+def _peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def count_items(value: Any) -> int | None:
+    """Items in a node update: length of its chunks/embeddings/pages (first present), else None."""
+    if isinstance(value, dict):
+        for key in _ITEM_KEYS:
+            if value.get(key) is not None:
+                return len(value[key])
+        return None
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+class Recording:
+    """Spans of one run, in completion order."""
+
+    def __init__(self) -> None:
+        self.spans: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"spans": list(self.spans), "wall": sum(s["wall"] for s in self.spans if not s.get("nested"))}
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[Recording | None]:
+    """Collect the spans of the enclosed run (None when instrumentation is disabled)."""
+    if not _config.enabled:
+        yield None
+        return
+    rec = Recording()
+    token = _current.set(rec)
+    try:
+        yield rec
+    finally:
+        _current.reset(token)
+
+
+class Span:
+    """Mutable handle yielded by span(): set .items when the count is known only at the end."""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: int | None):
+        self.items = items
+
+
+@contextlib.contextmanager
+def _measure(name: str, items: int | None) -> Iterator[Span]:
+    handle = Span(items)
+    # Enclosing spans live in context variables, so they follow asyncio tasks and offloaded calls
+    parents = _parents.get()
+    frame = None
+    if _config.memory and tracemalloc.is_tracing():
+        mem_start, outer_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        frame = [mem_start, outer_peak]
+    token = _parents.set(parents + (frame,))
+    wall0, cpu0 = time.perf_counter(), time.thread_time()
+    try:
+        yield handle
+    finally:
+        wall, cpu = time.perf_counter() - wall0, time.thread_time() - cpu0
+        _parents.reset(token)
+        span: dict[str, Any] = {"name": name, "wall": wall, "cpu": cpu, "items": handle.items, "peak_rss": _peak_rss_bytes()}
+        if parents:
+            span["nested"] = True
+        if frame is not None:
+            mem_start, carried = frame
+            current, peak = tracemalloc.get_traced_memory()
+            # Nested spans reset the tracemalloc peak; their parents keep the max seen so far
+            peak = max(peak, carried)
+            span["mem_delta"] = current - mem_start
+            span["mem_peak"] = peak - mem_start
+            if parents and parents[-1] is not None:
+                parents[-1][1] = max(parents[-1][1], peak)
+        rec = _current.get()
+        if rec is not None:
+            rec.add(span)
+        _record_totals(span)
+
+
+def span(name: str, items: int | None = None) -> contextlib.AbstractContextManager[Span]:
+    """Time a block: `with span("raptor") as s: ...; s.items = n`. A no-op when disabled."""
+    if not _config.enabled:
+        return contextlib.nullcontext(Span(items))
+    return _measure(name, items)
+
+
+def instrument_node(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a graph node; items are counted from the update it returns. Coroutine nodes get an
+    async wrapper (their CPU time is that of the event loop thread, other tasks included).
+    """
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def anode(state: Any, *args: Any, **kwargs: Any) -> Any:
+            if not _config.enabled:
+                return await fn(state, *args, **kwargs)
+            with _measure(name, None) as s:
+                out = await fn(state, *args, **kwargs)
+                s.items = count_items(out)
+            return out
+
+        return anode
+
+    @functools.wraps(fn)
+    def node(state: Any, *args: Any, **kwargs: Any) -> Any:
+        if not _config.enabled:
+            return fn(state, *args, **kwargs)
+        with _measure(name, None) as s:
+            out = fn(state, *args, **kwargs)
+            s.items = count_items(out)
+        return out
+
+    return node
+
+
+def _record_totals(span: dict[str, Any]) -> None:
+    with _lock:
+        t = _totals.setdefault(span["name"], {"calls": 0, "wall": 0.0, "cpu": 0.0, "items": 0, "peak_rss": 0, "mem_peak": 0})
+        t["calls"] += 1
+        t["wall"] += span["wall"]
+        t["cpu"] += span["cpu"]
+        t["items"] += span["items"] or 0
+        t["peak_rss"] = max(t["peak_rss"], span["peak_rss"] or 0)
+        t["mem_peak"] = max(t["mem_peak"], span.get("mem_peak", 0))
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Add to a process-wide counter (recorded whether or not spans are enabled)."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style); thread-safe."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict[str, Any]:
+        """{"buckets": [(upper bound, cumulative count)], "sum", "count"}; the last bound is "+Inf"."""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, out = 0, []
+        for bound, n in zip((*self.buckets, "+Inf"), counts):
+            cumulative += n
+            out.append((bound, cumulative))
+        return {"buckets": out, "sum": total, "count": cumulative}
+
+
+def register_histogram(name: str, histogram: Histogram) -> None:
+    """Expose a histogram in snapshot() and to_prometheus() (replaces one of the same name)."""
+    with _lock:
+        _histograms[name] = histogram
+
+
+def register_gauge(name: str, fn: Callable[[], float]) -> None:
+    """Expose a value read at export time (e.g. a cache hit rate) in snapshot() and to_prometheus()."""
+    with _lock:
+        _gauges[name] = fn
+
+
+def snapshot() -> dict[str, Any]:
+    """Process-wide totals per span name, counters since start or the last reset(), gauges and histograms."""
+    with _lock:
+        out = {"spans": {k: dict(v) for k, v in _totals.items()}, "counters": dict(_counters)}
+        gauges = dict(_gauges)
+        histograms = dict(_histograms)
+    out["gauges"] = {name: fn() for name, fn in gauges.items()}
+    out["histograms"] = {name: h.snapshot() for name, h in histograms.items()}
+    return out
+
+
+def reset() -> None:
+    with _lock:
+        _totals.clear()
+        _counters.clear()
+
+
+def to_json(metrics: dict[str, Any] | None = None, **kwargs: Any) -> str:
+    """JSON of a run's metrics (state["metrics"]) or, by default, of snapshot()."""
+    return json.dumps(snapshot() if metrics is None else metrics, **kwargs)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric_name(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in name)
+
+
+def to_prometheus(prefix: str = "rag") -> str:
+    """snapshot() in the Prometheus text exposition format."""
+    snap = snapshot()
+    series = (
+        ("node_calls_total", "counter", "Node executions", "calls"),
+        ("node_seconds_total", "counter", "Wall time spent in the node", "wall"),
+        ("node_cpu_seconds_total", "counter", "CPU time of the thread running the node", "cpu"),
+        ("node_items_total", "counter", "Items (chunks, embeddings, pages) produced by the node", "items"),
+        ("node_peak_rss_bytes", "gauge", "Process peak RSS observed after the node", "peak_rss"),
+        ("node_tracemalloc_peak_bytes", "gauge", "Largest tracemalloc peak within the node", "mem_peak"),
+    )
+    lines: list[str] = []
+    for metric, kind, help_text, key in series:
+        lines.append(f"# HELP {prefix}_{metric} {help_text}")
+        lines.append(f"# TYPE {prefix}_{metric} {kind}")
+        for name, t in sorted(snap["spans"].items()):
+            lines.append(f'{prefix}_{metric}{{node="{_label(name)}"}} {t[key]}')
+    for name, value in sorted(snap["counters"].items()):
+        metric = f"{prefix}_{_metric_name(name)}"
+        metric = metric if metric.endswith("_total") else metric + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, value in sorted(snap["gauges"].items()):
+        metric = f"{prefix}_{_metric_name(name)}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    for name, hist in sorted(snap["histograms"].items()):
+        metric = f"{prefix}_{_metric_name(name)}"
+        lines.append(f"# TYPE {metric} histogram")
+        for bound, count in hist["buckets"]:
+            le = bound if isinstance(bound, str) else f"{bound:g}"
+            lines.append(f'{metric}_bucket{{le="{le}"}} {count}')
+        lines.append(f"{metric}_sum {hist['sum']}")
+        lines.append(f"{metric}_count {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+configure()
@@ -1,5 +1,14 @@
-from src.parser.extractors import get_extractor, extract
+from src.parser.extractors import get_extractor, extract, iter_sections
 from src.parser.analyzer import analyze_content
-from src.parser.chunkers import chunk_fixed, chunk_dynamic
+from src.parser.chunkers import chunk_fixed, chunk_dynamic, iter_chunks_fixed, iter_chunks_dynamic
 
-__all__ = ["get_extractor", "extract", "analyze_content", "chunk_fixed", "chunk_dynamic"]
+__all__ = [
+    "get_extractor",
+    "extract",
+    "iter_sections",
+    "analyze_content",
+    "chunk_fixed",
+    "chunk_dynamic",
+    "iter_chunks_fixed",
+    "iter_chunks_dynamic",
+]
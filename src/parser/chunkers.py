@@ -1,125 +1,130 @@
 """
 Fixed and dynamic chunking. Preserves UTF-8 and Arabic diacritics.
 Returns list of {"text", "start", "end", "index"}.
+iter_chunks_fixed / iter_chunks_dynamic consume an iterator of sections (pages or paragraphs,
+as dicts with "text" or plain strings) and yield chunks as soon as they are complete; memory is
+bounded by one section plus the current chunk. Offsets refer to the sections joined with "\n\n"
+(the raw_text of a PDF).
 """
 
 import re
-from typing import Any
+from typing import Any, Iterable, Iterator
 
+_SENTENCE_END = re.compile(r"(?<=[.!?\u061F\u06D4])\s+|\n+")
 
-def chunk_fixed(text: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+
+def _section_texts(sections: Iterable[dict[str, Any] | str]) -> Iterator[str]:
+    for sec in sections:
+        yield (sec if isinstance(sec, str) else sec.get("text", "")) or ""
+
+
+def _sentences(sections: Iterable[dict[str, Any] | str]) -> Iterator[tuple[str, int, int]]:
+    """(sentence, start, end) over the "\n\n"-joined sections, split like chunk_fixed always did."""
+    offset = 0
+    for text in _section_texts(sections):
+        pos = 0
+        for m in [*_SENTENCE_END.finditer(text), None]:
+            stop = m.start() if m is not None else len(text)
+            raw = text[pos:stop]
+            sent = raw.strip()
+            if sent:
+                start = offset + pos + len(raw) - len(raw.lstrip())
+                yield sent, start, start + len(sent)
+            if m is not None:
+                pos = m.end()
+        offset += len(text) + 2
+
+
+def iter_chunks_fixed(sections: Iterable[dict[str, Any] | str], params: dict[str, Any]) -> Iterator[dict[str, Any]]:
     """
-    Fixed-size chunking with overlap. Sentence-boundary aware where possible.
+    Fixed-size chunking with overlap over a stream of sections. Sentence-boundary aware.
     Preserves diacritics and UTF-8.
     """
     chunk_size = params.get("chunk_size", 512) * 4  # approx chars (4 chars per token)
     overlap = params.get("overlap", 50) * 4
-    min_chunk = params.get("min_chunk_chars", 50) or 50
-
-    text = text.strip()
-    if not text:
-        return []
-
-    # Split into sentences (keep Arabic and diacritics)
-    sentence_end = re.compile(r"(?<=[.!?\u061F\u06D4])\s+|\n+")
-    parts = sentence_end.split(text)
-    sentences = [p.strip() for p in parts if p.strip()]
-
-    if not sentences:
-        # Fallback: raw sliding window
-        chunks = []
-        start = 0
-        idx = 0
-        while start < len(text):
-            end = min(start + chunk_size, len(text))
-            chunk_text = text[start:end]
-            if len(chunk_text.strip()) >= min_chunk:
-                chunks.append({"text": chunk_text, "start": start, "end": end, "index": idx})
-                idx += 1
-            start = end - overlap if end < len(text) else len(text)
-        return chunks
-
-    chunks: list[dict[str, Any]] = []
-    current: list[str] = []
+
+    current: list[tuple[str, int, int]] = []
     current_len = 0
-    char_start = 0
     idx = 0
-
-    for i, sent in enumerate(sentences):
+    for sent, start, end in _sentences(sections):
         sent_len = len(sent) + 1
         if current_len + sent_len > chunk_size and current:
-            chunk_text = " ".join(current)
-            char_end = char_start + len(chunk_text)
-            chunks.append({"text": chunk_text, "start": char_start, "end": char_end, "index": idx})
+            yield {"text": " ".join(s for s, _, _ in current), "start": current[0][1], "end": current[-1][2], "index": idx}
             idx += 1
             # Overlap: keep last few sentences
             overlap_len = 0
-            overlap_sents: list[str] = []
-            for s in reversed(current):
-                if overlap_len + len(s) <= overlap:
-                    overlap_sents.append(s)
-                    overlap_len += len(s) + 1
+            overlap_sents: list[tuple[str, int, int]] = []
+            for item in reversed(current):
+                if overlap_len + len(item[0]) <= overlap:
+                    overlap_sents.append(item)
+                    overlap_len += len(item[0]) + 1
                 else:
                     break
             current = list(reversed(overlap_sents))
-            current_len = sum(len(s) for s in current) + len(current) - 1
-            char_start = char_end - current_len - 1
-        current.append(sent)
+            current_len = sum(len(s) for s, _, _ in current) + len(current) - 1
+        current.append((sent, start, end))
         current_len += sent_len
 
     if current:
-        chunk_text = " ".join(current)
-        char_end = char_start + len(chunk_text)
-        chunks.append({"text": chunk_text, "start": char_start, "end": char_end, "index": idx})
+        yield {"text": " ".join(s for s, _, _ in current), "start": current[0][1], "end": current[-1][2], "index": idx}
 
-    return chunks
+
+def chunk_fixed(text: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Fixed-size chunking with overlap. Sentence-boundary aware where possible.
+    Preserves diacritics and UTF-8.
+    """
+    return list(iter_chunks_fixed([text], params))
 
 
-def chunk_dynamic(
-    text: str,
-    structure: list[dict[str, Any]],
-    params: dict[str, Any],
-) -> list[dict[str, Any]]:
+def iter_chunks_dynamic(sections: Iterable[dict[str, Any] | str], params: dict[str, Any]) -> Iterator[dict[str, Any]]:
     """
-    Dynamic chunking using section boundaries (e.g. pages_or_sections).
-    Preserves diacritics and UTF-8. May merge small sections up to max_chunk_chars.
+    Dynamic chunking over a stream of sections: merge consecutive sections up to
+    max_chunk_chars; chunks shorter than min_chunk_chars are dropped.
     """
     min_chunk = params.get("min_chunk_chars", 100) or 100
     max_chunk = params.get("max_chunk_chars", 1500) or 1500
 
-    if not structure:
-        return chunk_fixed(text, {"chunk_size": max_chunk // 4, "overlap": 0, "min_chunk_chars": min_chunk})
-
-    sections = [s.get("text", "") or "" for s in structure if s.get("text")]
-    if not sections:
-        return chunk_fixed(text, {"chunk_size": max_chunk // 4, "overlap": 0, "min_chunk_chars": min_chunk})
-
-    chunks: list[dict[str, Any]] = []
     current: list[str] = []
     current_len = 0
     char_start = 0
     idx = 0
     pos = 0
 
-    for sec in sections:
-        sec_len = len(sec) + 2
-        if current_len + sec_len > max_chunk and current:
-            chunk_text = "\n\n".join(current)
-            char_end = char_start + len(chunk_text)
-            if len(chunk_text.strip()) >= min_chunk:
-                chunks.append({"text": chunk_text, "start": char_start, "end": char_end, "index": idx})
-                idx += 1
-            current = []
-            current_len = 0
-            char_start = pos
-        current.append(sec.strip())
-        current_len += sec_len
+    for sec in _section_texts(sections):
+        if sec:
+            sec_len = len(sec) + 2
+            if current_len + sec_len > max_chunk and current:
+                chunk_text = "\n\n".join(current)
+                if len(chunk_text.strip()) >= min_chunk:
+                    yield {"text": chunk_text, "start": char_start, "end": char_start + len(chunk_text), "index": idx}
+                    idx += 1
+                current = []
+                current_len = 0
+            if not current:
+                char_start = pos
+            current.append(sec.strip())
+            current_len += sec_len
         pos += len(sec) + 2
 
     if current:
         chunk_text = "\n\n".join(current)
-        char_end = char_start + len(chunk_text)
         if len(chunk_text.strip()) >= min_chunk:
-            chunks.append({"text": chunk_text, "start": char_start, "end": char_end, "index": idx})
+            yield {"text": chunk_text, "start": char_start, "end": char_start + len(chunk_text), "index": idx}
+
+
+def chunk_dynamic(
+    text: str,
+    structure: list[dict[str, Any]],
+    params: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """
+    Dynamic chunking using section boundaries (e.g. pages_or_sections).
+    Preserves diacritics and UTF-8. May merge small sections up to max_chunk_chars.
+    """
+    min_chunk = params.get("min_chunk_chars", 100) or 100
+    max_chunk = params.get("max_chunk_chars", 1500) or 1500
 
-    return chunks
+    if not any(s.get("text") for s in structure or []):
+        return chunk_fixed(text, {"chunk_size": max_chunk // 4, "overlap": 0, "min_chunk_chars": min_chunk})
+    return list(iter_chunks_dynamic(structure, params))
@@ -1,8 +1,9 @@
 """Document extractors: PDF, DOCX, TXT. UTF-8, preserve diacritics."""
 
 from pathlib import Path
+from typing import Any, Iterator
 
-from src.parser.extractors.pdf_extractor import extract as extract_pdf
+from src.parser.extractors.pdf_extractor import extract as extract_pdf, iter_pages as iter_pdf_pages
 from src.parser.extractors.docx_extractor import extract as extract_docx
 from src.parser.extractors.txt_extractor import extract as extract_txt
 
@@ -24,12 +25,27 @@ def get_extractor(extension: str):
     raise ValueError(f"Unsupported extension: {extension}. Use .pdf, .docx, or .txt.")
 
 
-def extract(path: str | Path) -> dict:
-    """Dispatch to the appropriate extractor based on file path."""
+def extract(path: str | Path, workers: int | None = None) -> dict:
+    """Dispatch to the appropriate extractor based on file path. workers is passed to PDF extraction."""
     path = Path(path)
     ext = path.suffix
     extractor = get_extractor(ext)
+    if extractor is extract_pdf:
+        return extractor(path, workers=workers)
     return extractor(path)
 
 
-__all__ = ["get_extractor", "extract", "extract_pdf", "extract_docx", "extract_txt"]
+def iter_sections(path: str | Path, workers: int | None = None) -> Iterator[dict[str, Any]]:
+    """
+    Yield pages_or_sections one at a time. PDFs are streamed page by page (in parallel with
+    workers > 1); DOCX/TXT are small enough to extract at once and are yielded from the result.
+    raw_text equals the section texts joined with "\n\n" for PDFs.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".pdf":
+        yield from iter_pdf_pages(path, workers=workers)
+    else:
+        yield from get_extractor(path.suffix)(path)["pages_or_sections"]
+
+
+__all__ = ["get_extractor", "extract", "iter_sections", "extract_pdf", "iter_pdf_pages", "extract_docx", "extract_txt"]
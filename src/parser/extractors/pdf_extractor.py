@@ -1,33 +1,97 @@
-"""PDF text extraction. UTF-8, preserves Arabic diacritics (harakat)."""
+"""
+PDF text extraction. UTF-8, preserves Arabic diacritics (harakat).
+iter_pages() yields pages one at a time; with workers > 1 the page range is split into blocks
+extracted by separate processes (each with its own PdfReader) and yielded in page order.
+"""
 
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 from pypdf import PdfReader
 
 
-def extract(path: str | Path) -> dict[str, Any]:
-    """
-    Extract text from a PDF file.
-    Returns: {"raw_text": str, "pages_or_sections": list[dict]} with page-level structure.
-    Preserves UTF-8 and Arabic diacritics.
-    """
+def _default_workers() -> int:
+    return int(os.environ.get("PDF_WORKERS", "1"))
+
+
+def _default_block_pages() -> int:
+    return int(os.environ.get("PDF_BLOCK_PAGES", "16"))
+
+
+def _check_path(path: str | Path) -> Path:
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"PDF not found: {path}")
     if path.suffix.lower() != ".pdf":
         raise ValueError(f"Expected .pdf file, got {path.suffix}")
+    return path
 
-    reader = PdfReader(str(path))
-    pages_or_sections: list[dict[str, Any]] = []
-    raw_parts: list[str] = []
 
-    for i, page in enumerate(reader.pages):
+def _page_range(reader: PdfReader, start: int, stop: int | None) -> Iterator[dict[str, Any]]:
+    for i in range(start, min(stop if stop is not None else len(reader.pages), len(reader.pages))):
         # get_extract_text returns str; ensure we don't lose encoding
-        text = page.extract_text() or ""
+        text = reader.pages[i].extract_text() or ""
         # Preserve as-is for UTF-8 and diacritics
-        raw_parts.append(text)
-        pages_or_sections.append({"page": i + 1, "text": text})
+        yield {"page": i + 1, "text": text}
+
+
+def extract_page_range(path: str | Path, start: int, stop: int) -> list[dict[str, Any]]:
+    """Pages [start, stop) of a PDF with a fresh PdfReader (worker entry point; must stay top-level)."""
+    return list(_page_range(PdfReader(str(path)), start, stop))
 
-    raw_text = "\n\n".join(raw_parts)
+
+def iter_pages(
+    path: str | Path,
+    workers: int | None = None,
+    block_pages: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield {"page": n, "text": str} in page order without holding the whole document.
+    workers > 1 extracts blocks of `block_pages` pages in a process pool; at most two blocks
+    per worker are in flight, so memory stays bounded by the window, not the page count.
+    """
+    path = _check_path(path)
+    workers = _default_workers() if workers is None else workers
+    block_pages = max(1, block_pages or _default_block_pages())
+    reader = PdfReader(str(path))
+    n_pages = len(reader.pages)
+    if workers <= 1 or n_pages <= block_pages:
+        yield from _page_range(reader, 0, None)
+        return
+    del reader
+
+    blocks = [(start, min(start + block_pages, n_pages)) for start in range(0, n_pages, block_pages)]
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(blocks)), mp_context=ctx) as pool:
+        pending: deque = deque()
+        todo = iter(blocks)
+        for start, stop in todo:
+            pending.append(pool.submit(extract_page_range, str(path), start, stop))
+            if len(pending) >= 2 * workers:
+                break
+        try:
+            while pending:
+                pages = pending.popleft().result()
+                nxt = next(todo, None)
+                if nxt is not None:
+                    pending.append(pool.submit(extract_page_range, str(path), *nxt))
+                yield from pages
+        finally:
+            # Consumer stopped early (or a block failed): drop blocks not started yet
+            for fut in pending:
+                fut.cancel()
+
+
+def extract(path: str | Path, workers: int | None = None) -> dict[str, Any]:
+    """
+    Extract text from a PDF file.
+    Returns: {"raw_text": str, "pages_or_sections": list[dict]} with page-level structure.
+    Preserves UTF-8 and Arabic diacritics. workers > 1 (default: PDF_WORKERS) extracts pages in parallel.
+    """
+    pages_or_sections = list(iter_pages(path, workers=workers))
+    raw_text = "\n\n".join(p["text"] for p in pages_or_sections)
     return {"raw_text": raw_text, "pages_or_sections": pages_or_sections}
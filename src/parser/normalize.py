@@ -0,0 +1,57 @@
+"""
+Arabic normalization for search (the BM25 index and, with EMBED_NORMALIZED=1, embeddings).
+Stored chunk text is never modified; the same functions are applied at ingest and to queries,
+so both sides match. normalize_arabic() applies a translation table built at import:
+tashkeel/Quranic marks and tatweel removed; alef forms (أ إ آ ٱ) -> ا; hamza carriers ؤ -> و,
+ئ -> ي; ta marbuta ة -> ه; alef maqsura ى -> ي; Persian yeh/kaf -> ي/ك.
+"""
+
+import os
+import re
+
+_DELETE = [
+    *range(0x0610, 0x061B),  # honorific and Quranic signs
+    *range(0x064B, 0x0660),  # harakat: fathatan .. wavy hamza below
+    0x0670,  # superscript alef
+    *range(0x06D6, 0x06DD),  # Quranic small high ligatures
+    *range(0x06DF, 0x06E9),
+    *range(0x06EA, 0x06EE),
+    0x0640,  # tatweel
+]
+_REPLACE = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ٲ": "ا", "ٳ": "ا",
+    "ؤ": "و", "ئ": "ي",
+    "ة": "ه",
+    "ى": "ي", "ی": "ي", "ک": "ك",
+}
+# (char, replacement) pairs. One str.replace pass per character present is several times faster
+# than str.translate, which takes a per-character slow path on non-ASCII text.
+_TABLE = tuple((chr(c), "") for c in _DELETE) + tuple(_REPLACE.items())
+
+_ARTICLE = re.compile(r"\b(?:وال|بال|كال|فال|لل|ال)(?=\w\w)")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_arabic(text: str) -> str:
+    """Diacritic- and spelling-variant-insensitive form of text (ASCII text is returned as is)."""
+    if not text or text.isascii():
+        return text or ""
+    for char, replacement in _TABLE:
+        if char in text:
+            text = text.replace(char, replacement)
+    return text
+
+
+def lexical_text(text: str) -> str:
+    """Text as indexed for BM25: normalize_arabic, case folded, definite-article prefixes stripped."""
+    return _ARTICLE.sub("", normalize_arabic(text).casefold())
+
+
+def lexical_terms(text: str) -> list[str]:
+    """Distinct terms of lexical_text(text), in order of first occurrence."""
+    return list(dict.fromkeys(_TOKEN.findall(lexical_text(text))))
+
+
+def embed_normalized() -> bool:
+    """EMBED_NORMALIZED=1: embed normalize_arabic(text) (chunks and queries) instead of the text as written."""
+    return os.environ.get("EMBED_NORMALIZED", "0").strip().lower() in ("1", "on", "true", "yes")
@@ -0,0 +1,152 @@
+"""
+CPU-only document preparation shared by the ingest graph and batch ingest:
+extract -> analyze -> chunk -> document_id, plus content fingerprints (file and chunk hashes)
+for incremental re-ingest. stream_document() is the bounded-memory variant: sections are
+chunked as they are extracted. Imports only the parser (cheap in worker processes).
+"""
+
+import hashlib
+import itertools
+import os
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from src.parser.extractors import extract as extract_doc, iter_sections
+from src.parser.analyzer import analyze_content
+from src.parser.chunkers import chunk_dynamic, iter_chunks_dynamic, iter_chunks_fixed
+
+# Text analyzed to pick the chunking strategy of a streamed document
+ANALYZE_SAMPLE_CHARS = 100_000
+
+
+def chunk_document(
+    raw_text: str,
+    pages_or_sections: list[dict[str, Any]],
+    strategy: str,
+    params: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """Chunk with the strategy chosen by analyze_content. Each chunk gets a "content_hash" of its text."""
+    return list(iter_document_chunks(raw_text, pages_or_sections, strategy, params))
+
+
+def iter_document_chunks(
+    raw_text: str,
+    pages_or_sections: list[dict[str, Any]],
+    strategy: str,
+    params: dict[str, Any],
+) -> Iterator[dict[str, Any]]:
+    """chunk_document yielding each chunk as soon as it is complete (same chunks and offsets)."""
+    if strategy == "dynamic" and any(s.get("text") for s in pages_or_sections):
+        chunks: Iterable[dict[str, Any]] = iter_chunks_dynamic(pages_or_sections, params)
+    elif strategy == "dynamic":
+        # No section text: chunk_dynamic's fixed-size fallback
+        chunks = chunk_dynamic(raw_text, pages_or_sections, params)
+    else:
+        chunks = iter_chunks_fixed([raw_text], params)
+    for c in chunks:
+        c["content_hash"] = chunk_hash(c.get("text", ""))
+        yield c
+
+
+def iter_chunk_document(
+    sections: Iterable[dict[str, Any] | str],
+    strategy: str,
+    params: dict[str, Any],
+) -> Iterator[dict[str, Any]]:
+    """Streaming chunk_document: yields chunks (with "content_hash") while sections are consumed."""
+    chunks = iter_chunks_dynamic(sections, params) if strategy == "dynamic" else iter_chunks_fixed(sections, params)
+    for c in chunks:
+        c["content_hash"] = chunk_hash(c.get("text", ""))
+        yield c
+
+
+def stream_document(
+    file_path: str | Path,
+    workers: int | None = None,
+    sample_chars: int = ANALYZE_SAMPLE_CHARS,
+) -> dict[str, Any]:
+    """
+    Streaming prepare_document: the strategy is chosen from the first `sample_chars` of text,
+    then the remaining sections are chunked as they are extracted (PDF pages in parallel with
+    workers > 1). Returns {file_path, document_id, strategy, params, chunks: iterator}.
+    """
+    path = str(file_path)
+    sections = iter_sections(path, workers=workers)
+    sample: list[dict[str, Any]] = []
+    size = 0
+    for sec in sections:
+        sample.append(sec)
+        size += len(sec.get("text") or "")
+        if size >= sample_chars:
+            break
+    analyzed = analyze_content("\n\n".join(s.get("text") or "" for s in sample), sample)
+    return {
+        "file_path": path,
+        "document_id": document_id_for(path),
+        "strategy": analyzed["strategy"],
+        "params": analyzed["params"],
+        "chunks": iter_chunk_document(itertools.chain(sample, sections), analyzed["strategy"], analyzed["params"]),
+    }
+
+
+def chunk_hash(text: str) -> str:
+    """Hash of a chunk's text (chunk-level diffing on re-ingest)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def content_hash(path: str | Path) -> str:
+    """sha256 of the file bytes, read in 1 MiB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_stat(path: str | Path) -> dict[str, Any]:
+    """Size and mtime used to skip hashing files that were not touched."""
+    st = os.stat(path)
+    return {"file_size": st.st_size, "file_mtime": st.st_mtime}
+
+
+def document_id_for(path: str) -> str:
+    """Document id from file path (hash)."""
+    return hashlib.sha256(path.encode("utf-8")).hexdigest()[:16]
+
+
+def prepare_document(file_path: str | Path) -> dict[str, Any]:
+    """
+    Run the CPU-bound ingest stages for one file.
+    Returns an ingest state: file_path, raw_text, pages_or_sections, strategy, params, chunks, document_id.
+    """
+    path = str(file_path)
+    extracted = extract_doc(path)
+    raw_text = extracted["raw_text"]
+    pages_or_sections = extracted.get("pages_or_sections", [])
+    analyzed = analyze_content(raw_text, pages_or_sections)
+    chunks = chunk_document(raw_text, pages_or_sections, analyzed["strategy"], analyzed["params"])
+    return {
+        "file_path": path,
+        "raw_text": raw_text,
+        "pages_or_sections": pages_or_sections,
+        "strategy": analyzed["strategy"],
+        "params": analyzed["params"],
+        "chunks": chunks,
+        "document_id": document_id_for(path),
+    }
+
+
+def try_prepare_document(file_path: str | Path) -> dict[str, Any]:
+    """
+    prepare_document for process pools: never raises (exceptions may not pickle).
+    Returns {"file_path", "state" or "error", "seconds"}.
+    """
+    start = time.perf_counter()
+    try:
+        out: dict[str, Any] = {"state": prepare_document(file_path)}
+    except Exception as e:
+        out = {"error": f"{type(e).__name__}: {e}"}
+    out["file_path"] = str(file_path)
+    out["seconds"] = time.perf_counter() - start
+    return out
@@ -1,37 +1,152 @@
 """
-Pipeline entrypoint: run_ingest(file_path), run_rag(query, top_k, use_graph_rag, use_raptor).
-Uses LangGraph compiled ingest and RAG graphs.
+Pipeline entrypoint: run_ingest(file_path, pipelined), run_ingest_many(paths, workers),
+run_rag(query, top_k, use_graph_rag, use_raptor), run_rag_many(queries, ...), and the async
+arun_ingest, arun_rag, adelete_document. Uses LangGraph compiled ingest and RAG graphs.
 """
 
+import copy
+import os
 from pathlib import Path
 from typing import Any
 
-from src.graphs.ingest_graph import ingest_graph
-from src.graphs.rag_graph import rag_graph
+import numpy as np
+
+from src.batch_ingest import run_ingest_many  # noqa: F401 (re-exported entrypoint)
+from src.async_embeddings import offload
+from src.graphs.ingest_graph import aingest_graph, ingest_graph
+from src.graphs.rag_graph import arag_graph, generate_answer, rag_graph, retrieve_many
+from src.instrumentation import recording, span
+from src.pipelined_ingest import run_ingest_pipelined
+from src.embedding_cache import text_key
+from src.query_cache import get_query_cache, query_key
 from src.storage.sql_store import SQLStore
-from src.storage.vector_store import VectorStore
-from src.rag.graph_rag import build_graph, retrieve_subgraph
-from src.rag.raptor import build_raptor_tree, retrieve_multilevel
+from src.storage.vector_store import get_vector_store
+from src.storage.graph_store import GraphStore
+from src.storage.raptor_store import RaptorStore
+from src.rag.graph_rag import retrieve_subgraph
+from src.rag.hybrid import check_mode
+from src.rag.raptor import build_raptor_tree, build_raptor_tree_embedded, retrieve_multilevel
+from src.rag.similarity import as_matrix
 
 
-def run_ingest(file_path: str | Path) -> dict[str, Any]:
-    """
-    Run the ingest LangGraph for a single document.
-    Returns final state (document_id, chunks, strategy, etc.).
-    """
+def _checked_path(file_path: str | Path) -> Path:
     file_path = Path(file_path)
     if not file_path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
+    return file_path
+
 
-    initial: dict[str, Any] = {"file_path": str(file_path)}
-    result = ingest_graph.invoke(initial)
+def run_ingest(file_path: str | Path, force: bool = False, pipelined: bool = False) -> dict[str, Any]:
+    """
+    Run the ingest LangGraph for a single document.
+    Returns final state (document_id, chunks, strategy, etc.). Unchanged files are skipped
+    (state["skipped"] is True); force=True re-processes them. pipelined=True overlaps
+    extraction, embedding and vector writes (src.pipelined_ingest) and adds state["stages"].
+    With INSTRUMENTATION enabled, state["metrics"] holds the per-node spans.
+    Unless the file was skipped, the corpus version is bumped (even on failure, since stores
+    may have been partly written), which invalidates cached run_rag results.
+    """
+    file_path = _checked_path(file_path)
+    result: dict[str, Any] | None = None
+    try:
+        with recording() as rec:
+            if pipelined:
+                result = run_ingest_pipelined(str(file_path), force=force)
+            else:
+                result = ingest_graph.invoke({"file_path": str(file_path), "force": force})
+    finally:
+        if result is None or not result.get("skipped"):
+            SQLStore().bump_corpus_version()
+    if rec is not None:
+        result["metrics"] = rec.as_dict()
+    return result
+
+
+async def arun_ingest(file_path: str | Path, force: bool = False, pipelined: bool = False) -> dict[str, Any]:
+    """
+    Async run_ingest (same state and semantics) via the ingest graph's ainvoke variant: blocking
+    nodes run on the shared pool (src.async_embeddings) and chunk embeddings join micro-batches
+    shared with concurrent requests.
+    """
+    file_path = _checked_path(file_path)
+    result: dict[str, Any] | None = None
+    try:
+        with recording() as rec:
+            if pipelined:
+                result = await offload(run_ingest_pipelined, str(file_path), force=force)
+            else:
+                result = await aingest_graph.ainvoke({"file_path": str(file_path), "force": force})
+    finally:
+        if result is None or not result.get("skipped"):
+            await offload(SQLStore().bump_corpus_version)
+    if rec is not None:
+        result["metrics"] = rec.as_dict()
     return result
 
 
 def delete_document(document_id: str) -> None:
-    """Remove all data for a document from vector store and SQL store."""
-    VectorStore().delete_by_document_id(document_id)
+    """Remove all data for a document from vector store, SQL store and the persisted graph."""
+    get_vector_store().delete_by_document_id(document_id)
     SQLStore().delete_document(document_id)
+    GraphStore().delete_document(document_id)
+    RaptorStore().delete_document(document_id)
+    SQLStore().bump_corpus_version()
+
+
+async def adelete_document(document_id: str) -> None:
+    """Async delete_document, run on the shared pool."""
+    await offload(delete_document, document_id)
+
+
+def _load_stored_rows(doc_ids: list[str]) -> tuple[list[dict[str, Any]], list[Any]]:
+    """
+    Load chunk texts and ingest-time embeddings from the vector store for the given documents.
+    Returns (chunks, embeddings) aligned by position, ordered by (document_id, chunk_index);
+    chunk "index" is the chunk_index within its document, missing vectors are None.
+    """
+    chunks: list[dict[str, Any]] = []
+    embs: list[Any] = []
+    for r in get_vector_store().get_by_document_ids(doc_ids):
+        meta = r.get("metadata", {})
+        chunks.append({
+            "text": r.get("document", ""),
+            "index": meta.get("chunk_index", 0),
+            "document_id": meta.get("document_id", ""),
+            "start": meta.get("start", 0),
+            "end": meta.get("end", 0),
+            "metadata": meta,
+        })
+        embs.append(r.get("embedding"))
+    return chunks, embs
+
+
+def _load_raptor_tree(
+    document_id: str,
+    doc_chunks: list[dict[str, Any]],
+    doc_embs: np.ndarray | None,
+) -> tuple[list[dict[str, Any]], np.ndarray | None]:
+    """
+    Load the RAPTOR tree persisted at ingest and fill its leaves with the stored chunk texts and
+    vectors. Documents ingested before trees were persisted get theirs built and saved once.
+    """
+    store = RaptorStore()
+    tree, embs = store.load_tree(document_id)
+    if not tree:
+        if doc_embs is None:
+            return build_raptor_tree(doc_chunks), None
+        tree, node_embs = build_raptor_tree_embedded(doc_chunks, doc_embs)
+        store.save_tree(document_id, tree, node_embs)
+        return tree, node_embs
+    position = {c.get("index"): i for i, c in enumerate(doc_chunks)}
+    for i, node in enumerate(tree):
+        if node.get("level", 0) == 0:
+            pos = position.get(node["chunk_indices"][0])
+            if pos is not None:
+                node["text"] = doc_chunks[pos].get("text", "")
+                embs[i] = doc_embs[pos] if doc_embs is not None else None
+    if any(e is None for e in embs):
+        return tree, None
+    return tree, as_matrix(embs)
 
 
 def run_rag(
@@ -40,19 +155,235 @@ def run_rag(
     use_graph_rag: bool = False,
     use_raptor: bool = False,
     filter_metadata: dict[str, Any] | None = None,
+    use_cache: bool = True,
+    retrieval_mode: str = "vector",
 ) -> dict[str, Any]:
     """
     Run the RAG LangGraph: retrieve from vector store, optionally expand with Graph RAG/RAPTOR.
-    Returns state with chunks and optional answer.
+    retrieval_mode "hybrid" fuses BM25 (SQLite FTS5) and vector hits by reciprocal rank;
+    "lexical" uses BM25 alone and embeds nothing (see src.rag.hybrid).
+    Returns state with chunks and optional answer (and "metrics" with INSTRUMENTATION enabled).
+    Results are served from the query cache (src.query_cache) until the corpus changes or the
+    entry expires; state["cached"] tells whether this one was. use_cache=False bypasses it.
+    """
+    key, hit = _cache_lookup(query, top_k, use_graph_rag, use_raptor, filter_metadata, use_cache, retrieval_mode)
+    if hit is not None:
+        return hit
+    with recording() as rec:
+        result = rag_graph.invoke(_rag_initial(query, top_k, use_graph_rag, use_raptor, filter_metadata, retrieval_mode))
+        result = _rank(result, top_k, use_graph_rag, use_raptor, _SharedExpansion())
+    return _finish_rag(result, key, rec)
+
+
+async def arun_rag(
+    query: str,
+    top_k: int = 5,
+    use_graph_rag: bool = False,
+    use_raptor: bool = False,
+    filter_metadata: dict[str, Any] | None = None,
+    use_cache: bool = True,
+    retrieval_mode: str = "vector",
+) -> dict[str, Any]:
+    """
+    Async run_rag (same state) via the RAG graph's ainvoke variant: the query embedding joins a
+    micro-batch shared with concurrent queries; search and expansion run on the shared pool.
+    """
+    key, hit = await offload(
+        _cache_lookup, query, top_k, use_graph_rag, use_raptor, filter_metadata, use_cache, retrieval_mode
+    )
+    if hit is not None:
+        return hit
+    with recording() as rec:
+        result = await arag_graph.ainvoke(
+            _rag_initial(query, top_k, use_graph_rag, use_raptor, filter_metadata, retrieval_mode)
+        )
+        if use_graph_rag or use_raptor:
+            result = await offload(_rank, result, top_k, use_graph_rag, use_raptor, _SharedExpansion())
+        else:
+            result = _rank(result, top_k, use_graph_rag, use_raptor, _SharedExpansion())
+    return _finish_rag(result, key, rec)
+
+
+def _cache_lookup(
+    query: str,
+    top_k: int,
+    use_graph_rag: bool,
+    use_raptor: bool,
+    filter_metadata: dict[str, Any] | None,
+    use_cache: bool,
+    retrieval_mode: str,
+) -> tuple[tuple | None, dict[str, Any] | None]:
+    """(cache key or None when not caching, cached state or None)."""
+    check_mode(retrieval_mode)
+    cache = get_query_cache()
+    if not (use_cache and cache.enabled):
+        return None, None
+    key = query_key(query, top_k, use_graph_rag, use_raptor, filter_metadata, _corpus_key(), retrieval_mode)
+    hit = cache.get(key)
+    if hit is not None:
+        hit.update(query=query, cached=True)
+    return key, hit
+
+
+def _finish_rag(result: dict[str, Any], key: tuple | None, rec: Any) -> dict[str, Any]:
+    if key is not None:
+        get_query_cache().put(key, result)
+    result["cached"] = False
+    if rec is not None:
+        result["metrics"] = rec.as_dict()
+    return result
+
+
+def run_rag_many(
+    queries: list[str],
+    top_k: int = 5,
+    use_graph_rag: bool = False,
+    use_raptor: bool = False,
+    filter_metadata: dict[str, Any] | None = None,
+    use_cache: bool = True,
+    retrieval_mode: str = "vector",
+) -> list[dict[str, Any]]:
+    """
+    run_rag for a batch of queries: one embed call and one batched vector store query for all
+    cache misses, with stored chunks, graphs and RAPTOR trees loaded once per batch. Returns one
+    state per query, in order, with the same content as run_rag (repeated queries are run once).
+    """
+    check_mode(retrieval_mode)
+    cache = get_query_cache()
+    results: list[dict[str, Any] | None] = [None] * len(queries)
+    keys: list[tuple | None] = [None] * len(queries)
+    pending: dict[Any, list[int]] = {}
+    corpus = _corpus_key() if use_cache and cache.enabled else None
+    for i, query in enumerate(queries):
+        if corpus is not None:
+            keys[i] = query_key(query, top_k, use_graph_rag, use_raptor, filter_metadata, corpus, retrieval_mode)
+            hit = cache.get(keys[i])
+            if hit is not None:
+                hit.update(query=query, cached=True)
+                results[i] = hit
+                continue
+        pending.setdefault(keys[i] or text_key(query), []).append(i)
+    if not pending:
+        return results  # type: ignore[return-value]
+
+    todo = [positions[0] for positions in pending.values()]
+    fetch_k = _rag_initial("", top_k, use_graph_rag, use_raptor, None)["top_k"]
+    with recording() as rec:
+        with span("retrieve_many", len(todo)):
+            retrieved = retrieve_many([queries[i] for i in todo], fetch_k, filter_metadata, retrieval_mode)
+        shared = _SharedExpansion()
+        for i, update in zip(todo, retrieved):
+            state: dict[str, Any] = {
+                **_rag_initial(queries[i], top_k, use_graph_rag, use_raptor, filter_metadata, retrieval_mode),
+                **update,
+                "answer": generate_answer(update["chunks"]),
+            }
+            state = _rank(state, top_k, use_graph_rag, use_raptor, shared)
+            if keys[i] is not None:
+                cache.put(keys[i], state)
+            state["cached"] = False
+            results[i] = state
+    if rec is not None:
+        # One recording for the batch, shared by its results
+        metrics = rec.as_dict()
+        for i in todo:
+            results[i]["metrics"] = metrics  # type: ignore[index]
+    for positions in pending.values():
+        for j in positions[1:]:
+            results[j] = {**copy.deepcopy(results[positions[0]]), "query": queries[j]}
+    return results  # type: ignore[return-value]
+
+
+def _corpus_key() -> tuple:
+    """Identity of the corpus a query runs against: vector store, SQLite database and its version."""
+    store = get_vector_store()
+    sql = SQLStore()
+    return (
+        os.path.abspath(store.persist_directory),
+        store.collection_name,
+        store.backend,
+        os.path.abspath(sql.db_path),
+        sql.corpus_version(),
+    )
+
+
+class _SharedExpansion:
+    """
+    Stored chunks/vectors, graphs and RAPTOR trees loaded for Graph RAG/RAPTOR expansion,
+    kept for the whole run_rag call or run_rag_many batch (one vector store read per document).
     """
+
+    def __init__(self) -> None:
+        self._docs: dict[str, tuple[list[dict[str, Any]], list[Any]]] = {}
+        self._graphs: dict[tuple[str, ...], tuple[Any, Any]] = {}
+        self._trees: dict[str, tuple[list[dict[str, Any]], np.ndarray | None]] = {}
+
+    def prefetch(self, doc_ids: list[str]) -> None:
+        missing = sorted(set(doc_ids) - set(self._docs))
+        if not missing:
+            return
+        chunks, embs = _load_stored_rows(missing)
+        for doc_id in missing:
+            self._docs[doc_id] = ([], [])
+        for c, e in zip(chunks, embs):
+            doc_chunks, doc_embs = self._docs[c["document_id"]]
+            doc_chunks.append(c)
+            doc_embs.append(e)
+
+    def stored_chunks(self, doc_ids: list[str]) -> tuple[list[dict[str, Any]], np.ndarray | None]:
+        """
+        Chunks of the (sorted) doc_ids and their float32 embedding matrix, None if any stored
+        vector is missing.
+        """
+        self.prefetch(doc_ids)
+        chunks = [c for d in doc_ids for c in self._docs[d][0]]
+        embs = [e for d in doc_ids for e in self._docs[d][1]]
+        if not embs or any(e is None for e in embs):
+            return chunks, None
+        return chunks, as_matrix(embs)
+
+    def graph(self, doc_ids: list[str]) -> tuple[Any, Any]:
+        key = tuple(doc_ids)
+        if key not in self._graphs:
+            graph_store = GraphStore()
+            self._graphs[key] = (graph_store.load_graph(doc_ids), graph_store.load_index(doc_ids))
+        return self._graphs[key]
+
+    def raptor_tree(
+        self, doc_id: str, doc_chunks: list[dict[str, Any]], doc_embs: np.ndarray | None
+    ) -> tuple[list[dict[str, Any]], np.ndarray | None]:
+        if doc_id not in self._trees:
+            self._trees[doc_id] = _load_raptor_tree(doc_id, doc_chunks, doc_embs)
+        return self._trees[doc_id]
+
+
+def _rag_initial(
+    query: str,
+    top_k: int,
+    use_graph_rag: bool,
+    use_raptor: bool,
+    filter_metadata: dict[str, Any] | None,
+    retrieval_mode: str = "vector",
+) -> dict[str, Any]:
     # Fetch more candidates when expanding with graph/raptor for better recall, then re-rank
     fetch_k = max(top_k * 2, 10) if (use_graph_rag or use_raptor) else top_k
-    initial: dict[str, Any] = {
+    return {
         "query": query,
         "top_k": fetch_k,
         "filter_metadata": filter_metadata or {},
+        "retrieval_mode": retrieval_mode,
     }
-    result = rag_graph.invoke(initial)
+
+
+def _rank(
+    result: dict[str, Any],
+    top_k: int,
+    use_graph_rag: bool,
+    use_raptor: bool,
+    shared: _SharedExpansion,
+) -> dict[str, Any]:
+    """Score the retrieved chunks, merge Graph RAG/RAPTOR expansions and keep the top_k."""
+    query = result["query"]
     chunks = result.get("chunks", [])
 
     # Chroma returns distance (lower = better). Use -distance as score for sorting.
@@ -65,26 +396,12 @@ def run_rag(
     scored = [{"text": c.get("text", ""), "metadata": c.get("metadata", {}), "score": score_of(c)} for c in chunks]
 
     if (use_graph_rag or use_raptor) and scored:
-        sql = SQLStore()
-        doc_ids = {c.get("metadata", {}).get("document_id") for c in scored if c.get("metadata")}
-        all_chunks_flat: list[dict] = []
-        for doc_id in doc_ids:
-            if doc_id:
-                for r in sql.get_chunks_by_document_id(doc_id):
-                    all_chunks_flat.append({
-                        "text": "",
-                        "index": r.get("chunk_index", 0),
-                        "start": r.get("start", 0),
-                        "end": r.get("end", 0),
-                        "document_id": doc_id,
-                    })
-        for c in scored:
-            meta = c.get("metadata", {})
-            doc_id, idx = meta.get("document_id"), meta.get("chunk_index", -1)
-            for ac in all_chunks_flat:
-                if ac.get("document_id") == doc_id and ac.get("index") == idx:
-                    ac["text"] = c.get("text", "")
-                    break
+        doc_ids = sorted({c.get("metadata", {}).get("document_id") for c in scored if c.get("metadata")} - {None, ""})
+        # Reuse chunk texts and vectors stored at ingest instead of re-embedding the corpus
+        with span("load_stored_chunks") as s:
+            all_chunks_flat, all_embs = shared.stored_chunks(doc_ids)
+            s.items = len(all_chunks_flat)
+        query_embedding = result.get("query_embedding")
 
         merged: dict[tuple, dict] = {}
         for c in scored:
@@ -92,24 +409,42 @@ def run_rag(
             if k not in merged or c.get("score", 0) > merged[k].get("score", 0):
                 merged[k] = {"text": c.get("text", ""), "metadata": c.get("metadata", {}), "score": c.get("score", 0)}
 
+        def merge(chunk: dict, s: float) -> None:
+            meta = chunk.get("metadata", {})
+            k = (meta.get("document_id"), meta.get("chunk_index", -1))
+            if k not in merged or s > merged[k].get("score", 0):
+                merged[k] = {"text": chunk.get("text", ""), "metadata": meta, "score": s}
+
         if use_graph_rag and all_chunks_flat:
-            G = build_graph(all_chunks_flat)
-            for e in retrieve_subgraph(query, all_chunks_flat, G, top_k=top_k * 2):
-                idx = e.get("index", -1)
-                doc_id = all_chunks_flat[idx].get("document_id", "") if 0 <= idx < len(all_chunks_flat) else ""
-                k = (doc_id, idx)
-                s = e.get("score", 0.0)
-                if k not in merged or s > merged[k].get("score", 0):
-                    merged[k] = {"text": e.get("text", ""), "metadata": {}, "score": s}
+            # Graph and posting lists were built at ingest; merge the candidate documents' parts
+            with span("graph_rag") as s:
+                graph, index = shared.graph(doc_ids)
+                expanded = retrieve_subgraph(
+                    query, all_chunks_flat, graph, top_k=top_k * 2,
+                    embeddings=all_embs, query_embedding=query_embedding, index=index,
+                )
+                for e in expanded:
+                    merge(e, e.get("score", 0.0))
+                s.items = len(expanded)
 
         if use_raptor and all_chunks_flat:
-            for e in retrieve_multilevel(query, build_raptor_tree(all_chunks_flat), top_k=top_k * 2):
-                idx = e.get("index", e.get("chunk_index", -1))
-                doc_id = all_chunks_flat[idx].get("document_id", "") if 0 <= idx < len(all_chunks_flat) else ""
-                k = (doc_id, idx)
-                s = e.get("score", 0.0)
-                if k not in merged or s > merged[k].get("score", 0):
-                    merged[k] = {"text": e.get("text", ""), "metadata": {}, "score": s}
+            with span("raptor") as s:
+                for doc_id in doc_ids:
+                    positions = [i for i, c in enumerate(all_chunks_flat) if c["document_id"] == doc_id]
+                    doc_chunks = [all_chunks_flat[i] for i in positions]
+                    position = {c.get("index"): i for i, c in enumerate(doc_chunks)}
+                    tree, node_embs = shared.raptor_tree(
+                        doc_id, doc_chunks, all_embs[positions] if all_embs is not None else None
+                    )
+                    for e in retrieve_multilevel(
+                        query, tree, top_k=top_k * 2,
+                        node_embeddings=node_embs, query_embedding=query_embedding,
+                    ):
+                        ci = e.get("chunk_index", e.get("chunk_indices", [-1])[0])
+                        pos = position.get(ci)
+                        if pos is not None:
+                            merge({**doc_chunks[pos], "text": e.get("text", "")}, e.get("score", 0.0))
+                s.items = len(doc_ids)
 
         result["chunks"] = sorted(merged.values(), key=lambda x: -x.get("score", 0))[:top_k]
     else:
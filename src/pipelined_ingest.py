@@ -0,0 +1,230 @@
+"""
+Pipelined single-document ingest: run_ingest_pipelined(path). Extract+chunk, embed (micro-batches)
+and vector store run as concurrent stages joined by bounded queues, so a slow stage blocks the
+ones upstream (backpressure) instead of buffering the chunks. SQL, graph and RAPTOR stores run
+once the last batch is written, as in the ingest graph. Returns the ingest graph's final state
+plus "stages": per-stage busy/idle seconds and item counts.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+import numpy as np
+
+from src.embeddings import embed
+from src.graphs.ingest_graph import (
+    _node_load_stored,
+    _node_store_fingerprint,
+    _node_store_raptor,
+    _node_store_sql,
+    fingerprint_document,
+)
+from src.instrumentation import span
+from src.parser.analyzer import analyze_content
+from src.parser.extractors import extract as extract_doc
+from src.parser.prepare import iter_document_chunks
+from src.rag.graph_rag import cooccurrence_edges, extract_chunk_entities
+from src.rag.similarity import as_matrix
+from src.storage.graph_store import GraphStore
+from src.storage.vector_store import get_vector_store
+
+_DONE = object()
+_POLL = 0.05
+
+
+class _Stage:
+    """Busy/idle accounting for one stage; idle is time blocked on its input or output queue."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.busy = 0.0
+        self.idle = 0.0
+        self.items = 0
+
+    def report(self) -> dict[str, Any]:
+        return {"busy": self.busy, "idle": self.idle, "items": self.items}
+
+
+class _Stopped(Exception):
+    """Raised inside a stage when another stage failed; never escapes run_ingest_pipelined."""
+
+
+def _put(q: queue.Queue, item: Any, stage: _Stage, stop: threading.Event) -> None:
+    t0 = time.perf_counter()
+    while True:
+        if stop.is_set():
+            raise _Stopped
+        try:
+            q.put(item, timeout=_POLL)
+            break
+        except queue.Full:
+            continue
+    stage.idle += time.perf_counter() - t0
+
+
+def _get(q: queue.Queue, stage: _Stage, stop: threading.Event) -> Any:
+    t0 = time.perf_counter()
+    while True:
+        if stop.is_set():
+            raise _Stopped
+        try:
+            item = q.get(timeout=_POLL)
+            break
+        except queue.Empty:
+            continue
+    stage.idle += time.perf_counter() - t0
+    return item
+
+
+def _run_stage(fn: Callable[[], None], errors: list[BaseException], stop: threading.Event) -> None:
+    try:
+        fn()
+    except _Stopped:
+        pass
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+
+
+def run_ingest_pipelined(
+    file_path: str,
+    force: bool = False,
+    batch_size: int = 32,
+    queue_size: int = 4,
+    workers: int | None = None,
+) -> dict[str, Any]:
+    """
+    Ingest one document with overlapped stages. Chunks travel in batches of `batch_size`; each
+    queue holds at most `queue_size` batches. `workers` is passed to PDF extraction.
+    Unchanged files are skipped exactly like ingest_graph. The whole document is extracted and
+    analyzed as in the graph (same strategy, chunks and offsets); its chunks are then streamed to
+    the embed stage as they are cut.
+    If a stage fails, the first exception is re-raised once all stages have stopped and vectors
+    added by this run are removed, so the stores are left as they were.
+    """
+    state: dict[str, Any] = {"file_path": str(file_path), "force": force}
+    state.update(fingerprint_document(state["file_path"], force=force))
+    if state["skipped"]:
+        state.update(_node_load_stored(state))
+        return state
+
+    extract_stage, embed_stage, store_stage = _Stage("extract"), _Stage("embed"), _Stage("store")
+    chunk_q: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    vector_q: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    meta: dict[str, Any] = {}
+    ready = threading.Event()
+
+    def extract_chunks() -> None:
+        t0 = time.perf_counter()
+        try:
+            extracted = extract_doc(state["file_path"], workers=workers)
+            raw_text, sections = extracted["raw_text"], extracted.get("pages_or_sections", [])
+            analyzed = analyze_content(raw_text, sections)
+            meta.update(raw_text=raw_text, pages_or_sections=sections, **analyzed)
+        finally:
+            ready.set()
+        batch: list[dict[str, Any]] = []
+        for chunk in iter_document_chunks(raw_text, sections, analyzed["strategy"], analyzed["params"]):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                extract_stage.busy += time.perf_counter() - t0
+                extract_stage.items += len(batch)
+                _put(chunk_q, batch, extract_stage, stop)
+                batch = []
+                t0 = time.perf_counter()
+        extract_stage.busy += time.perf_counter() - t0
+        extract_stage.items += len(batch)
+        if batch:
+            _put(chunk_q, batch, extract_stage, stop)
+        _put(chunk_q, _DONE, extract_stage, stop)
+
+    # The store stage needs the strategy (chunk metadata) before its first write
+    extractor = threading.Thread(target=_run_stage, args=(extract_chunks, errors, stop), name="ingest-extract")
+    extractor.start()
+    ready.wait()
+    sync = None
+    if "strategy" in meta:
+        try:
+            sync = get_vector_store().begin_sync(state["document_id"], {"strategy": meta["strategy"]})
+        except BaseException:
+            stop.set()
+            extractor.join()
+            raise
+
+    def embed_chunks() -> None:
+        while True:
+            batch = _get(chunk_q, embed_stage, stop)
+            if batch is _DONE:
+                _put(vector_q, _DONE, embed_stage, stop)
+                return
+            t0 = time.perf_counter()
+            ids = sync.ids(batch)
+            rows = [sync.stored_embedding(cid) for cid in ids]
+            missing = [i for i, e in enumerate(rows) if e is None]
+            if missing:
+                for i, e in zip(missing, embed([batch[i].get("text", "") for i in missing], as_numpy=True)):
+                    rows[i] = e
+            embed_stage.busy += time.perf_counter() - t0
+            embed_stage.items += len(batch)
+            _put(vector_q, (batch, ids, as_matrix(rows), len(batch) - len(missing)), embed_stage, stop)
+
+    chunks: list[dict[str, Any]] = []
+    embeddings: list[np.ndarray] = []
+    chunk_entities: list[tuple[int, dict[str, int]]] = []
+    reused = 0
+
+    def store_vectors() -> None:
+        nonlocal reused
+        while True:
+            item = _get(vector_q, store_stage, stop)
+            if item is _DONE:
+                return
+            t0 = time.perf_counter()
+            batch, ids, matrix, n_reused = item
+            sync.push(ids, batch, matrix)
+            chunk_entities.extend(extract_chunk_entities(batch))
+            chunks.extend(batch)
+            embeddings.append(matrix)
+            reused += n_reused
+            store_stage.busy += time.perf_counter() - t0
+            store_stage.items += len(batch)
+
+    threads = [extractor]
+    if sync is not None:
+        embedder = threading.Thread(target=_run_stage, args=(embed_chunks, errors, stop), name="ingest-embed")
+        embedder.start()
+        threads.append(embedder)
+        _run_stage(store_vectors, errors, stop)
+    for t in threads:
+        t.join()
+    if errors:
+        if sync is not None:
+            sync.rollback()
+        raise errors[0]
+
+    state.update(
+        raw_text=meta["raw_text"],
+        pages_or_sections=meta["pages_or_sections"],
+        strategy=meta["strategy"],
+        params=meta["params"],
+        chunks=chunks,
+        embeddings=np.concatenate(embeddings) if embeddings else as_matrix([]),
+        reused_embeddings=reused,
+    )
+    t0 = time.perf_counter()
+    with span("store_vector"):
+        state["vector_sync"] = sync.commit()
+    with span("store_sql", len(chunks)):
+        _node_store_sql(state)
+    with span("store_graph", len(chunks)):
+        GraphStore().save_document(state["document_id"], chunk_entities, cooccurrence_edges(chunk_entities))
+    with span("store_raptor", len(chunks)):
+        _node_store_raptor(state)
+    _node_store_fingerprint(state)
+    store_stage.busy += time.perf_counter() - t0
+    state["stages"] = {s.name: s.report() for s in (extract_stage, embed_stage, store_stage)}
+    return state
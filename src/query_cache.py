@@ -0,0 +1,114 @@
+"""
+run_rag result cache: in-memory LRU with a TTL, keyed by (normalized query, top_k, expansion
+flags, filter_metadata, retrieval mode, stores, corpus version). run_ingest, run_ingest_many and
+delete_document bump the corpus version in SQLite, so every process sharing the database stops
+serving results computed before the change. Hits and misses are counted in src.instrumentation.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from src.embedding_cache import text_key
+from src.instrumentation import incr, register_gauge
+
+
+def _default_max_entries() -> int:
+    return int(os.environ.get("RAG_CACHE_SIZE", "256"))
+
+
+def _default_ttl() -> float:
+    return float(os.environ.get("RAG_CACHE_TTL", "300"))
+
+
+def query_key(
+    query: str,
+    top_k: int,
+    use_graph_rag: bool,
+    use_raptor: bool,
+    filter_metadata: dict[str, Any] | None,
+    corpus: Hashable,
+    retrieval_mode: str = "vector",
+) -> tuple:
+    """Cache key; the query is NFC/whitespace-normalized like embedding cache keys."""
+    filters = json.dumps(filter_metadata or {}, sort_keys=True, default=str)
+    return (text_key(query), top_k, bool(use_graph_rag), bool(use_raptor), filters, retrieval_mode, corpus)
+
+
+class QueryCache:
+    """
+    LRU of run_rag results bounded by max_entries, each valid for ttl seconds (ttl <= 0 or
+    max_entries <= 0 disables caching). Results are deep-copied in and out. Thread-safe.
+    """
+
+    def __init__(self, max_entries: int | None = None, ttl: float | None = None):
+        self.max_entries = _default_max_entries() if max_entries is None else max_entries
+        self.ttl = _default_ttl() if ttl is None else ttl
+        self._entries: OrderedDict[tuple, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: tuple) -> dict[str, Any] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        incr("query_cache_misses" if entry is None else "query_cache_hits")
+        return None if entry is None else copy.deepcopy(entry[1])
+
+    def put(self, key: tuple, result: dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        value = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache: QueryCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryCache:
+    """Process-wide query cache; re-created when RAG_CACHE_SIZE or RAG_CACHE_TTL change."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or (_cache.max_entries, _cache.ttl) != (_default_max_entries(), _default_ttl()):
+            _cache = QueryCache()
+        return _cache
+
+
+register_gauge("query_cache_hit_rate", lambda: get_query_cache().stats()["hit_rate"])
+register_gauge("query_cache_entries", lambda: get_query_cache().stats()["entries"])
@@ -3,46 +3,145 @@ Graph RAG: build knowledge graph from chunks (entities/relations), entity-aware
 Arabic-safe (preserve diacritics). Uses NetworkX for in-memory graph.
 """
 
+import heapq
+import math
 import re
-from typing import Any
+from typing import Any, Iterable
 
 import networkx as nx
+import numpy as np
 
 from src.embeddings import embed
+from src.rag.similarity import cosine_scores, normalize_rows, top_k_indices
+
+
+_ENTITY_RE = re.compile(r"[A-Z][a-z\u0600-\u06FF\u064B-\u0652]+(?:\s+[A-Z][a-z\u0600-\u06FF\u064B-\u0652]+)*|[a-zA-Z]{3,}|\u0600-\u06FF+")
+
+ChunkKey = tuple[Any, int]  # (document_id, chunk_index)
+
+
+def _entity_counts(text: str, limit: int = 20) -> dict[str, int]:
+    """Entities of a chunk with their mention counts, in first-seen order (at most `limit`)."""
+    counts: dict[str, int] = {}
+    for w in _ENTITY_RE.findall(text):
+        w = w.strip()
+        if len(w) <= 1:
+            continue
+        if w in counts:
+            counts[w] += 1
+        elif len(counts) < limit:
+            counts[w] = 1
+    return counts
 
 
 def _simple_entities(text: str) -> list[str]:
     """Heuristic entity extraction: capitalized phrases and Arabic-like words. Preserves diacritics."""
-    # Simple: words that look like proper nouns (capitalized) or Arabic words (Unicode range)
-    words = re.findall(r"[A-Z][a-z\u0600-\u06FF\u064B-\u0652]+(?:\s+[A-Z][a-z\u0600-\u06FF\u064B-\u0652]+)*|[a-zA-Z]{3,}|\u0600-\u06FF+", text)
-    return list(dict.fromkeys(w.strip() for w in words if len(w.strip()) > 1))[:20]
+    return list(_entity_counts(text))
 
 
-def build_graph(chunks: list[dict[str, Any]]) -> nx.DiGraph:
+class EntityIndex:
     """
-    Build a simple knowledge graph from chunks: entities from each chunk, edges between co-occurring.
-    Arabic-safe (no stripping of diacritics).
+    Inverted index entity -> postings [(document_id, chunk_index, count)], plus the forward
+    chunk -> entities map. Postings are sorted by count (desc) then (document_id, chunk_index),
+    so bounded fan-out is a slice of the most relevant chunks.
     """
-    G = nx.DiGraph()
-    chunk_id_to_entities: dict[int, list[str]] = {}
-
-    for c in chunks:
-        idx = c.get("index", len(chunk_id_to_entities))
-        text = c.get("text", "")
-        entities = _simple_entities(text)
-        chunk_id_to_entities[idx] = entities
-        for e in entities:
-            G.add_node(e, chunk_index=idx)
+
+    def __init__(self, mentions: Iterable[tuple[Any, int, str, int]] = ()):
+        self._postings: dict[str, list[tuple[Any, int, int]]] = {}
+        self._forward: dict[ChunkKey, list[str]] = {}
+        for doc_id, idx, entity, count in mentions:
+            self._postings.setdefault(entity, []).append((doc_id, idx, count))
+            self._forward.setdefault((doc_id, idx), []).append(entity)
+        for plist in self._postings.values():
+            plist.sort(key=lambda p: (-p[2], str(p[0]), p[1]))
+        self.num_chunks = len(self._forward)
+
+    @classmethod
+    def from_chunks(cls, chunks: list[dict[str, Any]]) -> "EntityIndex":
+        """Build the index in memory from chunk texts (ingest stores the same postings via GraphStore)."""
+        return cls(
+            (c.get("document_id"), idx, e, n)
+            for (idx, counts), c in zip(extract_chunk_entities(chunks), chunks)
+            for e, n in counts.items()
+        )
+
+    def postings(self, entity: str) -> list[tuple[Any, int, int]]:
+        return self._postings.get(entity, [])
+
+    def entities_of(self, key: ChunkKey) -> list[str]:
+        return self._forward.get(key, [])
+
+    def idf(self, entity: str) -> float:
+        """IDF-style weight: frequent entities contribute less to expansion."""
+        df = len(self._postings.get(entity, ()))
+        return math.log(1 + self.num_chunks / df) if df else 0.0
+
+    def expand(
+        self,
+        seeds: list[ChunkKey],
+        graph: nx.DiGraph | None = None,
+        fan_out: int = 32,
+        limit: int = 10,
+    ) -> list[tuple[ChunkKey, float]]:
+        """
+        Chunks sharing entities with the seed chunks, ranked by sum of idf * (1 + log count).
+        Each entity contributes at most `fan_out` postings; with a graph, the strongest
+        co-occurring neighbours of seed entities are followed one hop at half weight.
+        """
+        seed_set = set(seeds)
+        entities: dict[str, float] = {}
+        for key in seeds:
+            for e in self.entities_of(key):
+                entities[e] = 1.0
+        if graph is not None:
+            for e in list(entities):
+                if not graph.has_node(e):
+                    continue
+                neighbours = heapq.nlargest(
+                    fan_out, graph.succ[e].items(), key=lambda kv: kv[1].get("weight", 1)
+                )
+                for nb, _ in neighbours:
+                    entities.setdefault(nb, 0.5)
+
+        weights: dict[ChunkKey, float] = {}
+        for e, hop in entities.items():
+            idf = self.idf(e)
+            for doc_id, idx, count in self.postings(e)[:fan_out]:
+                key = (doc_id, idx)
+                if key not in seed_set:
+                    weights[key] = weights.get(key, 0.0) + hop * idf * (1 + math.log(count))
+        return heapq.nlargest(limit, weights.items(), key=lambda kv: kv[1])
+
+
+def extract_chunk_entities(chunks: list[dict[str, Any]]) -> list[tuple[int, dict[str, int]]]:
+    """Entities per chunk as (chunk index, {entity: count}). Run once per document at ingest."""
+    return [(c.get("index", i), _entity_counts(c.get("text", ""))) for i, c in enumerate(chunks)]
+
+
+def cooccurrence_edges(chunk_entities: list[tuple[int, dict[str, int]]]) -> list[tuple[str, str, int]]:
+    """Edges between entities co-occurring within a small window of a chunk: (source, target, weight)."""
+    weights: dict[tuple[str, str], int] = {}
+    for _, counts in chunk_entities:
+        entities = list(counts)
         for i, e1 in enumerate(entities):
             for e2 in entities[i + 1 : i + 3]:
                 if e1 != e2:
-                    G.add_edge(e1, e2, weight=1)
+                    weights[(e1, e2)] = weights.get((e1, e2), 0) + 1
+    return [(s, t, w) for (s, t), w in weights.items()]
+
 
-    # Link chunks that share entities
-    for idx, entities in chunk_id_to_entities.items():
-        for e in entities:
-            if G.has_node(e):
-                G.nodes[e]["chunk_index"] = idx
+def build_graph(chunks: list[dict[str, Any]]) -> nx.DiGraph:
+    """
+    Build a simple knowledge graph from chunks: entities from each chunk, edges between co-occurring.
+    Arabic-safe (no stripping of diacritics). Entity -> chunk links live in EntityIndex.
+    Ingest persists the same graph via GraphStore.
+    """
+    G = nx.DiGraph()
+    chunk_entities = extract_chunk_entities(chunks)
+    for _, counts in chunk_entities:
+        G.add_nodes_from(counts)
+    for e1, e2, w in cooccurrence_edges(chunk_entities):
+        G.add_edge(e1, e2, weight=w)
     return G
 
 
@@ -52,54 +151,62 @@ def retrieve_subgraph(
     graph: nx.DiGraph | None,
     top_k: int = 5,
     embed_fn: Any = None,
+    embeddings: list[list[float]] | np.ndarray | None = None,
+    query_embedding: list[float] | np.ndarray | None = None,
+    index: EntityIndex | None = None,
+    fan_out: int = 32,
+    entity_boost: float = 0.1,
 ) -> list[dict[str, Any]]:
     """
     Entity-aware retrieval: embed query, find nearby chunks; optionally expand via graph.
-    If graph is None, falls back to embedding similarity over chunks only.
+    If graph and index are None, falls back to embedding similarity over chunks only.
+    Expansion is a set of posting-list lookups on `index` (built from chunks if not given);
+    expanded chunks get up to `entity_boost` added to their similarity, by entity weight.
+    Pass the stored chunk `embeddings` (aligned with chunks) and the `query_embedding`
+    to skip re-embedding; only what is missing is sent to embed_fn.
     """
     embed_fn = embed_fn or embed
     if not chunks:
         return []
 
-    texts = [c.get("text", "") for c in chunks]
-    query_emb = embed_fn([query])[0]
-    chunk_embs = embed_fn(texts)
-
-    # Cosine similarity
-    def cos_sim(a, b):
-        dot = sum(x * y for x, y in zip(a, b))
-        na = sum(x * x for x in a) ** 0.5
-        nb = sum(x * x for x in b) ** 0.5
-        if na * nb == 0:
-            return 0.0
-        return dot / (na * nb)
-
-    scored = [(cos_sim(query_emb, ce), i) for i, ce in enumerate(chunk_embs)]
-    scored.sort(key=lambda x: -x[0])
-    top_indices = [i for _, i in scored[: top_k * 2]]
-
-    if graph is not None and top_indices:
-        # Expand: add chunks that share entities with top chunks
-        expanded = set(top_indices)
-        for idx in top_indices:
-            chunk_text = chunks[idx].get("text", "")
-            for entity in _simple_entities(chunk_text):
-                if graph.has_node(entity):
-                    ci = graph.nodes[entity].get("chunk_index")
-                    if ci is not None:
-                        expanded.add(ci)
-        top_indices = list(expanded)[: top_k * 2]
+    query_emb = query_embedding if query_embedding is not None else embed_fn([query])[0]
+    if embeddings is not None and len(embeddings) == len(chunks) and (
+        isinstance(embeddings, np.ndarray) or all(e is not None for e in embeddings)
+    ):
+        chunk_embs = normalize_rows(embeddings)
+    else:
+        chunk_embs = normalize_rows(embed_fn([c.get("text", "") for c in chunks]))
+
+    # One matrix-vector product over the pre-normalized chunk matrix
+    scores = cosine_scores(query_emb, chunk_embs, corpus_normalized=True)
+    top_indices = [int(i) for i in top_k_indices(scores, top_k * 2)]
+
+    boost: dict[int, float] = {}
+    if (graph is not None or index is not None) and top_indices:
+        # Expand: chunks sharing (IDF-weighted) entities with top chunks, via posting lists
+        if index is None:
+            index = EntityIndex.from_chunks(chunks)
+        keys = [(c.get("document_id"), c.get("index", i)) for i, c in enumerate(chunks)]
+        position = {k: i for i, k in enumerate(keys)}
+        expansions = index.expand([keys[i] for i in top_indices], graph=graph, fan_out=fan_out, limit=top_k * 2)
+        max_w = max((w for _, w in expansions), default=0.0)
+        for key, w in expansions:
+            pos = position.get(key)
+            if pos is not None and max_w > 0:
+                boost[pos] = entity_boost * w / max_w
+        seeds = set(top_indices)
+        top_indices = top_indices + [p for p in boost if p not in seeds]
 
     result = []
     seen = set()
-    for _, i in sorted(
-        [(cos_sim(query_emb, chunk_embs[i]), i) for i in top_indices],
+    for score, i in sorted(
+        [(float(scores[i]) + boost.get(i, 0.0), i) for i in top_indices],
         key=lambda x: -x[0],
     ):
         if i in seen:
             continue
         seen.add(i)
-        result.append({**chunks[i], "score": cos_sim(query_emb, chunk_embs[i])})
+        result.append({**chunks[i], "score": score})
         if len(result) >= top_k:
             break
     return result
@@ -0,0 +1,86 @@
+"""
+Lexical and hybrid retrieval. lexical_many() runs BM25 over the SQLite FTS5 chunk index (no
+embedding, so short keyword queries cost one SQLite query); reciprocal_rank_fusion() merges the
+BM25 and vector rankings of a query. Chunks are identified by (document_id, chunk_index).
+"""
+
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from src.instrumentation import span
+from src.storage.sql_store import SQLStore
+
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical")
+RRF_K = 60
+
+
+def check_mode(mode: str) -> str:
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode!r}. Use one of {', '.join(RETRIEVAL_MODES)}.")
+    return mode
+
+
+def lexical_many(
+    queries: list[str],
+    top_k: int = 5,
+    filter_metadata: dict[str, Any] | None = None,
+) -> list[list[dict[str, Any]]]:
+    """BM25 hits per query as retrieve chunks ({text, metadata, score}; score = -bm25, higher = better)."""
+    store = SQLStore()
+    with span("bm25", len(queries)):
+        return [
+            [
+                {"text": r["document"], "metadata": r["metadata"], "score": -r["bm25"]}
+                for r in store.search_chunks(q, top_k, filter_metadata)
+            ]
+            for q in queries
+        ]
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def submit_lexical(
+    queries: list[str],
+    top_k: int = 5,
+    filter_metadata: dict[str, Any] | None = None,
+) -> Future:
+    """
+    lexical_many() on a background thread, to overlap with embedding and vector search. Uses
+    its own small pool: the caller may itself be a worker of the shared async pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="rag-bm25")
+    ctx = contextvars.copy_context()
+    return _executor.submit(ctx.run, lexical_many, queries, top_k, filter_metadata)
+
+
+def _chunk_key(chunk: dict[str, Any]) -> tuple:
+    meta = chunk.get("metadata", {})
+    return (meta.get("document_id"), meta.get("chunk_index", -1))
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[dict[str, Any]]],
+    top_k: int | None = None,
+    k: int = RRF_K,
+) -> list[dict[str, Any]]:
+    """
+    Merge ranked chunk lists: score = sum over lists of 1 / (k + rank), rank from 1. Returns
+    {text, metadata, score} best first; a chunk keeps the text/metadata of its first occurrence.
+    """
+    fused: dict[tuple, dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            key = _chunk_key(chunk)
+            if key not in fused:
+                fused[key] = {"text": chunk.get("text", ""), "metadata": chunk.get("metadata", {}), "score": 0.0}
+            fused[key]["score"] += 1.0 / (k + rank)
+    out = sorted(fused.values(), key=lambda c: -c["score"])
+    return out if top_k is None else out[:top_k]
@@ -1,11 +1,16 @@
 """
 RAPTOR: hierarchical tree from chunks (summarize, cluster, recurse). Multi-level retrieval.
 Arabic-safe (preserve diacritics in summaries). Uses extractive summarization fallback.
+The tree is built once at ingest (see RaptorStore) and only searched at query time.
 """
 
+import math
 from typing import Any
 
+import numpy as np
+
 from src.embeddings import embed
+from src.rag.similarity import as_matrix, cosine_scores, spherical_kmeans, top_k_indices
 
 
 def _extractive_summary(text: str, max_sentences: int = 3) -> str:
@@ -14,92 +19,205 @@ def _extractive_summary(text: str, max_sentences: int = 3) -> str:
     return ". ".join(sentences[:max_sentences]) if sentences else text[:500]
 
 
-def build_raptor_tree(chunks: list[dict[str, Any]], max_levels: int = 2) -> list[dict[str, Any]]:
+def _kmeans(vectors: np.ndarray, k: int, iters: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means labels (src.rag.similarity.spherical_kmeans), renumbered by first appearance.
+    Deterministic for a given seed.
+    """
+    _, labels = spherical_kmeans(vectors, k, iters=iters, seed=seed)
+    _, first = np.unique(labels, return_index=True)
+    remap = {int(old): new for new, old in enumerate(labels[np.sort(first)])}
+    return np.array([remap[int(l)] for l in labels])
+
+
+def build_raptor_tree_embedded(
+    chunks: list[dict[str, Any]],
+    embeddings: Any,
+    embed_fn: Any = None,
+    max_levels: int | None = None,
+    branching: int = 4,
+) -> tuple[list[dict[str, Any]], np.ndarray]:
+    """
+    Recursive RAPTOR tree: cluster the current level by embedding (k-means, about `branching`
+    children per parent), summarize each cluster, embed the summaries and repeat until a single
+    root (or `max_levels` levels including the chunks).
+    Returns (nodes, node embeddings as a float32 matrix aligned with nodes). Level-0 nodes come
+    first and node "index" is the position in the list.
+    """
+    embed_fn = embed_fn or embed
+    if not chunks:
+        return [], np.zeros((0, 0), dtype=np.float32)
+
+    nodes: list[dict[str, Any]] = [
+        {"text": c.get("text", ""), "level": 0, "chunk_indices": [i], "index": i, "children": [], "parent": None}
+        for i, c in enumerate(chunks)
+    ]
+    level_embs = as_matrix(embeddings)
+    all_embs = [level_embs]
+    level_ids = list(range(len(nodes)))
+    level = 0
+
+    while len(level_ids) > 1 and (max_levels is None or level + 1 < max_levels):
+        level += 1
+        k = max(1, math.ceil(len(level_ids) / max(2, branching)))
+        labels = _kmeans(level_embs, k)
+        parents: list[int] = []
+        for cluster in range(int(labels.max()) + 1):
+            members = [level_ids[i] for i in np.flatnonzero(labels == cluster)]
+            combined = " ".join(nodes[m]["text"] for m in members)
+            parent = len(nodes)
+            nodes.append({
+                "text": _extractive_summary(combined, max_sentences=5),
+                "level": level,
+                "chunk_indices": sorted(ci for m in members for ci in nodes[m]["chunk_indices"]),
+                "index": parent,
+                "children": members,
+                "parent": None,
+            })
+            for m in members:
+                nodes[m]["parent"] = parent
+            parents.append(parent)
+        level_embs = as_matrix(embed_fn([nodes[p]["text"] for p in parents]))
+        all_embs.append(level_embs)
+        level_ids = parents
+
+    return nodes, np.ascontiguousarray(np.vstack(all_embs), dtype=np.float32)
+
+
+def build_raptor_tree(
+    chunks: list[dict[str, Any]],
+    max_levels: int | None = None,
+    embeddings: Any = None,
+    embed_fn: Any = None,
+    branching: int = 4,
+) -> list[dict[str, Any]]:
     """
-    Build a shallow RAPTOR tree: level 0 = chunks, level 1 = summarized "parent" nodes.
-    Returns flat list of nodes with level and parent ref: {text, level, chunk_indices, index}.
+    Build a RAPTOR tree: level 0 = chunks, higher levels = summarized "parent" nodes up to the root.
+    With chunk embeddings the levels are clustered by similarity (build_raptor_tree_embedded);
+    without, contiguous groups of `branching` nodes are summarized.
+    Returns flat list of nodes: {text, level, chunk_indices, index, children, parent}.
     """
+    if embeddings is not None:
+        return build_raptor_tree_embedded(chunks, embeddings, embed_fn, max_levels, branching)[0]
     if not chunks:
         return []
 
-    nodes: list[dict[str, Any]] = []
-    for i, c in enumerate(chunks):
-        nodes.append({
-            "text": c.get("text", ""),
-            "level": 0,
-            "chunk_indices": [i],
-            "index": i,
-        })
-
-    if max_levels < 2 or len(chunks) < 2:
-        return nodes
-
-    # Level 1: group chunks into 2–4 groups, summarize each
-    group_size = max(1, len(chunks) // 3)
-    level1: list[dict[str, Any]] = []
-    for start in range(0, len(chunks), group_size):
-        group = chunks[start : start + group_size]
-        combined = " ".join(c.get("text", "") for c in group)
-        summary = _extractive_summary(combined, max_sentences=5)
-        level1.append({
-            "text": summary,
-            "level": 1,
-            "chunk_indices": list(range(start, min(start + group_size, len(chunks)))),
-            "index": len(nodes) + len(level1),
-        })
-    nodes.extend(level1)
+    nodes: list[dict[str, Any]] = [
+        {"text": c.get("text", ""), "level": 0, "chunk_indices": [i], "index": i, "children": [], "parent": None}
+        for i, c in enumerate(chunks)
+    ]
+    level_ids = list(range(len(nodes)))
+    level = 0
+    while len(level_ids) > 1 and (max_levels is None or level + 1 < max_levels):
+        level += 1
+        size = max(2, branching)
+        parents: list[int] = []
+        for start in range(0, len(level_ids), size):
+            members = level_ids[start : start + size]
+            parent = len(nodes)
+            nodes.append({
+                "text": _extractive_summary(" ".join(nodes[m]["text"] for m in members), max_sentences=5),
+                "level": level,
+                "chunk_indices": sorted(ci for m in members for ci in nodes[m]["chunk_indices"]),
+                "index": parent,
+                "children": members,
+                "parent": None,
+            })
+            for m in members:
+                nodes[m]["parent"] = parent
+            parents.append(parent)
+        level_ids = parents
     return nodes
 
 
+def fill_node_embeddings(
+    chunk_nodes: list[dict[str, Any]],
+    node_embeddings: list[list[float] | None] | None = None,
+    embed_fn: Any = None,
+) -> list[list[float]]:
+    """Return one embedding per node, embedding only the nodes without a stored vector."""
+    embed_fn = embed_fn or embed
+    embs: list[Any] = list(node_embeddings) if node_embeddings is not None else [None] * len(chunk_nodes)
+    embs += [None] * (len(chunk_nodes) - len(embs))
+    missing = [i for i, e in enumerate(embs) if e is None]
+    if missing:
+        for i, e in zip(missing, embed_fn([chunk_nodes[i].get("text", "") for i in missing])):
+            embs[i] = e
+    return embs
+
+
+def _beam_search(chunk_nodes: list[dict[str, Any]], scores: np.ndarray, beam_width: int) -> list[int]:
+    """Top-down search: keep the best `beam_width` nodes per step, descending until only leaves remain."""
+    frontier = [i for i, n in enumerate(chunk_nodes) if n.get("parent") is None]
+    frontier = sorted(frontier, key=lambda i: -scores[i])[:beam_width]
+    while any(chunk_nodes[i].get("children") for i in frontier):
+        nxt: list[int] = []
+        for i in frontier:
+            nxt.extend(chunk_nodes[i].get("children") or [i])
+        frontier = sorted(set(nxt), key=lambda i: -scores[i])[:beam_width]
+    return frontier
+
+
 def retrieve_multilevel(
     query: str,
     chunk_nodes: list[dict[str, Any]],
     top_k: int = 5,
     embed_fn: Any = None,
+    node_embeddings: Any = None,
+    query_embedding: list[float] | None = None,
+    mode: str = "collapsed",
+    beam_width: int | None = None,
 ) -> list[dict[str, Any]]:
     """
-    Multi-level retrieval: embed query and level-0/level-1 nodes, rank by similarity, return top chunks.
+    Multi-level retrieval over a stored tree; nothing is rebuilt.
+    mode="collapsed": rank all nodes of every level together; a summary hit resolves to its chunks.
+    mode="beam": top-down beam search from the root(s) (beam_width defaults to top_k).
+    node_embeddings (aligned with chunk_nodes) are reused where present; None entries are embedded.
+    Always returns actual chunk text.
     """
     embed_fn = embed_fn or embed
     if not chunk_nodes:
         return []
 
-    texts = [n.get("text", "") for n in chunk_nodes]
-    query_emb = embed_fn([query])[0]
-    node_embs = embed_fn(texts)
+    query_emb = query_embedding if query_embedding is not None else embed_fn([query])[0]
+    if isinstance(node_embeddings, np.ndarray) and len(node_embeddings) == len(chunk_nodes):
+        node_embs = node_embeddings
+    else:
+        node_embs = fill_node_embeddings(chunk_nodes, node_embeddings, embed_fn)
+    scores = cosine_scores(query_emb, node_embs)
 
-    def cos_sim(a, b):
-        dot = sum(x * y for x, y in zip(a, b))
-        na = sum(x * x for x in a) ** 0.5
-        nb = sum(x * x for x in b) ** 0.5
-        return dot / (na * nb) if na * nb else 0.0
+    if mode == "beam":
+        leaves = _beam_search(chunk_nodes, scores, beam_width or top_k)
+        return [{**chunk_nodes[i], "score": float(scores[i])} for i in leaves[:top_k]]
 
-    scored = [(cos_sim(query_emb, ne), i) for i, ne in enumerate(node_embs)]
-    scored.sort(key=lambda x: -x[0])
+    # Full ranking (best first): summary nodes may resolve to already-seen chunks
+    scored = [(float(scores[i]), int(i)) for i in top_k_indices(scores, len(scores))]
 
-    # Level-0 nodes are chunks (index 0..len(chunks)-1); level-1 are summaries. Always return actual chunk text.
+    # Level-0 nodes are chunks (index 0..len(chunks)-1); higher levels are summaries. Always return chunk text.
     result = []
     seen_chunks: set[int] = set()
-    for _, i in scored:
+    for score, i in scored:
         node = chunk_nodes[i]
-        for ci in node.get("chunk_indices", [i]):
-            if ci not in seen_chunks and node.get("level", 0) == 0:
+        if node.get("level", 0) == 0:
+            ci = node.get("chunk_indices", [i])[0]
+            if ci not in seen_chunks:
+                seen_chunks.add(ci)
+                result.append({**node, "score": score})
+        else:
+            # Resolve a summary to its best-matching unseen chunks
+            for ci in sorted(node.get("chunk_indices", []), key=lambda c: -scores[c] if c < len(scores) else 0):
+                if len(result) >= top_k:
+                    break
+                if ci in seen_chunks:
+                    continue
                 seen_chunks.add(ci)
+                chunk_text = chunk_nodes[ci].get("text", "") if 0 <= ci < len(chunk_nodes) else node.get("text", "")
                 result.append({
-                    **node,
-                    "score": cos_sim(query_emb, node_embs[i]),
+                    "text": chunk_text,
+                    "level": node.get("level", 1),
+                    "chunk_index": ci,
+                    "score": score,
                 })
-            elif node.get("level", 0) == 1 and ci not in seen_chunks:
-                seen_chunks.add(ci)
-                if len(result) < top_k:
-                    # Resolve to actual chunk text (level-0 nodes are first in list, index = position)
-                    chunk_text = chunk_nodes[ci].get("text", "") if 0 <= ci < len(chunk_nodes) else node.get("text", "")
-                    result.append({
-                        "text": chunk_text,
-                        "level": 1,
-                        "chunk_index": ci,
-                        "score": cos_sim(query_emb, node_embs[i]),
-                    })
         if len(result) >= top_k:
             break
     return result[:top_k]
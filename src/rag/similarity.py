@@ -0,0 +1,108 @@
+"""
+Vectorized similarity kernel shared by Graph RAG, RAPTOR and the native vector index.
+Embeddings are kept as contiguous float32 matrices, L2-normalized once; scoring is one
+matrix-vector (or matrix-matrix for query batches) product and top-k uses argpartition.
+"""
+
+from typing import Any
+
+import numpy as np
+
+
+def as_matrix(vectors: Any) -> np.ndarray:
+    """Stack vectors (list of lists, list of arrays or a 2-D array) into a contiguous float32 matrix."""
+    if isinstance(vectors, np.ndarray) and vectors.dtype == np.float32 and vectors.flags.c_contiguous:
+        return vectors if vectors.ndim == 2 else vectors.reshape(1, -1)
+    if not isinstance(vectors, np.ndarray) and len(vectors) == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    m = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    return m if m.ndim == 2 else m.reshape(1, -1)
+
+
+def normalize_rows(matrix: Any) -> np.ndarray:
+    """Return an L2-normalized float32 copy of the rows; zero rows stay zero (cosine 0)."""
+    m = as_matrix(matrix)
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(m / norms, dtype=np.float32)
+
+
+def cosine_scores(queries: Any, corpus: Any, corpus_normalized: bool = False) -> np.ndarray:
+    """
+    Cosine similarity of one query (1-D -> shape (n,)) or a batch of queries (2-D -> shape (q, n))
+    against the corpus matrix. Pass corpus_normalized=True to reuse a normalize_rows() result.
+    """
+    single = np.ndim(queries) == 1
+    q = normalize_rows(queries)
+    c = as_matrix(corpus) if corpus_normalized else normalize_rows(corpus)
+    if c.shape[0] == 0:
+        return np.zeros(0 if single else (q.shape[0], 0), dtype=np.float32)
+    scores = q @ c.T
+    return scores[0] if single else scores
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first (argpartition then sort of the k survivors).
+    For a 2-D score matrix, works per row and returns shape (q, k).
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[-1]
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        part = np.broadcast_to(np.arange(n), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def spherical_kmeans(
+    vectors: Any, k: int, iters: int = 20, seed: int = 0, block: int = 65536
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means (cosine) with k-means++ seeding. Deterministic for a given seed.
+    Returns (unit-norm centers (k, dim), cluster label per row). Rows are assigned in blocks
+    of `block` so large matrices never materialize a full (n, k) score matrix.
+    """
+    X = normalize_rows(vectors)
+    n = X.shape[0]
+    if k >= n:
+        return X.copy(), np.arange(n)
+    if k <= 1:
+        return normalize_rows(X.sum(axis=0)), np.zeros(n, dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    centers = np.empty((k, X.shape[1]), dtype=np.float32)
+    centers[0] = X[rng.integers(n)]
+    dist = 1.0 - X @ centers[0]
+    for j in range(1, k):
+        p = np.clip(dist, 0, None)
+        total = p.sum()
+        idx = rng.choice(n, p=p / total) if total > 0 else rng.integers(n)
+        centers[j] = X[idx]
+        dist = np.minimum(dist, 1.0 - X @ centers[j])
+
+    labels = np.full(n, -1)
+    best = np.empty(n, dtype=np.float32)
+    for _ in range(iters):
+        new_labels = np.empty(n, dtype=np.int64)
+        for start in range(0, n, block):
+            sims = X[start : start + block] @ centers.T
+            new_labels[start : start + block] = sims.argmax(axis=1)
+            best[start : start + block] = sims.max(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, X)
+        counts = np.bincount(labels, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty clusters with the points farthest from their centers
+            far = np.argsort(best)[: int(empty.sum())]
+            sums[empty] = X[far]
+        centers = normalize_rows(sums)
+    return centers, labels
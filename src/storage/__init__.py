@@ -1 +1 @@
-# Storage: vector_store, sql_store
+# Storage: vector_store, sql_store, graph_store, raptor_store (SQLite stores share sqlite_pool connections)
@@ -0,0 +1,126 @@
+"""
+SQLite store for the Graph RAG knowledge graph, persisted per document at ingest.
+Posting lists (entity -> chunks with mention counts) and co-occurrence edges live next to the chunk metadata.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import networkx as nx
+
+from src.rag.graph_rag import EntityIndex
+from src.storage.sqlite_pool import connection, ensure_schema
+
+
+def _default_db_path() -> str:
+    return os.environ.get("SQLITE_PATH", "./data/documents.db")
+
+
+class GraphStore:
+    """SQLite-backed graph: entity_postings (entity -> chunk, count), graph_edges (co-occurrence per document)."""
+
+    def __init__(self, db_path: str | None = None):
+        self.db_path = db_path or _default_db_path()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        ensure_schema(self.db_path, "graph_store", self._init_schema)
+
+    def _conn(self) -> sqlite3.Connection:
+        return connection(self.db_path)
+
+    def _init_schema(self) -> None:
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entity_postings (
+                    entity TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 1
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS graph_edges (
+                    document_id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    weight INTEGER NOT NULL DEFAULT 1
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entity_postings_entity ON entity_postings(entity, document_id, chunk_index)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entity_postings_document_id ON entity_postings(document_id)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_graph_edges_document_id ON graph_edges(document_id)"
+            )
+            conn.commit()
+
+    def save_document(
+        self,
+        document_id: str,
+        chunk_entities: list[tuple[int, dict[str, int]]],
+        edges: list[tuple[str, str, int]],
+    ) -> None:
+        """Replace the graph of one document: (chunk_index, {entity: count}) pairs and (source, target, weight) edges."""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entity_postings WHERE document_id = ?", (document_id,))
+            conn.execute("DELETE FROM graph_edges WHERE document_id = ?", (document_id,))
+            conn.executemany(
+                "INSERT INTO entity_postings (entity, document_id, chunk_index, count) VALUES (?, ?, ?, ?)",
+                [(e, document_id, idx, n) for idx, counts in chunk_entities for e, n in counts.items()],
+            )
+            conn.executemany(
+                "INSERT INTO graph_edges (document_id, source, target, weight) VALUES (?, ?, ?, ?)",
+                [(document_id, s, t, w) for s, t, w in edges],
+            )
+            conn.commit()
+
+    def load_graph(self, document_ids: list[str]) -> nx.DiGraph:
+        """Merge the stored co-occurrence graphs of the given documents; edge weights are summed."""
+        G = nx.DiGraph()
+        document_ids = [d for d in document_ids if d]
+        if not document_ids:
+            return G
+        marks = ",".join("?" * len(document_ids))
+        with self._conn() as conn:
+            edges = conn.execute(
+                f"SELECT source, target, SUM(weight) FROM graph_edges WHERE document_id IN ({marks}) "
+                "GROUP BY source, target",
+                document_ids,
+            ).fetchall()
+        for source, target, weight in edges:
+            G.add_edge(source, target, weight=weight)
+        return G
+
+    def load_index(self, document_ids: list[str]) -> EntityIndex:
+        """Posting lists of the given documents as an EntityIndex (entity -> (document_id, chunk_index, count))."""
+        document_ids = [d for d in document_ids if d]
+        if not document_ids:
+            return EntityIndex()
+        marks = ",".join("?" * len(document_ids))
+        with self._conn() as conn:
+            rows = conn.execute(
+                f"SELECT document_id, chunk_index, entity, count FROM entity_postings WHERE document_id IN ({marks}) "
+                "ORDER BY rowid",
+                document_ids,
+            ).fetchall()
+        return EntityIndex(rows)
+
+    def get_postings(self, entity: str) -> list[tuple[str, int, int]]:
+        """Corpus-wide posting list of one entity: [(document_id, chunk_index, count)], most mentions first."""
+        with self._conn() as conn:
+            return conn.execute(
+                "SELECT document_id, chunk_index, count FROM entity_postings WHERE entity = ? "
+                "ORDER BY count DESC, document_id, chunk_index",
+                (entity,),
+            ).fetchall()
+
+    def delete_document(self, document_id: str) -> None:
+        """Remove a document's part of the graph."""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entity_postings WHERE document_id = ?", (document_id,))
+            conn.execute("DELETE FROM graph_edges WHERE document_id = ?", (document_id,))
+            conn.commit()
@@ -0,0 +1,491 @@
+"""
+Native vector index (VECTOR_BACKEND=numpy): an in-process alternative to Chroma.
+Vectors live in a memory-mapped float32 file (one row per slot); ids, texts and metadata live in
+a parallel SQLite table keyed by slot. Small collections are searched exactly (one matrix-vector
+product); from VECTOR_IVF_MIN vectors an IVF index (spherical k-means lists, nprobe lists per
+query) narrows the candidates. With VECTOR_QUANTIZATION=int8|pq, candidates are scored on
+compressed in-memory codes (src.storage.quantization) and, unless VECTOR_RERANK=0, the shortlist
+is rescored from the float32 file. Implements the subset of the Chroma Collection API used by
+VectorStore (add, get, update, delete, query, count).
+"""
+
+import json
+import math
+import operator
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.rag.similarity import as_matrix, normalize_rows, spherical_kmeans, top_k_indices
+from src.storage.quantization import Int8Codes, PQCodes, ProductQuantizer
+from src.storage.sqlite_pool import connection, ensure_schema
+
+QUANTIZATIONS = ("none", "int8", "pq")
+
+
+def _default_ivf_min() -> int:
+    return int(os.environ.get("VECTOR_IVF_MIN", "20000"))
+
+
+def _default_nprobe() -> int:
+    return int(os.environ.get("VECTOR_IVF_NPROBE", "8"))
+
+
+def _default_quantization() -> str:
+    return os.environ.get("VECTOR_QUANTIZATION", "none").strip().lower()
+
+
+def _default_rerank() -> int:
+    """Shortlist size factor for float32 rerank of quantized results (0 disables the rerank)."""
+    return int(os.environ.get("VECTOR_RERANK", "4"))
+
+
+def _default_pq_min() -> int:
+    return int(os.environ.get("VECTOR_PQ_MIN", "10000"))
+
+
+_COMPARISONS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+
+
+def _compare(value: Any, op: str, arg: Any) -> bool:
+    if op in ("$in", "$nin"):
+        return (value in arg) == (op == "$in")
+    if op not in _COMPARISONS:
+        raise ValueError(f"Unsupported filter operator: {op}")
+    if op in ("$eq", "$ne"):
+        return _COMPARISONS[op](value, arg)
+    # Ordering: a missing key or a value of another type never matches (as in SQL)
+    try:
+        return value is not None and _COMPARISONS[op](value, arg)
+    except TypeError:
+        return False
+
+
+def _matches(meta: dict[str, Any], where: dict[str, Any]) -> bool:
+    """Evaluate a Chroma-style where filter ($and/$or, $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin, implicit AND of keys)."""
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(_matches(meta, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(_matches(meta, c) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = meta.get(key)
+            if not all(_compare(value, op, arg) for op, arg in cond.items()):
+                return False
+        elif meta.get(key) != cond:
+            return False
+    return True
+
+
+class NumpyCollection:
+    """
+    One collection in `directory`: vectors.f32 (memory-mapped, capacity x dim) and index.db
+    (slot -> id, document, metadata). Deleted slots are reused by later adds. Thread-safe.
+    quantization="int8" keeps int8 codes in memory; "pq" trains PQ codebooks once pq_min vectors
+    exist (exact float32 search until then). Codes are rebuilt from vectors.f32 on open.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        ivf_min: int | None = None,
+        nprobe: int | None = None,
+        quantization: str | None = None,
+        rerank: int | None = None,
+        pq_min: int | None = None,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(self.directory / "index.db")
+        self.vectors_path = self.directory / "vectors.f32"
+        self.ivf_path = self.directory / "ivf.npz"
+        self.ivf_min = _default_ivf_min() if ivf_min is None else ivf_min
+        self.nprobe = _default_nprobe() if nprobe is None else nprobe
+        self.quantization = quantization or _default_quantization()
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown VECTOR_QUANTIZATION {self.quantization!r}; expected one of {QUANTIZATIONS}")
+        self.rerank = _default_rerank() if rerank is None else rerank
+        self.pq_min = max(256, _default_pq_min() if pq_min is None else pq_min)
+        self.pq_path = self.directory / "pq.npz"
+        self._lock = threading.RLock()
+        ensure_schema(self.db_path, "numpy_index", self._init_schema)
+        self._load()
+
+    def _conn(self) -> sqlite3.Connection:
+        return connection(self.db_path)
+
+    def _init_schema(self) -> None:
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS vectors (
+                    slot INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    document TEXT,
+                    metadata_json TEXT
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+            conn.commit()
+
+    def _load(self) -> None:
+        with self._conn() as conn:
+            settings = dict(conn.execute("SELECT key, value FROM settings").fetchall())
+            rows = conn.execute("SELECT slot, id, metadata_json FROM vectors").fetchall()
+        self.dim = int(settings.get("dim", 0))
+        self.capacity = int(settings.get("capacity", 0))
+        self._ids: dict[str, int] = {}
+        self._slot_ids: dict[int, str] = {}
+        self._meta: dict[int, dict[str, Any]] = {}
+        self._by_doc: dict[Any, set[int]] = {}
+        for slot, cid, meta_json in rows:
+            self._index_row(slot, cid, json.loads(meta_json or "{}"))
+        self._vectors = None
+        self._alive = np.zeros(self.capacity, dtype=bool)
+        self._inv_norms = np.zeros(self.capacity, dtype=np.float32)
+        if self.capacity and self.vectors_path.exists():
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+            slots = np.fromiter(self._slot_ids, dtype=np.int64)
+            self._alive[slots] = True
+            self._inv_norms[slots] = self._inverse_norms(self._vectors[slots])
+        self._used = int(max(self._slot_ids, default=-1)) + 1
+        self._free = sorted(set(range(self._used)) - set(self._slot_ids), reverse=True)
+        self._ivf_centers: np.ndarray | None = None
+        self._ivf_labels: np.ndarray | None = None
+        self._ivf_trained_at = 0
+        self._ivf_lists: tuple[np.ndarray, np.ndarray] | None = None
+        if self.ivf_path.exists():
+            data = np.load(self.ivf_path)
+            self._ivf_centers = data["centers"]
+            labels = np.full(self.capacity, -1, dtype=np.int32)
+            stored = data["labels"][: self.capacity]
+            labels[: len(stored)] = stored
+            self._ivf_labels = labels
+            self._ivf_trained_at = int(data["trained_at"])
+            missing = np.flatnonzero(self._alive & (labels < 0))
+            if len(missing):
+                labels[missing] = self._assign(self._vectors[missing])
+        self._codes: Int8Codes | PQCodes | None = None
+        if self.quantization == "int8" and self.dim:
+            self._codes = Int8Codes(self.dim, self.capacity)
+        elif self.quantization == "pq" and self.pq_path.exists():
+            self._codes = PQCodes(ProductQuantizer.load(self.pq_path), self.capacity)
+        if self._codes is not None and self._slot_ids:
+            slots = np.fromiter(sorted(self._slot_ids), dtype=np.int64)
+            for start in range(0, len(slots), 65536):
+                block = slots[start : start + 65536]
+                self._codes.encode(block, self._vectors[block])
+
+    def _index_row(self, slot: int, cid: str, meta: dict[str, Any]) -> None:
+        self._ids[cid] = slot
+        self._slot_ids[slot] = cid
+        self._meta[slot] = meta
+        self._by_doc.setdefault(meta.get("document_id"), set()).add(slot)
+
+    def _unindex_row(self, slot: int) -> None:
+        cid = self._slot_ids.pop(slot)
+        del self._ids[cid]
+        meta = self._meta.pop(slot)
+        doc_slots = self._by_doc.get(meta.get("document_id"))
+        if doc_slots is not None:
+            doc_slots.discard(slot)
+            if not doc_slots:
+                del self._by_doc[meta.get("document_id")]
+
+    @staticmethod
+    def _inverse_norms(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1)
+        norms[norms == 0] = np.inf
+        return (1.0 / norms).astype(np.float32)
+
+    def _save_settings(self, conn: sqlite3.Connection) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            [("dim", str(self.dim)), ("capacity", str(self.capacity))],
+        )
+
+    def _grow(self, needed: int) -> None:
+        """Make room for `needed` slots: extend the vector file and the per-slot arrays."""
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        extra = capacity - self.capacity
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+        self._inv_norms = np.concatenate([self._inv_norms, np.zeros(extra, dtype=np.float32)])
+        if self._ivf_labels is not None:
+            self._ivf_labels = np.concatenate([self._ivf_labels, np.full(extra, -1, dtype=np.int32)])
+        if self._codes is not None:
+            self._codes.resize(capacity)
+        self.capacity = capacity
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 65536):
+            block = normalize_rows(vectors[start : start + 65536])
+            labels[start : start + 65536] = (block @ self._ivf_centers.T).argmax(axis=1)
+        return labels
+
+    def _maybe_train_ivf(self) -> None:
+        """(Re)train the IVF lists once the collection reaches ivf_min and whenever it doubles."""
+        n = len(self._slot_ids)
+        if n < self.ivf_min or (self._ivf_centers is not None and n < 2 * self._ivf_trained_at):
+            return
+        slots = np.fromiter(self._slot_ids, dtype=np.int64)
+        nlist = max(1, int(round(4 * math.sqrt(n))))
+        rng = np.random.default_rng(0)
+        sample = slots if len(slots) <= 64 * nlist else rng.choice(slots, 64 * nlist, replace=False)
+        self._ivf_centers, _ = spherical_kmeans(self._vectors[np.sort(sample)], nlist, iters=10)
+        labels = np.full(self.capacity, -1, dtype=np.int32)
+        labels[slots] = self._assign(self._vectors[slots])
+        self._ivf_labels = labels
+        self._ivf_trained_at = n
+        self._ivf_lists = None
+        self._save_ivf()
+
+    def _maybe_train_pq(self) -> None:
+        """Train PQ codebooks once the collection reaches pq_min vectors, then encode every vector."""
+        if self.quantization != "pq" or self._codes is not None or len(self._slot_ids) < self.pq_min:
+            return
+        slots = np.fromiter(sorted(self._slot_ids), dtype=np.int64)
+        pq = ProductQuantizer(self.dim).train(self._vectors[slots])
+        pq.save(self.pq_path)
+        self._codes = PQCodes(pq, self.capacity)
+        for start in range(0, len(slots), 65536):
+            block = slots[start : start + 65536]
+            self._codes.encode(block, self._vectors[block])
+
+    def bytes_per_vector(self) -> dict[str, int]:
+        """In-memory size of one vector as searched: float32 row vs quantized code (0 if not quantized)."""
+        codes = self._codes.nbytes // self.capacity if self._codes is not None and self.capacity else 0
+        return {"float32": self.dim * 4, "codes": codes}
+
+    def _save_ivf(self) -> None:
+        if self._ivf_centers is not None:
+            np.savez(self.ivf_path, centers=self._ivf_centers, labels=self._ivf_labels, trained_at=self._ivf_trained_at)
+
+    def _lists(self) -> tuple[np.ndarray, np.ndarray]:
+        """Inverted lists as (slots grouped by list, offsets); rebuilt lazily after writes."""
+        if self._ivf_lists is None:
+            labels = np.where(self._alive[: self._used], self._ivf_labels[: self._used], -1)
+            order = np.argsort(labels, kind="stable")
+            offsets = np.searchsorted(labels[order], np.arange(len(self._ivf_centers) + 1))
+            self._ivf_lists = (order, offsets)
+        return self._ivf_lists
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Slots in the nprobe IVF lists closest to the query."""
+        order, offsets = self._lists()
+        probe = top_k_indices(self._ivf_centers @ query, nprobe)
+        return np.sort(np.concatenate([order[offsets[p] : offsets[p + 1]] for p in probe]))
+
+    def count(self) -> int:
+        return len(self._slot_ids)
+
+    def add(
+        self,
+        ids: list[str],
+        embeddings: Any,
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None:
+        """Insert new ids (existing ids are replaced)."""
+        if not ids:
+            return
+        matrix = as_matrix(embeddings)
+        documents = documents or [""] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            if not self.dim:
+                self.dim = matrix.shape[1]
+                if self.quantization == "int8":
+                    self._codes = Int8Codes(self.dim, self.capacity)
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match collection dimension {self.dim}")
+            replaced = [cid for cid in ids if cid in self._ids]
+            if replaced:
+                self.delete(ids=replaced)
+            slots = [self._free.pop() if self._free else None for _ in ids]
+            fresh = [i for i, s in enumerate(slots) if s is None]
+            for i, slot in zip(fresh, range(self._used, self._used + len(fresh))):
+                slots[i] = slot
+            self._used += len(fresh)
+            self._grow(self._used)
+            slot_arr = np.asarray(slots, dtype=np.int64)
+            self._vectors[slot_arr] = matrix
+            self._alive[slot_arr] = True
+            self._inv_norms[slot_arr] = self._inverse_norms(matrix)
+            if self._codes is not None:
+                self._codes.encode(slot_arr, matrix)
+            if self._ivf_centers is not None:
+                self._ivf_labels[slot_arr] = self._assign(matrix)
+                self._ivf_lists = None
+            with self._conn() as conn:
+                conn.executemany(
+                    "INSERT INTO vectors (slot, id, document, metadata_json) VALUES (?, ?, ?, ?)",
+                    [
+                        (int(s), cid, doc, json.dumps(meta or {}, ensure_ascii=False))
+                        for s, cid, doc, meta in zip(slots, ids, documents, metadatas)
+                    ],
+                )
+                self._save_settings(conn)
+                conn.commit()
+            self._vectors.flush()
+            for s, cid, meta in zip(slots, ids, metadatas):
+                self._index_row(int(s), cid, dict(meta or {}))
+            if self._ivf_centers is not None:
+                self._save_ivf()
+            self._maybe_train_ivf()
+            self._maybe_train_pq()
+
+    def update(self, ids: list[str], metadatas: list[dict[str, Any]]) -> None:
+        """Replace metadata of existing ids (vectors and texts are kept)."""
+        with self._lock:
+            rows = [(cid, meta) for cid, meta in zip(ids, metadatas) if cid in self._ids]
+            with self._conn() as conn:
+                conn.executemany(
+                    "UPDATE vectors SET metadata_json = ? WHERE id = ?",
+                    [(json.dumps(meta, ensure_ascii=False), cid) for cid, meta in rows],
+                )
+                conn.commit()
+            for cid, meta in rows:
+                slot = self._ids[cid]
+                self._unindex_row(slot)
+                self._index_row(slot, cid, dict(meta))
+
+    def delete(self, ids: list[str] | None = None, where: dict[str, Any] | None = None) -> None:
+        with self._lock:
+            slots = self._select(ids, where)
+            if not slots:
+                return
+            with self._conn() as conn:
+                conn.executemany("DELETE FROM vectors WHERE slot = ?", [(int(s),) for s in slots])
+                conn.commit()
+            for s in slots:
+                self._unindex_row(int(s))
+            self._alive[slots] = False
+            self._ivf_lists = None
+            self._free = sorted(set(self._free) | {int(s) for s in slots}, reverse=True)
+
+    def _select(self, ids: list[str] | None, where: dict[str, Any] | None) -> list[int]:
+        """Slots matching ids and/or where, in slot order. document_id filters use the per-document index."""
+        if ids is not None:
+            slots = {self._ids[cid] for cid in ids if cid in self._ids}
+        else:
+            doc_filter = (where or {}).get("document_id")
+            if isinstance(doc_filter, dict) and set(doc_filter) == {"$in"}:
+                slots = set().union(*(self._by_doc.get(d, set()) for d in doc_filter["$in"]))
+            elif doc_filter is not None and not isinstance(doc_filter, dict):
+                slots = set(self._by_doc.get(doc_filter, set()))
+            else:
+                slots = set(self._slot_ids)
+        if where:
+            slots = {s for s in slots if _matches(self._meta[s], where)}
+        return sorted(slots)
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict[str, Any] | None = None,
+        include: list[str] | tuple[str, ...] = ("documents", "metadatas"),
+    ) -> dict[str, Any]:
+        with self._lock:
+            slots = self._select(ids, where)
+            out: dict[str, Any] = {"ids": [self._slot_ids[s] for s in slots]}
+            if "metadatas" in include:
+                out["metadatas"] = [dict(self._meta[s]) for s in slots]
+            if "documents" in include:
+                out["documents"] = self._documents(slots)
+            if "embeddings" in include:
+                out["embeddings"] = np.array(self._vectors[slots]) if slots else np.zeros((0, self.dim), dtype=np.float32)
+        return out
+
+    def _documents(self, slots: list[int]) -> list[str]:
+        texts: dict[int, str] = {}
+        with self._conn() as conn:
+            for start in range(0, len(slots), 500):
+                batch = [int(s) for s in slots[start : start + 500]]
+                marks = ",".join("?" * len(batch))
+                texts.update(conn.execute(f"SELECT slot, document FROM vectors WHERE slot IN ({marks})", batch).fetchall())
+        return [texts.get(int(s)) or "" for s in slots]
+
+    def query(
+        self,
+        query_embeddings: Any,
+        n_results: int = 10,
+        where: dict[str, Any] | None = None,
+        include: list[str] | tuple[str, ...] = ("documents", "metadatas", "distances"),
+    ) -> dict[str, Any]:
+        """
+        Cosine distance (1 - cosine similarity) search. Exact over all vectors (or the filtered
+        subset); IVF candidates when the index is trained and the filter does not already narrow
+        the search below ivf_min.
+        """
+        queries = normalize_rows(query_embeddings)
+        out: dict[str, Any] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            filtered = np.asarray(self._select(None, where), dtype=np.int64) if where else None
+            for q in queries:
+                if self._vectors is None or not self._slot_ids:
+                    slots, dists = [], []
+                else:
+                    slots, dists = self._search(q, n_results, filtered)
+                out["ids"].append([self._slot_ids[s] for s in slots])
+                out["metadatas"].append([dict(self._meta[s]) for s in slots] if "metadatas" in include else None)
+                out["documents"].append(self._documents(slots) if "documents" in include else None)
+                out["distances"].append(dists)
+        return out
+
+    def _search(self, q: np.ndarray, k: int, filtered: np.ndarray | None) -> tuple[list[int], list[float]]:
+        use_ivf = self._ivf_centers is not None and (filtered is None or len(filtered) >= self.ivf_min)
+        if use_ivf:
+            candidates = self._candidates(q, min(self.nprobe, len(self._ivf_centers)))
+            if filtered is not None:
+                candidates = np.intersect1d(candidates, filtered, assume_unique=True)
+            if len(candidates) < k:
+                candidates = filtered if filtered is not None else np.flatnonzero(self._alive[: self._used])
+        elif filtered is not None:
+            candidates = filtered
+        else:
+            candidates = None
+        if candidates is None:
+            candidates = np.arange(self._used)
+            scores = self._scores(q, None)
+            scores[~self._alive[: self._used]] = -np.inf
+        elif len(candidates) == 0:
+            return [], []
+        else:
+            scores = self._scores(q, candidates)
+        k = min(k, len(self._slot_ids), len(candidates))
+        if self._codes is not None and self.rerank > 0:
+            # Shortlist on the codes, then exact float32 scores for the shortlist only
+            shortlist = candidates[top_k_indices(scores, k * self.rerank)]
+            shortlist = shortlist[self._alive[shortlist]]
+            candidates, scores = shortlist, (self._vectors[shortlist] @ q) * self._inv_norms[shortlist]
+        top = top_k_indices(scores, k)
+        return [int(candidates[i]) for i in top], [float(1.0 - scores[i]) for i in top]
+
+    def _scores(self, q: np.ndarray, slots: np.ndarray | None) -> np.ndarray:
+        """Cosine scores of the unit query against rows [0, used) or `slots` (approximate when quantized)."""
+        if self._codes is not None:
+            return self._codes.scores(q, slots, self._used)
+        if slots is None:
+            return (self._vectors[: self._used] @ q) * self._inv_norms[: self._used]
+        return (self._vectors[slots] @ q) * self._inv_norms[slots]
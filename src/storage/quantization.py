@@ -0,0 +1,148 @@
+"""
+Compressed vector codes for the numpy vector backend (VECTOR_QUANTIZATION=int8|pq).
+Vectors are L2-normalized before encoding, so scores approximate cosine similarity.
+int8: symmetric scalar quantization with one float32 scale per vector (d + 4 bytes, ~4x smaller).
+pq: product quantization, m sub-vectors with 256 centroids each (m bytes, 16x smaller with the
+default m = d / 4). Queries stay float32 (asymmetric distance computation); the caller can
+rerank the shortlist with the full-precision vectors.
+"""
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.rag.similarity import normalize_rows
+
+_BLOCK = 65536
+
+
+class Int8Codes:
+    """int8 codes of unit vectors plus a per-row scale, sized by capacity (slot-aligned)."""
+
+    def __init__(self, dim: int, capacity: int = 0):
+        self.dim = dim
+        self.codes = np.zeros((capacity, dim), dtype=np.int8)
+        self.scales = np.zeros(capacity, dtype=np.float32)
+
+    def resize(self, capacity: int) -> None:
+        extra = capacity - len(self.codes)
+        if extra > 0:
+            self.codes = np.concatenate([self.codes, np.zeros((extra, self.dim), dtype=np.int8)])
+            self.scales = np.concatenate([self.scales, np.zeros(extra, dtype=np.float32)])
+
+    def encode(self, slots: np.ndarray, vectors: Any) -> None:
+        unit = normalize_rows(vectors)
+        peak = np.abs(unit).max(axis=1)
+        peak[peak == 0] = 1.0
+        self.codes[slots] = np.round(unit * (127.0 / peak)[:, None]).astype(np.int8)
+        self.scales[slots] = peak / 127.0
+
+    def scores(self, query: np.ndarray, slots: np.ndarray | None, used: int) -> np.ndarray:
+        """Approximate cosine of a unit query against rows [0, used) or the given slots."""
+        codes = self.codes[:used] if slots is None else self.codes[slots]
+        scales = self.scales[:used] if slots is None else self.scales[slots]
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK):
+            out[start : start + _BLOCK] = codes[start : start + _BLOCK] @ query
+        return out * scales
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+
+def _nearest(X: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Index of the nearest center (L2) per row; |x|^2 is constant per row and skipped."""
+    d = X @ centers.T
+    d *= -2
+    d += (centers**2).sum(1)
+    return d.argmin(axis=1)
+
+
+def _kmeans_l2(X: np.ndarray, k: int, iters: int, rng: np.random.Generator) -> np.ndarray:
+    """Plain (Euclidean) k-means for PQ codebooks; random initial centers from the rows."""
+    X = np.ascontiguousarray(X)
+    centers = X[rng.choice(len(X), size=k, replace=len(X) < k)].copy()
+    for _ in range(iters):
+        labels = _nearest(X, centers)
+        # Per-dimension bincount: sub-vectors are short, and this is much faster than np.add.at
+        sums = np.stack([np.bincount(labels, weights=X[:, j], minlength=k) for j in range(X.shape[1])], axis=1)
+        counts = np.bincount(labels, minlength=k)
+        filled = counts > 0
+        centers[filled] = (sums[filled] / counts[filled, None]).astype(np.float32)
+    return centers
+
+
+class ProductQuantizer:
+    """Codebooks of m sub-spaces x 256 centroids, trained on unit vectors."""
+
+    def __init__(self, dim: int, m: int | None = None, codebooks: np.ndarray | None = None):
+        m = m or max(1, dim // 4)
+        while dim % m:
+            m -= 1
+        self.dim = dim
+        self.m = m
+        self.dsub = dim // m
+        self.codebooks = codebooks  # (m, 256, dsub)
+
+    def train(self, vectors: Any, iters: int = 10, seed: int = 0, max_rows: int = 256 * 64) -> "ProductQuantizer":
+        X = normalize_rows(vectors)
+        rng = np.random.default_rng(seed)
+        if len(X) > max_rows:
+            X = X[np.sort(rng.choice(len(X), size=max_rows, replace=False))]
+        self.codebooks = np.stack([
+            _kmeans_l2(X[:, j * self.dsub : (j + 1) * self.dsub], 256, iters, rng) for j in range(self.m)
+        ]).astype(np.float32)
+        return self
+
+    def encode(self, vectors: Any) -> np.ndarray:
+        X = normalize_rows(vectors)
+        codes = np.empty((len(X), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = np.ascontiguousarray(X[:, j * self.dsub : (j + 1) * self.dsub])
+            for start in range(0, len(sub), _BLOCK):
+                codes[start : start + _BLOCK, j] = _nearest(sub[start : start + _BLOCK], self.codebooks[j])
+        return codes
+
+    def tables(self, query: np.ndarray) -> np.ndarray:
+        """ADC lookup table (m, 256): dot product of each query sub-vector with each centroid."""
+        return np.einsum("md,mkd->mk", query.reshape(self.m, self.dsub), self.codebooks)
+
+    def save(self, path: str | Path) -> None:
+        np.savez(path, codebooks=self.codebooks)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ProductQuantizer":
+        codebooks = np.load(path)["codebooks"]
+        m, _, dsub = codebooks.shape
+        return cls(m * dsub, m, codebooks)
+
+
+class PQCodes:
+    """Slot-aligned PQ codes (m bytes per vector) scored with asymmetric distance computation."""
+
+    def __init__(self, pq: ProductQuantizer, capacity: int = 0):
+        self.pq = pq
+        self.codes = np.zeros((capacity, pq.m), dtype=np.uint8)
+
+    def resize(self, capacity: int) -> None:
+        extra = capacity - len(self.codes)
+        if extra > 0:
+            self.codes = np.concatenate([self.codes, np.zeros((extra, self.pq.m), dtype=np.uint8)])
+
+    def encode(self, slots: np.ndarray, vectors: Any) -> None:
+        self.codes[slots] = self.pq.encode(vectors)
+
+    def scores(self, query: np.ndarray, slots: np.ndarray | None, used: int) -> np.ndarray:
+        table = self.pq.tables(query)
+        codes = self.codes[:used] if slots is None else self.codes[slots]
+        cols = np.arange(self.pq.m)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK):
+            out[start : start + _BLOCK] = table[cols, codes[start : start + _BLOCK]].sum(axis=1)
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
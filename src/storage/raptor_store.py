@@ -0,0 +1,104 @@
+"""
+SQLite store for RAPTOR trees, built once per document at ingest.
+Nodes keep level, parent/children links and chunk coverage; summary nodes also keep their
+text and float32 embedding. Leaf text and vectors are not duplicated (they live in the vector store).
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.storage.sqlite_pool import connection, ensure_schema
+
+
+def _default_db_path() -> str:
+    return os.environ.get("SQLITE_PATH", "./data/documents.db")
+
+
+class RaptorStore:
+    """SQLite-backed RAPTOR tree per document: raptor_nodes table."""
+
+    def __init__(self, db_path: str | None = None):
+        self.db_path = db_path or _default_db_path()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        ensure_schema(self.db_path, "raptor_store", self._init_schema)
+
+    def _conn(self) -> sqlite3.Connection:
+        return connection(self.db_path)
+
+    def _init_schema(self) -> None:
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS raptor_nodes (
+                    document_id TEXT NOT NULL,
+                    node_index INTEGER NOT NULL,
+                    level INTEGER NOT NULL,
+                    parent INTEGER,
+                    children_json TEXT,
+                    chunk_indices_json TEXT,
+                    text TEXT,
+                    embedding BLOB,
+                    PRIMARY KEY (document_id, node_index)
+                )
+            """)
+            conn.commit()
+
+    def save_tree(self, document_id: str, nodes: list[dict[str, Any]], embeddings: Any) -> None:
+        """Replace the tree of one document. embeddings: matrix aligned with nodes (only summaries are kept)."""
+        rows = []
+        for node, emb in zip(nodes, embeddings):
+            summary = node.get("level", 0) > 0
+            rows.append((
+                document_id,
+                node["index"],
+                node.get("level", 0),
+                node.get("parent"),
+                json.dumps(node.get("children", [])),
+                json.dumps(node.get("chunk_indices", [])),
+                node.get("text", "") if summary else None,
+                np.asarray(emb, dtype=np.float32).tobytes() if summary else None,
+            ))
+        with self._conn() as conn:
+            conn.execute("DELETE FROM raptor_nodes WHERE document_id = ?", (document_id,))
+            conn.executemany(
+                """INSERT INTO raptor_nodes
+                   (document_id, node_index, level, parent, children_json, chunk_indices_json, text, embedding)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+            conn.commit()
+
+    def load_tree(self, document_id: str) -> tuple[list[dict[str, Any]], list[np.ndarray | None]]:
+        """
+        Return (nodes, embeddings) ordered by node index. Leaf nodes have empty text and a None
+        embedding: fill them from the stored chunks. Empty lists if no tree was stored.
+        """
+        with self._conn() as conn:
+            rows = conn.execute(
+                """SELECT node_index, level, parent, children_json, chunk_indices_json, text, embedding
+                   FROM raptor_nodes WHERE document_id = ? ORDER BY node_index""",
+                (document_id,),
+            ).fetchall()
+        nodes: list[dict[str, Any]] = []
+        embs: list[np.ndarray | None] = []
+        for idx, level, parent, children, chunk_indices, text, emb in rows:
+            nodes.append({
+                "text": text or "",
+                "level": level,
+                "chunk_indices": json.loads(chunk_indices or "[]"),
+                "index": idx,
+                "children": json.loads(children or "[]"),
+                "parent": parent,
+            })
+            embs.append(np.frombuffer(emb, dtype=np.float32) if emb is not None else None)
+        return nodes, embs
+
+    def delete_document(self, document_id: str) -> None:
+        """Remove a document's tree."""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM raptor_nodes WHERE document_id = ?", (document_id,))
+            conn.commit()
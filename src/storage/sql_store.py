@@ -1,5 +1,6 @@
 """
-SQLite store for documents and chunks metadata. Relational queries.
+SQLite store for documents and chunks metadata. Relational queries, and an FTS5 index of chunk
+text for BM25 (lexical) retrieval.
 """
 
 import json
@@ -8,21 +9,24 @@ import sqlite3
 from pathlib import Path
 from typing import Any
 
+from src.parser.normalize import lexical_terms, lexical_text
+from src.storage.sqlite_pool import connection, ensure_schema
+
 
 def _default_db_path() -> str:
     return os.environ.get("SQLITE_PATH", "./data/documents.db")
 
 
 class SQLStore:
-    """SQLite-backed store: documents table, chunks table."""
+    """SQLite-backed store: documents table, chunks table. Cheap to construct (pooled connection, schema created once)."""
 
     def __init__(self, db_path: str | None = None):
         self.db_path = db_path or _default_db_path()
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        self._init_schema()
+        ensure_schema(self.db_path, "sql_store", self._init_schema)
 
     def _conn(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+        return connection(self.db_path)
 
     def _init_schema(self) -> None:
         with self._conn() as conn:
@@ -32,7 +36,10 @@ class SQLStore:
                     path TEXT,
                     format TEXT,
                     strategy TEXT,
-                    created_at TEXT DEFAULT (datetime('now'))
+                    created_at TEXT DEFAULT (datetime('now')),
+                    content_hash TEXT,
+                    file_size INTEGER,
+                    file_mtime REAL
                 )
             """)
             conn.execute("""
@@ -44,12 +51,52 @@ class SQLStore:
                     char_end INTEGER,
                     token_count INTEGER,
                     metadata_json TEXT,
+                    chunk_hash TEXT,
                     FOREIGN KEY (document_id) REFERENCES documents(id)
                 )
             """)
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks(document_id)"
             )
+            # Single-row counter bumped on every ingest/delete (query result cache invalidation)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS corpus (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    version INTEGER NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO corpus (id, version) VALUES (0, 0)")
+            # BM25 index: body is lexical_text(text) (src.parser.normalize); the rest is returned as stored.
+            # Rows are keyed by the chunks rowid, so a document's rows are found through
+            # idx_chunks_document_id instead of a scan of the (unindexed) document_id column
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks_bm25 USING fts5(
+                    body,
+                    text UNINDEXED,
+                    document_id UNINDEXED,
+                    chunk_index UNINDEXED,
+                    metadata_json UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+            # Databases indexed before rows were keyed by chunk rowid: move them over once
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'").fetchone():
+                conn.execute("""
+                    INSERT INTO chunks_bm25 (rowid, body, text, document_id, chunk_index, metadata_json)
+                    SELECT c.id, f.body, f.text, f.document_id, f.chunk_index, f.metadata_json
+                    FROM chunks_fts f JOIN chunks c ON c.document_id = f.document_id AND c.chunk_index = f.chunk_index
+                """)
+                conn.execute("DROP TABLE chunks_fts")
+            # Databases created before content fingerprints: add the new columns in place
+            for table, column, decl in (
+                ("documents", "content_hash", "TEXT"),
+                ("documents", "file_size", "INTEGER"),
+                ("documents", "file_mtime", "REAL"),
+                ("chunks", "chunk_hash", "TEXT"),
+            ):
+                existing = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
             conn.commit()
 
     def insert_document(
@@ -58,11 +105,35 @@ class SQLStore:
         path: str | None = None,
         format_type: str | None = None,
         strategy: str | None = None,
+        content_hash: str | None = None,
+        file_size: int | None = None,
+        file_mtime: float | None = None,
     ) -> None:
         with self._conn() as conn:
             conn.execute(
-                "INSERT OR REPLACE INTO documents (id, path, format, strategy) VALUES (?, ?, ?, ?)",
-                (document_id, path or "", format_type or "", strategy or ""),
+                """INSERT OR REPLACE INTO documents (id, path, format, strategy, content_hash, file_size, file_mtime)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (document_id, path or "", format_type or "", strategy or "", content_hash, file_size, file_mtime),
+            )
+            conn.commit()
+
+    def set_fingerprint(
+        self, document_id: str, content_hash: str | None, file_size: int | None, file_mtime: float | None
+    ) -> None:
+        """Record the content hash and size/mtime a completed ingest of the document was built from."""
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE documents SET content_hash = ?, file_size = ?, file_mtime = ? WHERE id = ?",
+                (content_hash, file_size, file_mtime, document_id),
+            )
+            conn.commit()
+
+    def touch_document(self, document_id: str, file_size: int, file_mtime: float) -> None:
+        """Record a new size/mtime for a document whose content hash did not change."""
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE documents SET file_size = ?, file_mtime = ? WHERE id = ?",
+                (file_size, file_mtime, document_id),
             )
             conn.commit()
 
@@ -71,29 +142,85 @@ class SQLStore:
         document_id: str,
         chunks: list[dict[str, Any]],
     ) -> None:
+        """
+        Replace a document's chunk rows (one transaction, one executemany). Chunks with a "text"
+        are also indexed for search_chunks(), with their "search_metadata" (vector store metadata).
+        """
+        rows = [
+            (
+                document_id,
+                c.get("index", 0),
+                c.get("start", 0),
+                c.get("end", 0),
+                c.get("token_count"),
+                json.dumps(c.get("metadata", {}), ensure_ascii=False),
+                c.get("content_hash"),
+            )
+            for c in chunks
+        ]
         with self._conn() as conn:
-            conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
-            for c in chunks:
-                meta_json = json.dumps(c.get("metadata", {}), ensure_ascii=False)
-                conn.execute(
-                    """INSERT INTO chunks (document_id, chunk_index, char_start, char_end, token_count, metadata_json)
-                       VALUES (?, ?, ?, ?, ?, ?)""",
+            self._delete_chunk_rows(conn, document_id)
+            conn.executemany(
+                """INSERT INTO chunks (document_id, chunk_index, char_start, char_end, token_count, metadata_json, chunk_hash)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+            # The document's rows were all just inserted, so rowid order is insertion order
+            row_ids = [r[0] for r in conn.execute("SELECT id FROM chunks WHERE document_id = ? ORDER BY id", (document_id,))]
+            conn.executemany(
+                "INSERT INTO chunks_bm25 (rowid, body, text, document_id, chunk_index, metadata_json) VALUES (?, ?, ?, ?, ?, ?)",
+                [
                     (
+                        row_id,
+                        lexical_text(c["text"]),
+                        c["text"],
                         document_id,
                         c.get("index", 0),
-                        c.get("start", 0),
-                        c.get("end", 0),
-                        c.get("token_count"),
-                        meta_json,
-                    ),
-                )
+                        json.dumps(c.get("search_metadata", {}), ensure_ascii=False),
+                    )
+                    for row_id, c in zip(row_ids, chunks)
+                    if c.get("text")
+                ],
+            )
             conn.commit()
 
+    @staticmethod
+    def _delete_chunk_rows(conn: sqlite3.Connection, document_id: str) -> None:
+        """Delete a document's chunk rows and their BM25 rows (by rowid, through the document_id index)."""
+        conn.execute(
+            "DELETE FROM chunks_bm25 WHERE rowid IN (SELECT id FROM chunks WHERE document_id = ?)", (document_id,)
+        )
+        conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+
+    def search_chunks(
+        self,
+        query: str,
+        top_k: int = 5,
+        filter_metadata: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        BM25 search over indexed chunk text; list of {document, metadata, bm25} (lower bm25 =
+        better, as SQLite reports it). Any query term may match. filter_metadata takes the
+        vector store's Chroma-style filters (see _where_sql).
+        """
+        terms = lexical_terms(query)
+        if not terms or top_k <= 0:
+            return []
+        match = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+        where, params = _where_sql(filter_metadata or {})
+        sql = (
+            "SELECT text, metadata_json, bm25(chunks_bm25) AS score FROM chunks_bm25 "
+            f"WHERE chunks_bm25 MATCH ?{' AND ' + where if where else ''} ORDER BY score LIMIT ?"
+        )
+        rows = self._conn().execute(sql, (match, *params, top_k)).fetchall()
+        return [{"document": text, "metadata": json.loads(meta or "{}"), "bm25": score} for text, meta, score in rows]
+
     def get_chunks_by_document_id(self, document_id: str) -> list[dict[str, Any]]:
         with self._conn() as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
-                "SELECT document_id, chunk_index, char_start, char_end, token_count, metadata_json FROM chunks WHERE document_id = ? ORDER BY chunk_index",
+            cur = conn.cursor()
+            cur.row_factory = sqlite3.Row
+            rows = cur.execute(
+                "SELECT document_id, chunk_index, char_start, char_end, token_count, metadata_json, chunk_hash FROM chunks WHERE document_id = ? ORDER BY chunk_index",
                 (document_id,),
             ).fetchall()
         out = []
@@ -111,14 +238,16 @@ class SQLStore:
                 "end": r["char_end"] or 0,
                 "token_count": r["token_count"],
                 "metadata": meta,
+                "content_hash": r["chunk_hash"],
             })
         return out
 
     def get_document_metadata(self, document_id: str) -> dict[str, Any] | None:
         with self._conn() as conn:
-            conn.row_factory = sqlite3.Row
-            row = conn.execute(
-                "SELECT id, path, format, strategy, created_at FROM documents WHERE id = ?",
+            cur = conn.cursor()
+            cur.row_factory = sqlite3.Row
+            row = cur.execute(
+                "SELECT id, path, format, strategy, created_at, content_hash, file_size, file_mtime FROM documents WHERE id = ?",
                 (document_id,),
             ).fetchone()
         if not row:
@@ -129,11 +258,64 @@ class SQLStore:
             "format": row["format"],
             "strategy": row["strategy"],
             "created_at": row["created_at"],
+            "content_hash": row["content_hash"],
+            "file_size": row["file_size"],
+            "file_mtime": row["file_mtime"],
         }
 
+    def corpus_version(self) -> int:
+        """Counter of corpus changes; shared by every process using this database."""
+        row = self._conn().execute("SELECT version FROM corpus WHERE id = 0").fetchone()
+        return row[0] if row else 0
+
+    def bump_corpus_version(self) -> int:
+        """Record a corpus change (ingest or delete) and return the new version."""
+        with self._conn() as conn:
+            conn.execute("UPDATE corpus SET version = version + 1 WHERE id = 0")
+            conn.commit()
+        return self.corpus_version()
+
     def delete_document(self, document_id: str) -> None:
         """Remove document and all its chunks from the store."""
         with self._conn() as conn:
-            conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+            self._delete_chunk_rows(conn, document_id)
             conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
             conn.commit()
+
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _where_sql(where: dict[str, Any]) -> tuple[str, list[Any]]:
+    """
+    SQL condition on chunks_bm25 for a Chroma-style metadata filter ($and/$or, $eq/$ne/$gt/$gte/
+    $lt/$lte/$in/$nin, implicit AND of keys), so lexical and vector retrieval filter alike.
+    """
+    parts: list[str] = []
+    params: list[Any] = []
+    for key, cond in where.items():
+        if key in ("$and", "$or"):
+            subs = [_where_sql(c) for c in cond]
+            parts.append("(" + (" AND " if key == "$and" else " OR ").join(f"({s or '1'})" for s, _ in subs) + ")")
+            params.extend(p for _, sub_params in subs for p in sub_params)
+            continue
+        if cond is None:
+            continue
+        column = "document_id" if key == "document_id" else "json_extract(metadata_json, ?)"
+        column_params = [] if key == "document_id" else ['$."' + key.replace('"', '') + '"']
+        ops = cond if isinstance(cond, dict) else {"$eq": cond}
+        for op, arg in ops.items():
+            if op in ("$in", "$nin"):
+                values = list(arg)
+                marks = ", ".join("?" * len(values))
+                if values:
+                    parts.append(f"{column} {'IN' if op == '$in' else 'NOT IN'} ({marks})")
+                    params.extend(column_params + values)
+                elif op == "$in":
+                    parts.append("0")
+            elif op in _OPERATORS:
+                parts.append(f"{column} {_OPERATORS[op]} ?")
+                params.extend(column_params + [arg])
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+    return " AND ".join(parts), params
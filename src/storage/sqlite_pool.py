@@ -0,0 +1,147 @@
+"""
+Long-lived SQLite connections shared by the SQLite-backed stores.
+One connection per (thread, database file), opened once and tuned with WAL journaling,
+synchronous=NORMAL, a larger page cache and memory-mapped reads; a thread's connections are
+closed when the thread exits. Schema creation runs once
+per process and database (ensure_schema) instead of on every store construction.
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Callable
+
+
+def _default_cache_kib() -> int:
+    return int(os.environ.get("SQLITE_CACHE_KIB", str(64 * 1024)))
+
+
+def _default_mmap_bytes() -> int:
+    return int(os.environ.get("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+
+
+def _default_busy_timeout() -> float:
+    return float(os.environ.get("SQLITE_BUSY_TIMEOUT", "30"))
+
+
+class _PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection that can be weakly referenced (plain connections cannot)."""
+
+
+class _ThreadConnections:
+    """One thread's connections by database file; closed when the thread's locals are dropped."""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.conns: dict[str, sqlite3.Connection] = {}
+        weakref.finalize(self, _close_each, self.conns)
+
+
+def _close_each(conns: dict[str, sqlite3.Connection]) -> None:
+    for conn in conns.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    conns.clear()
+
+
+_local = threading.local()
+_lock = threading.Lock()
+# Every open pooled connection, for close_all(); a thread's holder keeps its own alive
+_open: "weakref.WeakSet[sqlite3.Connection]" = weakref.WeakSet()
+_schemas: set[tuple[str, str]] = set()
+_generation = 0
+_pid = os.getpid()
+
+
+def _key(db_path: str) -> str:
+    return os.path.abspath(db_path)
+
+
+def _reset_after_fork() -> None:
+    """A forked child must not reuse the parent's connections or schema flags (lock held)."""
+    global _pid, _generation
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _open.clear()
+        _schemas.clear()
+        _generation += 1
+
+
+def _open_connection(db_path: str) -> sqlite3.Connection:
+    # check_same_thread=False only so close_all() (or the exiting thread's finalizer) may close it;
+    # each connection is used by one thread
+    conn = sqlite3.connect(db_path, timeout=_default_busy_timeout(), check_same_thread=False, factory=_PooledConnection)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size={-_default_cache_kib()}")
+    conn.execute(f"PRAGMA mmap_size={_default_mmap_bytes()}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def connection(db_path: str) -> sqlite3.Connection:
+    """
+    This thread's connection to db_path (opened on first use). Use as `with connection(p) as conn:`
+    for a transaction; the connection itself stays open. Re-opened if the file was removed.
+    """
+    key = _key(db_path)
+    with _lock:
+        _reset_after_fork()
+        generation = _generation
+    holder: _ThreadConnections | None = getattr(_local, "holder", None)
+    if holder is None or holder.generation != generation:
+        holder = _local.holder = _ThreadConnections(generation)
+    conns = holder.conns
+    conn = conns.get(key)
+    if conn is not None and not os.path.exists(key):
+        _forget(key)
+        conn = None
+    if conn is None:
+        conn = _open_connection(db_path)
+        conns[key] = conn
+        with _lock:
+            _open.add(conn)
+    return conn
+
+
+def _forget(key: str) -> None:
+    """Drop this thread's connection and the schema flags of a database file that was removed."""
+    conn = _local.holder.conns.pop(key, None)
+    with _lock:
+        if conn is not None:
+            _open.discard(conn)
+            conn.close()
+        for entry in [s for s in _schemas if s[0] == key]:
+            _schemas.discard(entry)
+
+
+def ensure_schema(db_path: str, name: str, init: Callable[[], None]) -> None:
+    """Run init() once per process for (db_path, name); later calls return immediately."""
+    entry = (_key(db_path), name)
+    if entry in _schemas and os.path.exists(entry[0]):
+        return
+    with _lock:
+        _reset_after_fork()
+        if entry in _schemas and os.path.exists(entry[0]):
+            return
+        _schemas.discard(entry)
+    init()
+    with _lock:
+        _schemas.add(entry)
+
+
+def close_all() -> None:
+    """Close every pooled connection (all threads) and forget initialized schemas."""
+    global _generation
+    with _lock:
+        for conn in list(_open):
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _open.clear()
+        _schemas.clear()
+        _generation += 1
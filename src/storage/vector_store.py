@@ -1,34 +1,183 @@
 """
-Chroma vector store wrapper. LangChain-compatible add/query with metadata.
+Vector store wrapper. LangChain-compatible add/query with metadata.
+Backends (VECTOR_BACKEND): "chroma" (default, chromadb PersistentClient) or "numpy"
+(src.storage.numpy_index: memory-mapped flat/IVF index, no chromadb import). Both expose the
+Chroma Collection subset in CollectionBackend; VectorStore semantics do not depend on the backend.
+get_vector_store() returns the process-wide instance for (persist directory, collection, backend);
+constructing VectorStore directly opens a new client and collection handle.
 """
 
 import os
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Protocol
 
-import chromadb
-from chromadb.config import Settings
+from src.parser.prepare import chunk_hash
+
+BACKENDS = ("chroma", "numpy")
 
 
 def _default_persist_dir() -> str:
     return os.environ.get("CHROMA_PATH", "./data/chroma")
 
 
+def _default_backend() -> str:
+    return os.environ.get("VECTOR_BACKEND", "chroma").strip().lower()
+
+
+class CollectionBackend(Protocol):
+    """The part of the Chroma Collection API that VectorStore relies on."""
+
+    def add(self, ids: list[str], embeddings: Any, documents: list[str], metadatas: list[dict[str, Any]]) -> None: ...
+
+    def get(self, ids: list[str] | None = None, where: dict[str, Any] | None = None, include: Any = ...) -> dict[str, Any]: ...
+
+    def update(self, ids: list[str], metadatas: list[dict[str, Any]]) -> None: ...
+
+    def delete(self, ids: list[str] | None = None, where: dict[str, Any] | None = None) -> None: ...
+
+    def query(self, query_embeddings: Any, n_results: int = 10, where: dict[str, Any] | None = None, include: Any = ...) -> dict[str, Any]: ...
+
+    def count(self) -> int: ...
+
+
+def chunk_ids(document_id: str, chunks: list[dict[str, Any]], seen: dict[str, int] | None = None) -> list[str]:
+    """
+    Content-addressed chunk ids: document_id + chunk text hash (+ occurrence for repeated text),
+    so unchanged chunks keep their id when a re-ingested document shifts chunk positions.
+    Pass the same `seen` dict across consecutive slices of one document to number them as a whole.
+    """
+    seen = {} if seen is None else seen
+    ids = []
+    for c in chunks:
+        h = (c.get("content_hash") or chunk_hash(c.get("text", "")))[:16]
+        n = seen.get(h, 0)
+        seen[h] = n + 1
+        ids.append(f"{document_id}_{h}_{n}")
+    return ids
+
+
+def chunk_metadata(document_id: str, i: int, chunk: dict[str, Any], metadata: dict[str, Any] | None) -> dict[str, Any]:
+    """Metadata stored with chunk i of a document (also indexed with its text for BM25 filters)."""
+    chunk_meta = {
+        "document_id": document_id,
+        "chunk_index": i,
+        "start": chunk.get("start", 0),
+        "end": chunk.get("end", 0),
+        **(metadata or {}),
+    }
+    # Chroma requires metadata values to be str, int, float, or bool
+    return {k: (v if isinstance(v, (str, int, float, bool)) else str(v)) for k, v in chunk_meta.items()}
+
+
+class ChunkSync:
+    """
+    Streaming sync_documents for one document: push() chunk batches as they are embedded (new
+    chunks are written immediately), then commit() applies metadata moves and deletes stale
+    chunks, or rollback() removes what this sync added. Stored vectors are loaded once and
+    served by stored_embedding() so unchanged chunks are not re-embedded.
+    """
+
+    def __init__(self, collection: "CollectionBackend", document_id: str, metadata: dict[str, Any] | None = None):
+        self._collection = collection
+        self.document_id = document_id
+        self.metadata = metadata
+        existing = collection.get(where={"document_id": document_id}, include=["metadatas", "embeddings"])
+        embs = existing.get("embeddings")
+        if embs is None:
+            embs = [None] * len(existing["ids"])
+        self._stored = {i: (m, e) for i, m, e in zip(existing["ids"], existing["metadatas"] or [], embs)}
+        self._seen: dict[str, int] = {}
+        self._position = 0
+        self._keep: set[str] = set()
+        self._added: list[str] = []
+        self._updates: dict[str, dict[str, Any]] = {}
+        self.counts = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    def ids(self, chunks: list[dict[str, Any]]) -> list[str]:
+        """Ids of the next chunks of the document (call once per batch, in document order)."""
+        return chunk_ids(self.document_id, chunks, self._seen)
+
+    def stored_embedding(self, cid: str) -> Any:
+        row = self._stored.get(cid)
+        return None if row is None else row[1]
+
+    def push(self, ids: list[str], chunks: list[dict[str, Any]], embeddings: Any) -> None:
+        add_ids: list[str] = []
+        add_embs: list[Any] = []
+        add_texts: list[str] = []
+        add_metas: list[dict[str, Any]] = []
+        for cid, chunk, emb in zip(ids, chunks, embeddings):
+            meta = chunk_metadata(self.document_id, self._position, chunk, self.metadata)
+            self._position += 1
+            self._keep.add(cid)
+            if cid not in self._stored:
+                add_ids.append(cid)
+                add_embs.append(emb)
+                add_texts.append(chunk.get("text", ""))
+                add_metas.append(meta)
+            elif self._stored[cid][0] != meta:
+                self._updates[cid] = meta
+            else:
+                self.counts["unchanged"] += 1
+        if add_ids:
+            self._collection.add(ids=add_ids, embeddings=add_embs, documents=add_texts, metadatas=add_metas)
+            self._added.extend(add_ids)
+
+    def commit(self) -> dict[str, int]:
+        stale = [i for i in self._stored if i not in self._keep]
+        if stale:
+            self._collection.delete(ids=stale)
+        if self._updates:
+            self._collection.update(ids=list(self._updates), metadatas=list(self._updates.values()))
+        self.counts.update(added=len(self._added), updated=len(self._updates), deleted=len(stale))
+        return self.counts
+
+    def rollback(self) -> None:
+        if self._added:
+            self._collection.delete(ids=self._added)
+            self._added = []
+
+
 class VectorStore:
-    """Chroma-backed vector store: add chunks with embeddings, query by embedding."""
+    """Vector store (Chroma or native numpy backend): add chunks with embeddings, query by embedding."""
 
-    def __init__(self, persist_directory: str | None = None, collection_name: str = "documents"):
+    def __init__(
+        self,
+        persist_directory: str | None = None,
+        collection_name: str = "documents",
+        backend: str | None = None,
+    ):
         self.persist_directory = persist_directory or _default_persist_dir()
         Path(self.persist_directory).mkdir(parents=True, exist_ok=True)
         self.collection_name = collection_name
-        self._client = chromadb.PersistentClient(
-            path=self.persist_directory,
-            settings=Settings(anonymized_telemetry=False),
-        )
-        self._collection = self._client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"},
-        )
+        self.backend = backend or _default_backend()
+        self._client: Any = None
+        self._collection: CollectionBackend
+        if self.backend == "numpy":
+            from src.storage.numpy_index import NumpyCollection
+
+            self._collection = NumpyCollection(Path(self.persist_directory) / "numpy" / collection_name)
+        elif self.backend == "chroma":
+            import chromadb
+            from chromadb.config import Settings
+
+            self._client = chromadb.PersistentClient(
+                path=self.persist_directory,
+                settings=Settings(anonymized_telemetry=False),
+            )
+            self._collection = self._client.get_or_create_collection(
+                name=collection_name,
+                metadata={"hnsw:space": "cosine"},
+            )
+        else:
+            raise ValueError(f"Unknown VECTOR_BACKEND {self.backend!r}; expected one of {BACKENDS}")
+
+    def close(self) -> None:
+        """Release the Chroma client (no-op for the numpy backend and chromadb versions without Client.close)."""
+        close = getattr(self._client, "close", None)
+        if close is not None:
+            close()
 
     def add_chunks(
         self,
@@ -38,24 +187,77 @@ class VectorStore:
         metadata: dict[str, Any] | None = None,
     ) -> None:
         """Add chunk texts with embeddings and metadata (document_id, chunk_index, etc.)."""
-        meta = metadata or {}
-        ids = []
-        metadatas = []
-        for i, (chunk, emb) in enumerate(zip(chunks, embeddings)):
-            chunk_id = f"{document_id}_{i}"
-            ids.append(chunk_id)
-            chunk_meta = {
-                "document_id": document_id,
-                "chunk_index": i,
-                "start": chunk.get("start", 0),
-                "end": chunk.get("end", 0),
-                **meta,
-            }
-            # Chroma requires metadata values to be str, int, float, or bool
-            chunk_meta = {k: (v if isinstance(v, (str, int, float, bool)) else str(v)) for k, v in chunk_meta.items()}
-            metadatas.append(chunk_meta)
-        texts = [c.get("text", "") for c in chunks]
-        self._collection.add(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+        self.add_chunks_many([(chunks, embeddings, document_id, metadata)])
+
+    def add_chunks_many(
+        self,
+        documents: list[tuple[list[dict[str, Any]], Any, str, dict[str, Any] | None]],
+    ) -> None:
+        """Bulk add for several documents in one collection call: [(chunks, embeddings, document_id, metadata)]."""
+        ids: list[str] = []
+        metadatas: list[dict[str, Any]] = []
+        texts: list[str] = []
+        all_embeddings: list[Any] = []
+        for chunks, embeddings, document_id, metadata in documents:
+            ids.extend(chunk_ids(document_id, chunks))
+            metadatas.extend(chunk_metadata(document_id, i, c, metadata) for i, c in enumerate(chunks))
+            texts.extend(c.get("text", "") for c in chunks)
+            all_embeddings.extend(embeddings)
+        if ids:
+            self._collection.add(ids=ids, embeddings=all_embeddings, documents=texts, metadatas=metadatas)
+
+    def sync_documents(
+        self,
+        documents: list[tuple[list[dict[str, Any]], Any, str, dict[str, Any] | None]],
+    ) -> dict[str, int]:
+        """
+        Make the stored chunks of each document match `chunks` (chunk-level diff by content id):
+        add new chunks, update metadata of moved ones (no re-embedding), delete stale ones.
+        Embeddings are only read for new chunks, so unchanged ones may be None.
+        Returns counts {added, updated, deleted, unchanged}.
+        """
+        counts = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        doc_ids = [d for _, _, d, _ in documents]
+        if not doc_ids:
+            return counts
+        where = {"document_id": doc_ids[0]} if len(doc_ids) == 1 else {"document_id": {"$in": doc_ids}}
+        existing = self._collection.get(where=where, include=["metadatas"])
+        stored = dict(zip(existing["ids"], existing["metadatas"] or []))
+
+        add_ids: list[str] = []
+        add_embs: list[Any] = []
+        add_texts: list[str] = []
+        add_metas: list[dict[str, Any]] = []
+        upd_ids: list[str] = []
+        upd_metas: list[dict[str, Any]] = []
+        keep: set[str] = set()
+        for chunks, embeddings, document_id, metadata in documents:
+            for i, (cid, chunk, emb) in enumerate(zip(chunk_ids(document_id, chunks), chunks, embeddings)):
+                meta = chunk_metadata(document_id, i, chunk, metadata)
+                keep.add(cid)
+                if cid not in stored:
+                    add_ids.append(cid)
+                    add_embs.append(emb)
+                    add_texts.append(chunk.get("text", ""))
+                    add_metas.append(meta)
+                elif stored[cid] != meta:
+                    upd_ids.append(cid)
+                    upd_metas.append(meta)
+                else:
+                    counts["unchanged"] += 1
+        stale = [i for i in stored if i not in keep]
+        if stale:
+            self._collection.delete(ids=stale)
+        if upd_ids:
+            self._collection.update(ids=upd_ids, metadatas=upd_metas)
+        if add_ids:
+            self._collection.add(ids=add_ids, embeddings=add_embs, documents=add_texts, metadatas=add_metas)
+        counts.update(added=len(add_ids), updated=len(upd_ids), deleted=len(stale))
+        return counts
+
+    def begin_sync(self, document_id: str, metadata: dict[str, Any] | None = None) -> ChunkSync:
+        """Start a streaming chunk-level sync of one document (see ChunkSync)."""
+        return ChunkSync(self._collection, document_id, metadata)
 
     def query(
         self,
@@ -64,21 +266,56 @@ class VectorStore:
         filter_metadata: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
         """Query by embedding; return list of {document, metadata, distance}."""
+        return self.query_many([query_embedding], top_k=top_k, filter_metadata=filter_metadata)[0]
+
+    def query_many(
+        self,
+        query_embeddings: Any,
+        top_k: int = 5,
+        filter_metadata: dict[str, Any] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Batched query: one collection call for all embeddings; a result list per query, in order."""
+        if len(query_embeddings) == 0:
+            return []
         where = None
         if filter_metadata:
             where = {k: v for k, v in filter_metadata.items() if v is not None}
         results = self._collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=top_k,
             where=where,
             include=["documents", "metadatas", "distances"],
         )
-        out: list[dict[str, Any]] = []
-        docs = results["documents"][0] or []
-        metas = results["metadatas"][0] or []
-        dists = results["distances"][0] or []
-        for doc, meta, dist in zip(docs, metas, dists):
-            out.append({"document": doc, "metadata": meta or {}, "distance": dist})
+        out: list[list[dict[str, Any]]] = []
+        for docs, metas, dists in zip(results["documents"], results["metadatas"], results["distances"]):
+            out.append([
+                {"document": doc, "metadata": meta or {}, "distance": dist}
+                for doc, meta, dist in zip(docs or [], metas or [], dists or [])
+            ])
+        return out
+
+    def get_by_document_ids(self, document_ids: list[str]) -> list[dict[str, Any]]:
+        """
+        Fetch stored chunks for documents: list of {id, document, metadata, embedding},
+        ordered by (document_id, chunk_index). Reuses the vectors written at ingest;
+        embeddings are NumPy rows (stack with src.rag.similarity.as_matrix).
+        """
+        document_ids = [d for d in document_ids if d]
+        if not document_ids:
+            return []
+        if len(document_ids) == 1:
+            where: dict[str, Any] = {"document_id": document_ids[0]}
+        else:
+            where = {"document_id": {"$in": list(document_ids)}}
+        results = self._collection.get(where=where, include=["documents", "metadatas", "embeddings"])
+        embs = results.get("embeddings")
+        if embs is None:
+            embs = [None] * len(results["ids"])
+        out = [
+            {"id": i, "document": doc or "", "metadata": meta or {}, "embedding": emb}
+            for i, doc, meta, emb in zip(results["ids"], results["documents"] or [], results["metadatas"] or [], embs)
+        ]
+        out.sort(key=lambda r: (r["metadata"].get("document_id", ""), r["metadata"].get("chunk_index", 0)))
         return out
 
     def delete_by_document_id(self, document_id: str) -> None:
@@ -87,3 +324,39 @@ class VectorStore:
         existing = self._collection.get(where={"document_id": document_id}, include=[])
         if existing["ids"]:
             self._collection.delete(ids=existing["ids"])
+
+
+_stores: dict[tuple[str, str, str], VectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(
+    persist_directory: str | None = None,
+    collection_name: str = "documents",
+    backend: str | None = None,
+) -> VectorStore:
+    """
+    Shared VectorStore for (persist_directory, collection_name, backend), created on first use.
+    The defaults follow CHROMA_PATH and VECTOR_BACKEND at call time; a store whose directory
+    was removed is re-created. Thread-safe.
+    """
+    key = (os.path.abspath(persist_directory or _default_persist_dir()), collection_name, backend or _default_backend())
+    store = _stores.get(key)
+    if store is not None and os.path.isdir(key[0]):
+        return store
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or not os.path.isdir(key[0]):
+            if store is not None:
+                store.close()
+            store = _stores[key] = VectorStore(*key)
+        return store
+
+
+def close_vector_stores() -> None:
+    """Close and forget every shared VectorStore (e.g. at shutdown or between test runs)."""
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()